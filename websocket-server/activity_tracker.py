@@ -0,0 +1,138 @@
+"""
+마지막 활동 시각 쓰기 병합
+조회 API가 읽을 때마다 `last_accessed`/`lastActivityAt` 같은 시각 필드를 바로 쓰지 않고 메모리에 기록해 두었다가,
+주기마다 문서당 최대 1번(batched write)으로 저장 (시각은 저장 주기 이내 오차로 유지)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from google.api_core import exceptions
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Firestore batched write 한 번에 넣을 수 있는 최대 쓰기 수
+BATCH_LIMIT = 500
+
+
+class ActivityTracker:
+    """(컬렉션, 문서 ID) → 저장 대기 중인 시각 필드"""
+
+    def __init__(self):
+        self.flush_interval = float(os.getenv('ACTIVITY_FLUSH_INTERVAL', '30'))  # 초
+
+        self._pending: Dict[Tuple[str, str], Dict[str, datetime]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'touches': 0,
+            'coalesced_touches': 0,
+            'superseded': 0,
+            'flushes': 0,
+            'written_docs': 0,
+            'missing_docs': 0,
+            'failed_batches': 0,
+            'failed_writes': 0,
+            'last_flush_ms': 0.0,
+        }
+
+    def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Activity tracker started (interval={self.flush_interval}s)")
+
+    async def stop(self):
+        """백그라운드 태스크 종료 후 남은 시각 저장"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def touch(self, collection: str, doc_id: str, *fields: str, when: datetime = None):
+        """문서의 시각 필드 갱신 예약 (즉시 반환, 같은 문서는 다음 저장 때 한 번만 씀)"""
+        when = when or datetime.utcnow()
+        key = (collection, doc_id)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = self._pending[key] = {}
+        else:
+            self.stats['coalesced_touches'] += 1
+        for field in fields:
+            pending[field] = when
+        self.stats['touches'] += 1
+
+    def supersede(self, collection: str, doc_id: str, field: str, written_at: datetime):
+        """다른 경로에서 더 최근 시각을 이미 저장했으면 대기 중인 값 취소 (오래된 값으로 덮어쓰지 않도록)"""
+        pending = self._pending.get((collection, doc_id))
+        if not pending or field not in pending or pending[field] > written_at:
+            return
+        del pending[field]
+        if not pending:
+            del self._pending[(collection, doc_id)]
+        self.stats['superseded'] += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Activity tracker flush error: {e}")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            items = list(pending.items())
+
+            started = time.perf_counter()
+            for start in range(0, len(items), BATCH_LIMIT):
+                chunk = items[start:start + BATCH_LIMIT]
+                batch = db.batch()
+                for (collection, doc_id), fields in chunk:
+                    batch.update(db.collection(collection).document(doc_id), fields)
+                try:
+                    await batch.commit()
+                    self.stats['written_docs'] += len(chunk)
+                except Exception as e:
+                    # 삭제된 문서가 섞여 있으면 batch 전체가 실패하므로 문서별로 다시 저장
+                    self.stats['failed_batches'] += 1
+                    logger.warning(f"Activity batch failed ({len(chunk)} docs), retrying individually: {e}")
+                    await self._write_individually(chunk)
+
+            self.stats['flushes'] += 1
+            self.stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _write_individually(self, chunk):
+        for (collection, doc_id), fields in chunk:
+            try:
+                await db.collection(collection).document(doc_id).update(fields)
+                self.stats['written_docs'] += 1
+            except exceptions.NotFound:
+                self.stats['missing_docs'] += 1
+            except Exception as e:
+                self.stats['failed_writes'] += 1
+                logger.error(f"Activity write failed ({collection}/{doc_id}): {e}")
+
+    def get_stats(self) -> dict:
+        return {
+            'pending_docs': len(self._pending),
+            **self.stats,
+        }
+
+
+# 싱글톤
+activity_tracker = ActivityTracker()
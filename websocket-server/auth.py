@@ -9,15 +9,27 @@ import hashlib
 import os
 from typing import Dict, Optional, List
 from datetime import datetime, timedelta
-import google.cloud.firestore as firestore
 from google.oauth2 import id_token
 from google.auth.transport import requests
 import logging
 
-# Initialize Firebase
-db = firestore.Client()
+from database import db, async_transactional
+from doc_cache import doc_cache
+from activity_tracker import activity_tracker
+from sharded_counter import beta_user_counter
+
 logger = logging.getLogger(__name__)
 
+BETA_APPLICATIONS_COLLECTION = 'beta_applications'
+
+def normalize_email(email: str) -> str:
+    """중복 판별용 이메일 정규화 (앞뒤 공백 제거, 소문자)"""
+    return email.strip().lower()
+
+def beta_application_id(email: str) -> str:
+    """베타 신청 문서 ID - 정규화한 이메일의 해시 (같은 이메일은 항상 같은 문서)"""
+    return hashlib.sha256(normalize_email(email).encode('utf-8')).hexdigest()
+
 # SimpleAuthManager 클래스 제거됨 - Google OAuth만 사용
 
 class GoogleAuth:
@@ -60,13 +72,9 @@ class BetaUserManager:
         self.max_beta_users = 30
         
     async def get_beta_user_count(self) -> int:
-        """현재 베타 사용자 수 조회"""
+        """현재 베타 사용자 수 조회 (샤드 카운터)"""
         try:
-            users_ref = db.collection('users').where('is_beta_user', '==', True)
-            count = 0
-            for _ in users_ref.stream():
-                count += 1
-            return count
+            return await beta_user_counter.get()
         except Exception as e:
             logger.error(f"Error getting beta user count: {e}")
             return 17  # 기본값
@@ -77,18 +85,11 @@ class BetaUserManager:
         return count < self.max_beta_users
         
     async def register_beta_user(self, google_user_info: dict) -> dict:
-        """베타 사용자 등록"""
+        """베타 사용자 등록 (정원 확인, 사용자 생성, 카운터 증가를 한 트랜잭션으로 처리)"""
         try:
-            if not await self.can_register_beta_user():
-                raise Exception("Beta slots are full")
-                
             user_id = google_user_info['user_id']
+            user_ref = db.collection('users').document(user_id)
             
-            # 이미 등록된 사용자인지 확인
-            existing_user = await self.get_user_by_google_id(user_id)
-            if existing_user:
-                return existing_user
-                
             # 새 베타 사용자 생성
             user_doc = {
                 'user_id': user_id,
@@ -107,24 +108,73 @@ class BetaUserManager:
                 'last_accessed': datetime.utcnow()
             }
             
-            db.collection('users').document(user_id).set(user_doc)
-            logger.info(f"Registered new beta user: {user_id}")
             
-            return user_doc
+            @async_transactional
+            async def register(transaction):
+                # 이미 등록된 사용자인지 확인
+                snapshot = await user_ref.get(transaction=transaction)
+                if snapshot.exists:
+                    return snapshot.to_dict(), False
+                
+                # 동시에 등록하는 트랜잭션은 같은 카운터 샤드를 읽으므로 충돌 후 재시도됨 (정원 초과 방지)
+                count = await beta_user_counter.read(transaction)
+                if count is None:
+                    return None, False
+                if count >= self.max_beta_users:
+                    raise Exception("Beta slots are full")
+                
+                transaction.set(user_ref, user_doc)
+                beta_user_counter.increment(transaction, 1)
+                return user_doc, True
+            
+            user_data, created = await register(db.transaction())
+            if user_data is None:
+                # 카운터가 아직 없으면 users 컬렉션 기준으로 초기화 후 다시 시도
+                await beta_user_counter.reconcile()
+                user_data, created = await register(db.transaction())
+                if user_data is None:
+                    raise Exception("Beta user counter is not initialized")
+            doc_cache.invalidate('users', user_id)
+            
+            if created:
+                logger.info(f"Registered new beta user: {user_id}")
+            return user_data
             
         except Exception as e:
             logger.error(f"Error registering beta user: {e}")
             raise
+    
+    async def remove_beta_user(self, user_id: str) -> bool:
+        """베타 사용자 해제 (is_beta_user 해제와 카운터 감소를 한 트랜잭션으로 처리)"""
+        user_ref = db.collection('users').document(user_id)
+        
+        @async_transactional
+        async def remove(transaction) -> bool:
+            snapshot = await user_ref.get(transaction=transaction)
+            if not snapshot.exists or not (snapshot.to_dict() or {}).get('is_beta_user'):
+                return False
+            counted = await beta_user_counter.is_initialized(transaction)
+            transaction.update(user_ref, {
+                'is_beta_user': False,
+                'beta_removed_at': datetime.utcnow()
+            })
+            beta_user_counter.increment(transaction, -1, initialized=counted)
+            return True
+        
+        try:
+            removed = await remove(db.transaction())
+            doc_cache.invalidate('users', user_id)
+            if removed:
+                logger.info(f"Removed beta user: {user_id}")
+            return removed
+        except Exception as e:
+            logger.error(f"Error removing beta user {user_id}: {e}")
+            raise
             
     async def get_user_by_google_id(self, google_id: str) -> Optional[dict]:
-        """Google ID로 사용자 조회"""
+        """Google ID로 사용자 조회 (문서 캐시)"""
         try:
-            user_ref = db.collection('users').document(google_id)
-            user_doc = user_ref.get()
-            
-            if user_doc.exists:
-                return user_doc.to_dict()
-            return None
+            return await doc_cache.get('users', google_id)
             
         except Exception as e:
             logger.error(f"Error getting user by Google ID: {e}")
@@ -135,40 +185,48 @@ class BetaUserManager:
         try:
             user_ref = db.collection('users').document(user_id)
             
-            # 먼저 기존 사용자 데이터 확인
-            user_doc = user_ref.get()
-            
-            update_data = {
-                'user_id': user_id,
-                'interests': onboarding_data.get('interests', []),
-                'nickname': onboarding_data.get('nickname', ''),
-                'onboarding_completed': True,
-                'onboarding_completed_at': datetime.utcnow(),
-                'last_accessed': datetime.utcnow()
-            }
+            # 기존 사용자 확인과 베타 사용자 카운터 증가를 한 트랜잭션으로 처리 (동시 호출 시 중복 증가 방지)
+            @async_transactional
+            async def complete(transaction):
+                user_doc = await user_ref.get(transaction=transaction)
+                counted = await beta_user_counter.is_initialized(transaction)
+                
+                update_data = {
+                    'user_id': user_id,
+                    'interests': onboarding_data.get('interests', []),
+                    'nickname': onboarding_data.get('nickname', ''),
+                    'onboarding_completed': True,
+                    'onboarding_completed_at': datetime.utcnow(),
+                    'last_accessed': datetime.utcnow()
+                }
+                
+                # 기존 데이터가 있으면 유지
+                if user_doc.exists:
+                    existing_data = user_doc.to_dict()
+                    update_data.update({
+                        'user_type': existing_data.get('user_type', 'guest'),
+                        'is_beta_user': existing_data.get('is_beta_user', True),
+                        'email': existing_data.get('email', ''),
+                        'name': existing_data.get('name', ''),
+                        'signup_date': existing_data.get('signup_date', datetime.utcnow())
+                    })
+                else:
+                    # 새 사용자 기본 데이터
+                    update_data.update({
+                        'user_type': 'guest',
+                        'is_beta_user': True,
+                        'email': '',
+                        'name': '',
+                        'signup_date': datetime.utcnow()
+                    })
+                
+                # merge=True로 문서가 없어도 생성하도록 함 (새로 만들어지는 베타 사용자는 카운터도 함께 증가)
+                transaction.set(user_ref, update_data, merge=True)
+                if not user_doc.exists:
+                    beta_user_counter.increment(transaction, 1, initialized=counted)
             
-            # 기존 데이터가 있으면 유지
-            if user_doc.exists:
-                existing_data = user_doc.to_dict()
-                update_data.update({
-                    'user_type': existing_data.get('user_type', 'guest'),
-                    'is_beta_user': existing_data.get('is_beta_user', True),
-                    'email': existing_data.get('email', ''),
-                    'name': existing_data.get('name', ''),
-                    'signup_date': existing_data.get('signup_date', datetime.utcnow())
-                })
-            else:
-                # 새 사용자 기본 데이터
-                update_data.update({
-                    'user_type': 'guest',
-                    'is_beta_user': True,
-                    'email': '',
-                    'name': '',
-                    'signup_date': datetime.utcnow()
-                })
-            
-            # merge=True로 문서가 없어도 생성하도록 함
-            user_ref.set(update_data, merge=True)
+            await complete(db.transaction())
+            doc_cache.invalidate('users', user_id)
             logger.info(f"Completed onboarding for user: {user_id}")
             
             return True
@@ -178,18 +236,15 @@ class BetaUserManager:
             return False
             
     async def get_user_profile(self, user_id: str) -> Optional[dict]:
-        """사용자 프로필 조회"""
+        """사용자 프로필 조회 (문서 캐시)"""
         try:
-            user_ref = db.collection('users').document(user_id)
-            user_doc = user_ref.get()
+            user_data = await doc_cache.get('users', user_id)
             
-            if not user_doc.exists:
+            if user_data is None:
                 return None
-                
-            user_data = user_doc.to_dict()
             
-            # 마지막 접근 시간 업데이트
-            user_ref.update({'last_accessed': datetime.utcnow()})
+            # 마지막 접근 시간 업데이트 (주기마다 병합 저장)
+            activity_tracker.touch('users', user_id, 'last_accessed')
             
             return user_data
             
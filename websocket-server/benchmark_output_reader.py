@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+ClaudeCodeProcess 출력 리더 벤치마크
+동시 세션 N개에서 asyncio 스트림 리더와 기존 executor 방식의 스레드 수/줄 처리량을 비교합니다.
+Claude CLI 대신 지정한 줄 수를 출력하는 더미 프로세스를 사용합니다.
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from claude_stream import new_output_buffer, read_lines_into, use_pidfd_child_watcher
+
+
+def dummy_cmd(lines: int) -> list:
+    """Claude CLI 대신 `lines`줄을 출력하는 더미 프로세스"""
+    return [sys.executable, '-c', f"import sys\nfor i in range({lines}): sys.stdout.write(f'line {{i}} ' + 'x' * 60 + '\\n')"]
+
+
+async def run_asyncio_session(lines: int) -> int:
+    """현재 방식: asyncio 서브프로세스 스트림 + 링 버퍼"""
+    process = await asyncio.create_subprocess_exec(
+        *dummy_cmd(lines),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL
+    )
+    buffer = new_output_buffer()
+    count = await read_lines_into(process.stdout, buffer)
+    await process.wait()
+    return count
+
+
+async def run_executor_session(lines: int) -> int:
+    """기존 방식: Popen + run_in_executor(readline) + 줄마다 0.1초 sleep + 리스트 재슬라이싱"""
+    process = subprocess.Popen(
+        dummy_cmd(lines),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        bufsize=1
+    )
+    buffer = []
+    count = 0
+    while True:
+        line = await asyncio.get_event_loop().run_in_executor(None, process.stdout.readline)
+        if not line:
+            break
+        line = line.strip()
+        if line:
+            buffer.append(line)
+            count += 1
+            if len(buffer) > 100:
+                buffer = buffer[-50:]
+        await asyncio.sleep(0.1)
+    process.wait()
+    return count
+
+
+async def run_benchmark(mode: str, sessions: int, lines: int) -> dict:
+    session_fn = run_asyncio_session if mode == 'asyncio' else run_executor_session
+    # 서버 시작 시와 동일하게 pidfd 기반 자식 프로세스 감시 사용
+    pidfd_watcher = use_pidfd_child_watcher()
+    baseline_threads = threading.active_count()
+    peak_threads = baseline_threads
+    done = False
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while not done:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample_threads())
+    started = time.perf_counter()
+    counts = await asyncio.gather(*(session_fn(lines) for _ in range(sessions)))
+    elapsed = time.perf_counter() - started
+    done = True
+    await sampler
+
+    total_lines = sum(counts)
+    return {
+        'mode': mode,
+        'sessions': sessions,
+        'lines_per_session': lines,
+        'total_lines': total_lines,
+        'elapsed_sec': round(elapsed, 3),
+        'lines_per_sec': round(total_lines / elapsed) if elapsed else 0,
+        'baseline_threads': baseline_threads,
+        'peak_threads': peak_threads,
+        'pidfd_child_watcher': pidfd_watcher,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ClaudeCodeProcess 출력 리더 벤치마크")
+    parser.add_argument('--mode', choices=['asyncio', 'executor', 'both'], default='both')
+    parser.add_argument('--sessions', type=int, default=200, help="동시 세션 수")
+    parser.add_argument('--lines', type=int, default=2000, help="세션당 출력 줄 수")
+    parser.add_argument('--executor-lines', type=int, default=20,
+                        help="executor 방식의 세션당 줄 수 (줄마다 0.1초 sleep이 있어 작게 설정)")
+    args = parser.parse_args()
+
+    modes = ['asyncio', 'executor'] if args.mode == 'both' else [args.mode]
+
+    print("ClaudeCodeProcess 출력 리더 벤치마크")
+    print("=" * 50)
+    for mode in modes:
+        lines = args.lines if mode == 'asyncio' else args.executor_lines
+        result = asyncio.run(run_benchmark(mode, args.sessions, lines))
+        print(f"\n[{mode}]")
+        for key, value in result.items():
+            print(f"  {key:<20} {value}")
+
+
+if __name__ == "__main__":
+    main()
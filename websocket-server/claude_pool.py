@@ -0,0 +1,220 @@
+"""
+Claude CLI 워커 프로세스 풀
+메시지마다 Node 프로세스를 새로 띄우지 않도록 미리 생성해 둔 `claude --print` 워커를 관리
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from claude_stream import STREAM_READER_LIMIT
+from process_monitor import process_monitor
+
+logger = logging.getLogger(__name__)
+
+CommandSpec = Tuple[str, ...]
+
+
+class PooledWorker:
+    """stdin 입력을 기다리는 상태로 미리 생성된 Claude CLI 워커"""
+
+    def __init__(self, cmd: CommandSpec, process: asyncio.subprocess.Process, spawn_time: float):
+        self.cmd = cmd
+        self.process = process
+        self.spawn_time = spawn_time
+        self.created_at = time.monotonic()
+
+    @property
+    def is_alive(self) -> bool:
+        return self.process.returncode is None
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    async def terminate(self):
+        """워커 종료 (풀에서 제거될 때)"""
+        if not self.is_alive:
+            return
+        try:
+            self.process.kill()
+            await asyncio.wait_for(self.process.wait(), timeout=5.0)
+        except Exception as e:
+            logger.warning(f"Error terminating pooled worker {self.process.pid}: {e}")
+
+
+class ClaudeWorkerPool:
+    """미리 생성된 Claude CLI 워커 풀 (명령어별로 일정 개수를 유지)"""
+
+    def __init__(self):
+        self.size = int(os.getenv('CLAUDE_POOL_SIZE', '2'))  # 명령어(컨텍스트)별 대기 워커 수
+        self.max_worker_age = float(os.getenv('CLAUDE_POOL_MAX_WORKER_AGE', '600'))  # 초
+        self.health_check_interval = float(os.getenv('CLAUDE_POOL_HEALTH_CHECK_INTERVAL', '15'))  # 초
+
+        self._specs: List[CommandSpec] = []
+        self._idle: Dict[CommandSpec, Deque[PooledWorker]] = {}
+        self._refill_event: Optional[asyncio.Event] = None
+        self._maintenance_task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'unpooled': 0,
+            'spawned': 0,
+            'spawn_failures': 0,
+            'recycled': 0,
+            'spawn_time_total': 0.0,
+            'spawn_time_max': 0.0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def register(self, cmd: Sequence[str]):
+        """풀에서 미리 띄워 둘 명령어 등록"""
+        spec = tuple(cmd)
+        if spec not in self._specs:
+            self._specs.append(spec)
+            self._idle[spec] = deque()
+
+    async def start(self):
+        """백그라운드 보충/헬스체크 태스크 시작"""
+        if not self.enabled or self._maintenance_task:
+            return
+        self._refill_event = asyncio.Event()
+        self._maintenance_task = asyncio.create_task(self._maintain())
+        logger.info(f"Claude worker pool started (size={self.size}, specs={len(self._specs)})")
+
+    async def stop(self):
+        """풀 종료 및 대기 중인 워커 정리"""
+        if self._maintenance_task:
+            self._maintenance_task.cancel()
+            try:
+                await self._maintenance_task
+            except asyncio.CancelledError:
+                pass
+            self._maintenance_task = None
+
+        for workers in self._idle.values():
+            while workers:
+                await workers.popleft().terminate()
+        logger.info("Claude worker pool stopped")
+
+    async def acquire(self, cmd: Sequence[str]) -> asyncio.subprocess.Process:
+        """워커 체크아웃 - 대기 워커가 있으면 재사용, 없으면 즉시 생성"""
+        spec = tuple(cmd)
+        workers = self._idle.get(spec)
+
+        while workers:
+            worker = workers.popleft()
+            if worker.is_alive and worker.age < self.max_worker_age:
+                self.stats['hits'] += 1
+                self._request_refill()
+                return worker.process
+            # 죽었거나 오래된 워커는 폐기
+            self.stats['recycled'] += 1
+            await worker.terminate()
+
+        if spec in self._idle:
+            self.stats['misses'] += 1
+            self._request_refill()
+        else:
+            # 등록되지 않은 명령어(예: --resume 대화 ID 포함)는 미리 띄울 수 없으므로 바로 생성
+            self.stats['unpooled'] += 1
+        worker = await self._spawn(spec)
+        return worker.process
+
+    def _request_refill(self):
+        if self._refill_event:
+            self._refill_event.set()
+
+    async def _spawn(self, spec: CommandSpec) -> PooledWorker:
+        """워커 프로세스 생성 (생성 시간 기록)"""
+        started = time.perf_counter()
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *spec,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                limit=STREAM_READER_LIMIT  # stream-json 이벤트 한 줄이 길 수 있음
+            )
+        except Exception:
+            self.stats['spawn_failures'] += 1
+            raise
+
+        spawn_time = time.perf_counter() - started
+        # rlimit 적용 및 리소스 추적 (체크아웃 시 세션으로 귀속)
+        process_monitor.register(process, 'pool')
+        self.stats['spawned'] += 1
+        self.stats['spawn_time_total'] += spawn_time
+        self.stats['spawn_time_max'] = max(self.stats['spawn_time_max'], spawn_time)
+        return PooledWorker(spec, process, spawn_time)
+
+    async def _health_check(self):
+        """죽었거나 최대 수명을 넘긴 대기 워커 정리"""
+        stale = []
+        for workers in self._idle.values():
+            for worker in list(workers):
+                if not worker.is_alive or worker.age >= self.max_worker_age:
+                    workers.remove(worker)
+                    stale.append(worker)
+
+        for worker in stale:
+            self.stats['recycled'] += 1
+            await worker.terminate()
+
+    async def _refill(self):
+        """명령어별로 대기 워커 수를 size까지 보충 (CPU 부하를 줄이기 위해 순차 생성)"""
+        for spec in self._specs:
+            workers = self._idle[spec]
+            while len(workers) < self.size:
+                try:
+                    workers.append(await self._spawn(spec))
+                except Exception as e:
+                    logger.error(f"Failed to pre-spawn Claude worker: {e}")
+                    return
+
+    async def _maintain(self):
+        """보충 요청 또는 주기적 헬스체크 처리 루프"""
+        while True:
+            try:
+                await self._health_check()
+                await self._refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Claude worker pool maintenance error: {e}")
+
+            try:
+                await asyncio.wait_for(self._refill_event.wait(), timeout=self.health_check_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._refill_event.clear()
+
+    def get_stats(self) -> dict:
+        """풀 메트릭 (hit/miss, 생성 시간)"""
+        requests = self.stats['hits'] + self.stats['misses']
+        spawned = self.stats['spawned']
+        return {
+            'enabled': self.enabled,
+            'size': self.size,
+            'idle_workers': sum(len(workers) for workers in self._idle.values()),
+            'hits': self.stats['hits'],
+            'misses': self.stats['misses'],
+            'unpooled': self.stats['unpooled'],
+            'hit_ratio': round(self.stats['hits'] / requests, 3) if requests else 0.0,
+            'spawned': spawned,
+            'spawn_failures': self.stats['spawn_failures'],
+            'recycled': self.stats['recycled'],
+            'avg_spawn_time_ms': round(self.stats['spawn_time_total'] / spawned * 1000, 2) if spawned else 0.0,
+            'max_spawn_time_ms': round(self.stats['spawn_time_max'] * 1000, 2),
+        }
+
+
+# 싱글톤
+claude_pool = ClaudeWorkerPool()
@@ -0,0 +1,279 @@
+"""
+Claude CLI 실행 스케줄러
+전역 동시 실행 수 제한 + 사용자별 공정 큐(가중 라운드로빈) + 컨텍스트별 우선순위 레인
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QueuedCallback = Callable[[int], Awaitable[None]]
+
+# 레인 순서 = 같은 가중치일 때의 우선순위
+LANES = ('agent-create', 'workspace')
+
+
+def parse_user_weights(value: str) -> Dict[str, int]:
+    """`CLAUDE_USER_WEIGHTS` 파싱 ("user-a:3,user-b:2" → {'user-a': 3, 'user-b': 2}, 잘못된 항목은 건너뜀)"""
+    weights = {}
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        user_id, _, weight = item.rpartition(':')
+        user_id = user_id.strip()
+        if user_id and weight.strip().isdigit():
+            weights[user_id] = int(weight)
+        else:
+            logger.warning(f"Ignoring invalid CLAUDE_USER_WEIGHTS entry: {item!r}")
+    return weights
+
+
+class _Ticket:
+    """대기 중인 실행 요청"""
+
+    def __init__(self, user_id: str, lane: str, on_queued: Optional[QueuedCallback]):
+        self.user_id = user_id
+        self.lane = lane
+        self.on_queued = on_queued
+        self.enqueued_at = time.monotonic()
+        self.position = 0
+        self.notified_position = 0
+        self.granted = False
+        self.changed = asyncio.Event()
+
+
+class _Lane:
+    """컨텍스트별 레인 - 사용자별 FIFO 큐를 가중 라운드로빈으로 순회"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queues: Dict[str, Deque[_Ticket]] = {}
+        self.ring: Deque[str] = deque()  # 라운드로빈 순서의 사용자
+        self.credit = 0  # ring 맨 앞 사용자에게 남은 연속 할당 횟수
+
+    def __len__(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    def push(self, ticket: _Ticket):
+        if ticket.user_id not in self.queues:
+            self.queues[ticket.user_id] = deque()
+            self.ring.append(ticket.user_id)
+        self.queues[ticket.user_id].append(ticket)
+
+    def pop(self, weight_of: Callable[[str], int]) -> _Ticket:
+        user_id = self.ring[0]
+        if self.credit <= 0:
+            self.credit = weight_of(user_id)
+
+        queue = self.queues[user_id]
+        ticket = queue.popleft()
+        self.credit -= 1
+
+        if not queue:
+            del self.queues[user_id]
+            self.ring.popleft()
+            self.credit = 0
+        elif self.credit <= 0:
+            self.ring.rotate(-1)
+        return ticket
+
+    def remove(self, ticket: _Ticket):
+        queue = self.queues.get(ticket.user_id)
+        if not queue or ticket not in queue:
+            return
+        queue.remove(ticket)
+        if not queue:
+            del self.queues[ticket.user_id]
+            if self.ring and self.ring[0] == ticket.user_id:
+                self.credit = 0
+            self.ring.remove(ticket.user_id)
+
+    def clone(self) -> '_Lane':
+        lane = _Lane(self.name)
+        lane.queues = {user_id: deque(queue) for user_id, queue in self.queues.items()}
+        lane.ring = deque(self.ring)
+        lane.credit = self.credit
+        return lane
+
+
+class _QueueState:
+    """레인 집합 + 레인 간 가중 라운드로빈 커서 (위치 계산을 위해 복제 가능)"""
+
+    def __init__(self, lanes: Dict[str, _Lane], schedule: List[str], cursor: int = 0):
+        self.lanes = lanes
+        self.schedule = schedule  # 예: ['agent-create', 'agent-create', 'workspace']
+        self.cursor = cursor
+
+    def __len__(self) -> int:
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def pop(self, weight_of: Callable[[str], int]) -> Optional[_Ticket]:
+        # 비어 있는 레인은 건너뛰며 스케줄 순서대로 레인 선택
+        for _ in range(len(self.schedule)):
+            lane = self.lanes[self.schedule[self.cursor]]
+            self.cursor = (self.cursor + 1) % len(self.schedule)
+            if len(lane):
+                return lane.pop(weight_of)
+        return None
+
+    def clone(self) -> '_QueueState':
+        lanes = {name: lane.clone() for name, lane in self.lanes.items()}
+        return _QueueState(lanes, self.schedule, self.cursor)
+
+
+class ClaudeScheduler:
+    """Claude CLI 실행 어드미션 컨트롤 (전역 동시성 제한 + 공정 큐)"""
+
+    def __init__(self):
+        max_concurrent = int(os.getenv('CLAUDE_MAX_CONCURRENT', '4'))
+        if max_concurrent < 1:
+            # 0 이하이면 아무도 슬롯을 받지 못해 모든 요청이 큐에서 멈춤
+            logger.warning(f"CLAUDE_MAX_CONCURRENT={max_concurrent} is invalid, using 1")
+        self.max_concurrent = max(1, max_concurrent)
+        lane_weights = {
+            'agent-create': int(os.getenv('CLAUDE_AGENT_CREATE_LANE_WEIGHT', '2')),
+            'workspace': int(os.getenv('CLAUDE_WORKSPACE_LANE_WEIGHT', '1')),
+        }
+        schedule = [lane for lane in LANES for _ in range(max(1, lane_weights[lane]))]
+
+        self.active = 0
+        # 사용자별 가중치 (설정에 없는 사용자는 1)
+        self.user_weights: Dict[str, int] = {}
+        for user_id, weight in parse_user_weights(os.getenv('CLAUDE_USER_WEIGHTS', '')).items():
+            self.set_user_weight(user_id, weight)
+        self._state = _QueueState({lane: _Lane(lane) for lane in LANES}, schedule)
+
+        self.stats = {
+            'admitted': 0,
+            'queued': 0,
+            'cancelled_while_queued': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+        }
+
+    def set_user_weight(self, user_id: str, weight: int):
+        """사용자 가중치 설정 (라운드로빈 한 바퀴에 연속으로 받을 실행 슬롯 수)"""
+        self.user_weights[user_id] = max(1, weight)
+
+    def _weight_of(self, user_id: str) -> int:
+        return self.user_weights.get(user_id, 1)
+
+    @staticmethod
+    def lane_for(context: str) -> str:
+        return 'agent-create' if context == 'agent-create' else 'workspace'
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, context: str = "workspace", on_queued: Optional[QueuedCallback] = None):
+        """실행 슬롯 획득 (대기 시 on_queued(position) 호출) - 블록 종료 시 반환"""
+        await self._acquire(user_id, context, on_queued)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, user_id: str, context: str, on_queued: Optional[QueuedCallback]):
+        # 대기열이 비어 있고 여유 슬롯이 있으면 즉시 실행
+        if self.active < self.max_concurrent and not len(self._state):
+            self.active += 1
+            self._record_admission(0.0)
+            return
+
+        ticket = _Ticket(user_id, self.lane_for(context), on_queued)
+        self._state.lanes[ticket.lane].push(ticket)
+        self.stats['queued'] += 1
+        self._update_positions()
+        logger.info(f"Claude execution queued for user {user_id} (lane: {ticket.lane}, position: {ticket.position})")
+
+        try:
+            while not ticket.granted:
+                if ticket.on_queued and ticket.position != ticket.notified_position:
+                    ticket.notified_position = ticket.position
+                    try:
+                        await ticket.on_queued(ticket.position)
+                    except Exception as e:
+                        logger.warning(f"Failed to notify queue position to user {user_id}: {e}")
+                    continue
+                ticket.changed.clear()
+                await ticket.changed.wait()
+        except BaseException:
+            if ticket.granted:
+                # 슬롯을 받은 직후 취소된 경우 다음 대기자에게 넘김
+                self._release()
+            else:
+                self._state.lanes[ticket.lane].remove(ticket)
+                self.stats['cancelled_while_queued'] += 1
+                self._update_positions()
+            raise
+
+    def _release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def _dispatch(self):
+        """여유 슬롯만큼 공정 큐 순서대로 대기자에게 슬롯 할당"""
+        dispatched = False
+        while self.active < self.max_concurrent:
+            ticket = self._state.pop(self._weight_of)
+            if ticket is None:
+                break
+            self.active += 1
+            ticket.granted = True
+            ticket.changed.set()
+            self._record_admission(time.monotonic() - ticket.enqueued_at)
+            dispatched = True
+
+        if dispatched:
+            self._update_positions()
+
+    def _update_positions(self):
+        """현재 큐 상태에서 예상 실행 순서를 계산해 각 대기자의 위치 갱신"""
+        simulated = self._state.clone()
+        position = 0
+        while True:
+            ticket = simulated.pop(self._weight_of)
+            if ticket is None:
+                break
+            position += 1
+            if ticket.position != position:
+                ticket.position = position
+                ticket.changed.set()
+
+    def _record_admission(self, wait_time: float):
+        self.stats['admitted'] += 1
+        self.stats['wait_time_total'] += wait_time
+        self.stats['wait_time_max'] = max(self.stats['wait_time_max'], wait_time)
+
+    def get_stats(self) -> dict:
+        """스케줄러 메트릭 (동시 실행 수, 큐 깊이, 대기 시간)"""
+        admitted = self.stats['admitted']
+        now = time.monotonic()
+        oldest_wait = max(
+            (now - queue[0].enqueued_at
+             for lane in self._state.lanes.values()
+             for queue in lane.queues.values()),
+            default=0.0
+        )
+        return {
+            'max_concurrent': self.max_concurrent,
+            'active': self.active,
+            'queue_depth': len(self._state),
+            'queue_depth_by_lane': {name: len(lane) for name, lane in self._state.lanes.items()},
+            'queued_users': sum(len(lane.queues) for lane in self._state.lanes.values()),
+            'admitted': admitted,
+            'queued_total': self.stats['queued'],
+            'cancelled_while_queued': self.stats['cancelled_while_queued'],
+            'avg_wait_ms': round(self.stats['wait_time_total'] / admitted * 1000, 2) if admitted else 0.0,
+            'max_wait_ms': round(self.stats['wait_time_max'] * 1000, 2),
+            'oldest_wait_ms': round(oldest_wait * 1000, 2),
+        }
+
+
+# 싱글톤
+claude_scheduler = ClaudeScheduler()
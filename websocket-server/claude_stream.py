@@ -0,0 +1,183 @@
+"""
+Claude CLI 출력 스트림 헬퍼
+`--input-format stream-json --output-format stream-json` 모드의 메시지 경계 처리 및 줄 단위 비동기 리더
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from collections import deque
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# 레거시 start() 경로의 출력 링 버퍼 크기 (최근 N줄만 유지)
+OUTPUT_BUFFER_LINES = 100
+
+# 영구 세션 stdout 한 줄(JSON 이벤트) 최대 크기 - 긴 응답도 한 줄로 오므로 넉넉하게
+STREAM_READER_LIMIT = 8 * 1024 * 1024
+
+STREAM_JSON_ARGS = [
+    '--input-format', 'stream-json',
+    '--output-format', 'stream-json',
+    '--verbose'
+]
+
+# --print 한 턴 실행 시 출력 형식 (CLI 대화 ID(session_id)를 받기 위해 stream-json 사용)
+# --include-partial-messages: assistant 메시지가 끝나기 전에 텍스트 델타(stream_event)를 받아 토큰 단위로 전달
+PRINT_STREAM_JSON_ARGS = [
+    '--output-format', 'stream-json',
+    '--include-partial-messages',
+    '--verbose'
+]
+
+
+class StreamJsonError(Exception):
+    """CLI가 오류 result 이벤트로 턴을 종료한 경우"""
+
+
+def encode_user_message(text: str) -> bytes:
+    """사용자 메시지를 stream-json 입력 한 줄로 인코딩"""
+    event = {
+        'type': 'user',
+        'message': {
+            'role': 'user',
+            'content': [{'type': 'text', 'text': text}]
+        }
+    }
+    return (json.dumps(event, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def parse_event(line: bytes) -> Optional[dict]:
+    """stdout 한 줄을 이벤트로 파싱 (JSON이 아닌 줄은 무시)"""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        event = json.loads(line.decode('utf-8', errors='replace'))
+    except json.JSONDecodeError:
+        logger.debug(f"Ignoring non-JSON CLI output: {line[:80]!r}")
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def extract_text(event: dict) -> str:
+    """assistant 이벤트에서 텍스트 블록만 추출"""
+    if event.get('type') != 'assistant':
+        return ''
+    content = event.get('message', {}).get('content', [])
+    if isinstance(content, str):
+        return content
+    return ''.join(
+        block.get('text', '') for block in content
+        if isinstance(block, dict) and block.get('type') == 'text'
+    )
+
+
+def extract_delta(event: dict) -> str:
+    """부분 메시지(stream_event) 이벤트에서 텍스트 델타만 추출"""
+    if event.get('type') != 'stream_event':
+        return ''
+    inner = event.get('event') or {}
+    if inner.get('type') != 'content_block_delta':
+        return ''
+    delta = inner.get('delta') or {}
+    return delta.get('text', '') if delta.get('type') == 'text_delta' else ''
+
+
+def is_turn_end(event: dict) -> bool:
+    """턴 종료(result) 이벤트 여부"""
+    return event.get('type') == 'result'
+
+
+def result_text(event: dict, streamed_text: str) -> str:
+    """result 이벤트에서 최종 응답 결정 (오류 result는 예외로 전달)"""
+    if event.get('is_error') or event.get('subtype', 'success') != 'success':
+        raise StreamJsonError(event.get('result') or event.get('subtype') or 'unknown error')
+    result = event.get('result')
+    return result if isinstance(result, str) and result else streamed_text
+
+
+class PrintTurn:
+    """`--print --output-format stream-json` 한 턴의 출력 파싱 상태 (CLI 대화 ID 포함)"""
+
+    def __init__(self):
+        self.session_id: Optional[str] = None
+        self.parts = []
+        self.result: Optional[dict] = None
+        self._streamed_delta = False  # 현재 assistant 메시지 텍스트를 델타로 이미 전달했는지
+
+    def feed_line(self, line: bytes) -> str:
+        """stdout 한 줄 처리 - 사용자에게 전달할 텍스트 반환 (JSON이 아닌 출력은 그대로 텍스트로 취급)"""
+        event = parse_event(line)
+        if event is None:
+            text = line.decode('utf-8', errors='replace').rstrip('\r\n')
+            if not text.strip():
+                return ''
+            text += '\n'
+        else:
+            if event.get('session_id'):
+                self.session_id = event['session_id']
+            if is_turn_end(event):
+                self.result = event
+                return ''
+            text = extract_delta(event)
+            if text:
+                self._streamed_delta = True
+            elif event.get('type') == 'assistant':
+                # 델타로 이미 보낸 메시지의 완성본은 건너뜀 (부분 메시지를 지원하지 않는 CLI는 완성본만 옴)
+                streamed, self._streamed_delta = self._streamed_delta, False
+                text = '' if streamed else extract_text(event)
+
+        if text:
+            self.parts.append(text)
+        return text
+
+    def response(self) -> str:
+        """최종 응답 (오류 result는 StreamJsonError)"""
+        streamed = ''.join(self.parts)
+        if self.result is None:
+            return streamed
+        return result_text(self.result, streamed)
+
+
+def new_output_buffer(capacity: int = OUTPUT_BUFFER_LINES) -> deque:
+    """고정 크기 링 버퍼 (가득 차면 가장 오래된 줄부터 밀려남)"""
+    return deque(maxlen=capacity)
+
+
+async def read_lines_into(stream: asyncio.StreamReader, buffer: deque) -> int:
+    """EOF까지 줄 단위로 읽어 링 버퍼에 적재 (빈 줄 제외), 적재한 줄 수 반환"""
+    count = 0
+    async for raw in stream:
+        line = raw.decode('utf-8', errors='replace').strip()
+        if line:
+            buffer.append(line)
+            count += 1
+    return count
+
+
+def use_pidfd_child_watcher() -> bool:
+    """자식 프로세스 종료 감시를 pidfd 기반으로 전환 (실행 중인 이벤트 루프에서 호출)
+
+    Python 3.11 기본 ThreadedChildWatcher는 서브프로세스마다 waitpid 대기 스레드를 하나씩 만든다.
+    3.12+ 기본 asyncio 루프와 uvloop는 이미 스레드 없이 처리하므로 그대로 둔다.
+    """
+    if sys.version_info >= (3, 12) or not hasattr(asyncio, 'PidfdChildWatcher'):
+        return False
+
+    loop = asyncio.get_running_loop()
+    if not isinstance(loop, asyncio.SelectorEventLoop):
+        return False
+
+    try:
+        os.close(os.pidfd_open(os.getpid()))  # 커널 5.3+ 지원 여부 확인
+    except (AttributeError, OSError):
+        return False
+
+    watcher = asyncio.PidfdChildWatcher()
+    watcher.attach_loop(loop)
+    asyncio.set_child_watcher(watcher)
+    return True
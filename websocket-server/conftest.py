@@ -0,0 +1,20 @@
+"""
+pytest 공용 설정
+테스트는 Firestore 대신 프로세스 메모리 저장소(STORAGE_BACKEND=memory)를 사용 (database 모듈 import 전에 설정)
+"""
+
+import os
+
+os.environ['STORAGE_BACKEND'] = 'memory'
+
+import pytest
+
+import database
+
+
+@pytest.fixture
+def local_db():
+    """테스트마다 비어 있는 메모리 저장소"""
+    database.db.reset()
+    yield database.db
+    database.db.reset()
@@ -0,0 +1,197 @@
+"""
+대화 기록 write-behind 저장
+턴마다 Firestore에 바로 쓰지 않고 세션별로 메시지를 모아 두었다가, 대기 메시지 수 또는 시간 조건이 되면 한꺼번에 저장
+(세션 메시지는 세션당 트랜잭션 1번으로 messages 하위 컬렉션에, 세션 없는 대화는 batched write로 conversations에 저장,
+실패 시 conversations 컬렉션으로 대체 저장)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from database import db
+from message_store import message_store
+
+logger = logging.getLogger(__name__)
+
+# Firestore batched write 한 번에 넣을 수 있는 최대 쓰기 수
+BATCH_LIMIT = 500
+
+
+class _PendingSession:
+    """세션 하나에 쌓인 저장 대기 메시지"""
+
+    def __init__(self, user_id: str, session_id: Optional[str], agent_id: Optional[str]):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.agent_id = agent_id
+        self.messages: List[dict] = []
+        self.turns: List[Tuple[str, str, datetime]] = []  # conversations 대체 저장용 (사용자 메시지, 응답, 시각)
+
+
+class ConversationWriter:
+    """세션별로 모은 대화 메시지를 주기적으로 일괄 저장"""
+
+    def __init__(self):
+        self.flush_interval = float(os.getenv('CONVERSATION_FLUSH_INTERVAL', '2'))  # 초
+        self.flush_max_messages = int(os.getenv('CONVERSATION_FLUSH_MAX_MESSAGES', '100'))  # 대기 메시지가 이만큼 쌓이면 즉시 저장
+
+        self._pending: Dict[Tuple[str, str], _PendingSession] = {}
+        self._pending_messages = 0
+        self._flush_event: Optional[asyncio.Event] = None
+        self._flush_lock = asyncio.Lock()  # 같은 세션의 메시지 순서 보장을 위해 저장은 한 번에 하나씩
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'enqueued_turns': 0,
+            'flushes': 0,
+            'transactions': 0,
+            'failed_transactions': 0,
+            'batches': 0,
+            'written_messages': 0,
+            'failed_batches': 0,
+            'fallback_writes': 0,
+            'lost_turns': 0,
+            'last_flush_ms': 0.0,
+        }
+
+    def start(self):
+        if self._task:
+            return
+        self._flush_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Conversation writer started (interval={self.flush_interval}s, max_messages={self.flush_max_messages})")
+
+    async def stop(self):
+        """백그라운드 태스크 종료 후 남은 메시지 저장"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def enqueue(self, user_id: str, user_message: str, assistant_response: str,
+                agent_id: str = None, session_id: str = None):
+        """턴 하나 저장 예약 (즉시 반환)"""
+        now = datetime.utcnow()
+        key = (user_id, session_id or '')
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = _PendingSession(user_id, session_id, agent_id)
+            self._pending[key] = pending
+
+        pending.messages.extend([
+            {'role': 'user', 'content': user_message, 'timestamp': now},
+            {'role': 'assistant', 'content': assistant_response, 'timestamp': now},
+        ])
+        pending.turns.append((user_message, assistant_response, now))
+        self._pending_messages += 2
+        self.stats['enqueued_turns'] += 1
+
+        if self._pending_messages >= self.flush_max_messages and self._flush_event:
+            self._flush_event.set()
+
+    def flush_user_soon(self, user_id: str):
+        """사용자 연결 종료 시 해당 사용자의 대기 메시지를 바로 저장 (백그라운드)"""
+        if any(key[0] == user_id for key in self._pending):
+            asyncio.create_task(self.flush(user_id))
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_event.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Conversation writer flush error: {e}")
+
+    async def flush(self, user_id: str = None):
+        """대기 중인 메시지 저장 (user_id를 주면 해당 사용자만)"""
+        async with self._flush_lock:
+            if user_id is None:
+                sessions = list(self._pending.values())
+                self._pending.clear()
+            else:
+                sessions = [self._pending.pop(key) for key in list(self._pending) if key[0] == user_id]
+            if not sessions:
+                return
+            self._pending_messages -= sum(len(pending.messages) for pending in sessions)
+
+            started = time.perf_counter()
+            # 세션 메시지는 순번 할당이 필요하므로 세션별 트랜잭션으로 저장
+            with_session = [pending for pending in sessions if pending.session_id]
+            await asyncio.gather(*(self._commit_session(pending) for pending in with_session))
+
+            # 세션 없는 대화는 conversations 문서 1개씩 batched write
+            without_session = [pending for pending in sessions if not pending.session_id]
+            for start in range(0, len(without_session), BATCH_LIMIT):
+                chunk = without_session[start:start + BATCH_LIMIT]
+                try:
+                    await self._commit(chunk)
+                except Exception as e:
+                    self.stats['failed_batches'] += 1
+                    logger.error(f"Batched conversation write failed ({len(chunk)} conversations): {e}")
+                    await self._fallback(chunk)
+
+            self.stats['flushes'] += 1
+            self.stats['last_flush_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+    async def _commit_session(self, pending: _PendingSession):
+        """세션 메시지를 하위 컬렉션에 저장 (실패 시 conversations로 대체 저장)"""
+        try:
+            await message_store.append(pending.session_id, pending.user_id, pending.messages, pending.turns[-1][2],
+                                       pending.agent_id)
+            self.stats['transactions'] += 1
+            self.stats['written_messages'] += len(pending.messages)
+        except Exception as e:
+            self.stats['failed_transactions'] += 1
+            logger.error(f"Conversation write failed (session: {pending.session_id}): {e}")
+            await self._fallback([pending])
+
+    async def _commit(self, sessions: List[_PendingSession]):
+        batch = db.batch()
+        for pending in sessions:
+            batch.set(db.collection('conversations').document(), self._conversation_doc(pending))
+        await batch.commit()
+        self.stats['batches'] += 1
+        self.stats['written_messages'] += sum(len(pending.messages) for pending in sessions)
+
+    async def _fallback(self, sessions: List[_PendingSession]):
+        """일괄 저장 실패 시 conversations 컬렉션에 세션별로 저장 (호환성 보장)"""
+        for pending in sessions:
+            try:
+                await db.collection('conversations').document().set(self._conversation_doc(pending))
+                self.stats['fallback_writes'] += 1
+            except Exception as e:
+                self.stats['lost_turns'] += len(pending.turns)
+                logger.error(f"Fallback conversation save also failed (session: {pending.session_id}): {e}")
+
+    @staticmethod
+    def _conversation_doc(pending: _PendingSession) -> dict:
+        return {
+            'userId': pending.user_id,
+            'agentId': pending.agent_id,
+            'sessionId': pending.session_id,
+            'messages': pending.messages,
+            'createdAt': pending.turns[0][2],
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            'pending_sessions': len(self._pending),
+            'pending_messages': self._pending_messages,
+            **self.stats,
+        }
+
+
+# 싱글톤
+conversation_writer = ConversationWriter()
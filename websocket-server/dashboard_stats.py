@@ -0,0 +1,173 @@
+"""
+사용자별 대시보드 집계
+`user_stats/{user_id}` 문서에 에이전트 수/활성 에이전트 수/실행 횟수를 유지하고,
+에이전트 생성/수정/삭제/실행 기록 시 같은 트랜잭션(또는 batch)에서 증감분만 반영
+(대시보드 통계 조회는 문서 1개 읽기, 주기적으로 agents 컬렉션 기준 재계산)
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Optional
+
+import google.cloud.firestore as firestore
+
+from database import db, async_transactional
+
+logger = logging.getLogger(__name__)
+
+STATS_COLLECTION = 'user_stats'
+COUNTER_FIELDS = ('totalAgents', 'activeAgents', 'totalRuns', 'successfulRuns')
+
+
+def agent_delta(before: Optional[dict], after: Optional[dict]) -> dict:
+    """에이전트 문서 변경 전/후로 집계 증감분 계산 (생성은 before=None, 삭제는 after=None)"""
+    def contribution(agent: Optional[dict]) -> dict:
+        if not agent:
+            return {field: 0 for field in COUNTER_FIELDS}
+        return {
+            'totalAgents': 1,
+            'activeAgents': 1 if agent.get('status') == 'active' else 0,
+            'totalRuns': agent.get('totalRuns') or 0,
+            'successfulRuns': agent.get('successfulRuns') or 0,
+        }
+
+    old, new = contribution(before), contribution(after)
+    return {field: new[field] - old[field] for field in COUNTER_FIELDS if new[field] != old[field]}
+
+
+def format_stats(stats: dict) -> dict:
+    """API 응답 형식"""
+    total_runs = stats.get('totalRuns', 0)
+    successful_runs = stats.get('successfulRuns', 0)
+    success_rate = round((successful_runs / total_runs) * 100) if total_runs > 0 else 0
+    return {
+        'totalAgents': stats.get('totalAgents', 0),
+        'activeAgents': stats.get('activeAgents', 0),
+        'totalRuns': total_runs,
+        'successRate': f"{success_rate}%"
+    }
+
+
+class DashboardStats:
+    """사용자별 집계 문서 증분 갱신/조회/재계산"""
+
+    def __init__(self):
+        self.reconcile_interval = float(os.getenv('DASHBOARD_STATS_RECONCILE_INTERVAL', '21600'))  # 초 (0이면 비활성)
+        self.reconcile_page_size = int(os.getenv('DASHBOARD_STATS_RECONCILE_PAGE_SIZE', '100'))
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'reads': 0,
+            'delta_writes': 0,
+            'reconciles': 0,
+            'drifted_users': 0,
+            'last_reconcile_run_at': None,
+        }
+
+    @staticmethod
+    def stats_ref(user_id: str):
+        return db.collection(STATS_COLLECTION).document(user_id)
+
+    def apply_delta(self, writer, user_id: str, delta: dict):
+        """트랜잭션/batch에 집계 증감분 쓰기 추가 (변화가 없으면 생략)"""
+        if not delta:
+            return
+        update = {field: firestore.Increment(value) for field, value in delta.items()}
+        update['userId'] = user_id
+        update['updatedAt'] = datetime.utcnow()
+        writer.set(self.stats_ref(user_id), update, merge=True)
+        self.stats['delta_writes'] += 1
+
+    async def get(self, user_id: str) -> dict:
+        """집계 조회 (한 번도 재계산되지 않은 사용자는 agents 기준으로 먼저 계산)"""
+        snapshot = await self.stats_ref(user_id).get()
+        self.stats['reads'] += 1
+        data = snapshot.to_dict() if snapshot.exists else None
+        # 재계산 전에 증분만 쌓인 문서는 기존 에이전트가 빠져 있을 수 있음
+        if not data or not data.get('reconciledAt'):
+            data = await self.reconcile(user_id)
+        return data
+
+    async def reconcile(self, user_id: str) -> dict:
+        """agents 컬렉션 기준으로 집계 재계산 후 교체"""
+        stats_ref = self.stats_ref(user_id)
+        query = db.collection('agents').where(filter=firestore.FieldFilter('userId', '==', user_id))
+
+        @async_transactional
+        async def run(transaction) -> tuple:
+            snapshot = await stats_ref.get(transaction=transaction)
+            previous = snapshot.to_dict() if snapshot.exists else None
+
+            totals = {field: 0 for field in COUNTER_FIELDS}
+            async for doc in query.stream(transaction=transaction):
+                for field, value in agent_delta(None, doc.to_dict()).items():
+                    totals[field] += value
+
+            data = {**totals, 'userId': user_id, 'updatedAt': datetime.utcnow(), 'reconciledAt': datetime.utcnow()}
+            transaction.set(stats_ref, data)
+            return previous, data
+
+        previous, data = await run(db.transaction())
+        self.stats['reconciles'] += 1
+        if previous and previous.get('reconciledAt'):
+            before = {field: previous.get(field, 0) for field in COUNTER_FIELDS}
+            after = {field: data[field] for field in COUNTER_FIELDS}
+            if before != after:
+                self.stats['drifted_users'] += 1
+                logger.warning(f"Dashboard stats drifted for user {user_id}: {before} -> {after}")
+        return data
+
+    # --- 주기적 재계산 ---
+
+    def start(self):
+        if self._task or self.reconcile_interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Dashboard stats reconciler started (interval={self.reconcile_interval}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.reconcile_interval)
+            try:
+                await self.reconcile_all()
+            except Exception as e:
+                logger.error(f"Dashboard stats reconcile error: {e}")
+
+    async def reconcile_all(self) -> int:
+        """집계 문서가 있는 모든 사용자 재계산 (문서 ID 순 페이지 스캔) - 처리한 사용자 수 반환"""
+        reconciled = 0
+        last = None
+        while True:
+            query = db.collection(STATS_COLLECTION).order_by('__name__').limit(self.reconcile_page_size)
+            if last is not None:
+                query = query.start_after(last)
+            page = [snapshot async for snapshot in query.stream()]
+            if not page:
+                break
+            for snapshot in page:
+                try:
+                    await self.reconcile(snapshot.id)
+                    reconciled += 1
+                except Exception as e:
+                    logger.error(f"Failed to reconcile dashboard stats for user {snapshot.id}: {e}")
+            last = page[-1]
+        self.stats['last_reconcile_run_at'] = datetime.utcnow().isoformat()
+        return reconciled
+
+    def get_stats(self) -> dict:
+        return dict(self.stats)
+
+
+# 싱글톤
+dashboard_stats = DashboardStats()
@@ -0,0 +1,46 @@
+"""
+공용 Firestore 데이터 접근 모듈
+main.py와 auth.py가 함께 사용하는 비동기 Firestore 클라이언트 (요청 처리 중 이벤트 루프를 막지 않음)
+STORAGE_BACKEND=memory/sqlite이면 같은 API의 로컬 저장소를 사용 (GCP 자격 증명 없이 실행/벤치마크)
+"""
+
+import logging
+import os
+from typing import Optional
+
+import google.cloud.firestore as firestore
+
+logger = logging.getLogger(__name__)
+
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'firestore').lower()
+
+if STORAGE_BACKEND == 'firestore':
+    # 비동기 클라이언트 (프로세스당 하나 - gRPC 채널은 첫 요청 시 현재 이벤트 루프에서 생성됨)
+    db = firestore.AsyncClient()
+    async_transactional = firestore.async_transactional
+elif STORAGE_BACKEND in ('memory', 'sqlite'):
+    from local_store import LocalClient
+
+    db = LocalClient(os.getenv('STORAGE_SQLITE_PATH', 'local_store.db') if STORAGE_BACKEND == 'sqlite' else None)
+    async_transactional = db.transactional
+    logger.warning(f"Using local storage backend: {STORAGE_BACKEND}")
+else:
+    raise ValueError(f"Unknown STORAGE_BACKEND: {STORAGE_BACKEND} (firestore, memory, sqlite)")
+
+# 스냅샷 리스너용 동기 클라이언트 (on_snapshot은 동기 클라이언트만 지원, 처음 사용할 때 생성)
+_listener_client: Optional[firestore.Client] = None
+
+
+def listener_client():
+    global _listener_client
+    if STORAGE_BACKEND != 'firestore':
+        return db  # 로컬 저장소는 쓰기 시 리스너를 바로 호출
+    if _listener_client is None:
+        _listener_client = firestore.Client()
+    return _listener_client
+
+
+async def collect(query) -> list:
+    """쿼리 결과 문서를 모두 읽어 리스트로 반환"""
+    return [doc async for doc in query.stream()]
+
@@ -0,0 +1,99 @@
+"""
+문서 읽기 캐시 (read-through)
+`users` 문서를 (컬렉션, 문서 ID) 키로 Pod 메모리에 LRU로 보관
+(이 Pod에서 쓴 문서는 바로 무효화, 다른 Pod에서 바뀐 문서는 TTL 이내에 반영 -
+컬렉션 전체 리스너는 Pod마다 컬렉션 전체 읽기 비용이 들고, Python 클라이언트의 문서별 리스너는
+리스너마다 스트림과 스레드를 하나씩 써서 사용하지 않음)
+인가(소유권 확인)에 쓰는 `agents` 문서는 오래된 값으로 허용하지 않도록 캐시하지 않고 매번 읽음
+"""
+
+import copy
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+CACHED_COLLECTIONS = ('users',)
+
+
+class DocumentCache:
+    """(컬렉션, 문서 ID) → 문서 데이터 LRU"""
+
+    def __init__(self):
+        self.enabled = os.getenv('DOC_CACHE_ENABLED', 'true').lower() == 'true'
+        self.max_entries = int(os.getenv('DOC_CACHE_MAX_ENTRIES', '5000'))
+        self.ttl = float(os.getenv('DOC_CACHE_TTL', '60'))  # 초 - 다른 Pod에서 쓴 변경이 반영되기까지 최대 지연
+
+        self._entries: 'OrderedDict[Tuple[str, str], Tuple[float, dict]]' = OrderedDict()
+        # 무효화마다 증가 - 읽는 사이 무효화된 문서를 오래된 값으로 다시 채우지 않도록 확인
+        self._epoch = 0
+
+        self.stats = {collection: {'hits': 0, 'misses': 0} for collection in CACHED_COLLECTIONS}
+        self.counters = {
+            'local_invalidations': 0,
+            'expired': 0,
+            'evictions': 0,
+        }
+
+    async def get(self, collection: str, doc_id: str) -> Optional[dict]:
+        """문서 데이터 조회 (캐시에 없으면 Firestore에서 읽어 채움, 문서가 없으면 None)"""
+        key = (collection, doc_id)
+        stats = self.stats.setdefault(collection, {'hits': 0, 'misses': 0})
+        if self.enabled:
+            entry = self._entries.get(key)
+            if entry:
+                expires_at, data = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    stats['hits'] += 1
+                    return copy.deepcopy(data)
+                del self._entries[key]
+                self.counters['expired'] += 1
+        epoch = self._epoch
+
+        stats['misses'] += 1
+        snapshot = await db.collection(collection).document(doc_id).get()
+        if not snapshot.exists:
+            return None
+        data = snapshot.to_dict()
+        if self.enabled and self._epoch == epoch:
+            self._store(key, data)
+        return copy.deepcopy(data)
+
+    def invalidate(self, collection: str, doc_id: str):
+        """이 Pod에서 문서를 쓴 뒤 호출"""
+        self._epoch += 1
+        if self._entries.pop((collection, doc_id), None) is not None:
+            self.counters['local_invalidations'] += 1
+
+    def _store(self, key: Tuple[str, str], data: dict):
+        self._entries[key] = (time.monotonic() + self.ttl, data)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.counters['evictions'] += 1
+
+    def get_stats(self) -> dict:
+        collections = {}
+        for collection, stats in self.stats.items():
+            lookups = stats['hits'] + stats['misses']
+            collections[collection] = {
+                **stats,
+                'hit_ratio': round(stats['hits'] / lookups, 3) if lookups else 0.0,
+            }
+        return {
+            'enabled': self.enabled,
+            'entries': len(self._entries),
+            'ttl_sec': self.ttl,
+            'collections': collections,
+            **self.counters,
+        }
+
+
+# 싱글톤
+doc_cache = DocumentCache()
@@ -4,13 +4,14 @@ Email Service for AI Agent Platform
 Google Workspace SMTP를 사용한 이메일 발송 서비스
 """
 
+import asyncio
 import smtplib
 import os
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +26,13 @@ class EmailService:
         self.from_email = os.getenv('FROM_EMAIL')
         self.apply_receive_email = os.getenv('APPLY_RECEIVE_EMAIL')
         
+        # 동시에 열 SMTP 연결 수 (대량 승인 메일 발송 시)
+        self.max_concurrency = int(os.getenv('EMAIL_MAX_CONCURRENCY', '5'))
+        # 종료 시 백그라운드 발송을 기다리는 최대 시간 (초)
+        self.drain_timeout = float(os.getenv('EMAIL_DRAIN_TIMEOUT', '20'))
+        self._semaphore = None
+        self._background_tasks: Dict[asyncio.Task, List[Tuple[str, str]]] = {}  # 발송 태스크 → 수신자
+        
         if not all([self.username, self.password, self.from_email, self.apply_receive_email]):
             logger.warning("이메일 환경변수가 설정되지 않았습니다.")
     
@@ -62,6 +70,59 @@ class EmailService:
             logger.error(f"이메일 발송 실패 ({to_email}): {e}")
             return False
     
+    async def _send_email_async(self, to_email: str, subject: str, html_content: str) -> bool:
+        """SMTP 발송을 스레드에서 실행 (이벤트 루프를 막지 않음, 동시 연결 수 제한)"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            return await asyncio.to_thread(self._send_email, to_email, subject, html_content)
+    
+    def queue_approval_notifications(self, recipients: List[Tuple[str, str]],
+                                     on_sent: Optional[Callable[[str], Awaitable[None]]] = None):
+        """승인 메일 여러 건을 백그라운드에서 동시에 발송 (즉시 반환)
+
+        on_sent(email)은 발송에 성공한 수신자마다 호출 - 호출하는 쪽이 발송 대기 표시를 지우는 데 사용
+        """
+        if not recipients:
+            return
+        task = asyncio.create_task(self._send_approval_notifications(recipients, on_sent))
+        self._background_tasks[task] = recipients
+        task.add_done_callback(lambda done: self._background_tasks.pop(done, None))
+    
+    async def drain(self):
+        """서버 종료 전 백그라운드 발송 대기 (제한 시간 내 끝나지 않은 수신자는 로그로 남김)"""
+        if not self._background_tasks:
+            return
+        pending = dict(self._background_tasks)
+        logger.info(f"Waiting for {sum(len(r) for r in pending.values())} approval notifications before shutdown")
+        _, not_done = await asyncio.wait(list(pending), timeout=self.drain_timeout)
+        if not_done:
+            unsent = [email for task in not_done for email, _ in pending[task]]
+            logger.warning(f"Approval notifications not finished before shutdown, left for retry on next startup "
+                           f"({len(unsent)}): {', '.join(unsent)}")
+            for task in not_done:
+                task.cancel()
+    
+    async def _send_approval_notifications(self, recipients: List[Tuple[str, str]],
+                                           on_sent: Optional[Callable[[str], Awaitable[None]]] = None):
+        async def send(email: str, name: str) -> bool:
+            sent = await self.send_approval_notification(email, name)
+            if sent is True and on_sent:
+                try:
+                    await on_sent(email)
+                except Exception as e:
+                    logger.warning(f"Failed to record approval notification for {email}: {e}")
+            return sent
+        
+        results = await asyncio.gather(
+            *(send(email, name) for email, name in recipients),
+            return_exceptions=True
+        )
+        failed = [email for (email, _), result in zip(recipients, results) if result is not True]
+        logger.info(f"Approval notifications sent: {len(recipients) - len(failed)}/{len(recipients)}")
+        if failed:
+            logger.error(f"Approval notification failed for: {', '.join(failed)}")
+    
     async def send_beta_application_notification(self, user_data: Dict[str, Any]) -> bool:
         """관리자에게 베타 신청 알림 이메일 발송"""
         
@@ -129,7 +190,7 @@ class EmailService:
 </html>
 """
         
-        return self._send_email(self.apply_receive_email, subject, html_content)
+        return await self._send_email_async(self.apply_receive_email, subject, html_content)
     
     async def send_application_confirmation(self, user_email: str, user_name: str, applied_at: str) -> bool:
         """신청자에게 접수 확인 이메일 발송"""
@@ -197,7 +258,7 @@ class EmailService:
 </html>
 """
         
-        return self._send_email(user_email, subject, html_content)
+        return await self._send_email_async(user_email, subject, html_content)
     
     async def send_approval_notification(self, user_email: str, user_name: str) -> bool:
         """승인 완료 이메일 발송"""
@@ -267,7 +328,7 @@ class EmailService:
 </html>
 """
         
-        return self._send_email(user_email, subject, html_content)
+        return await self._send_email_async(user_email, subject, html_content)
 
 # 전역 이메일 서비스 인스턴스
 email_service = EmailService()
\ No newline at end of file
@@ -0,0 +1,155 @@
+"""
+대화 히스토리 관리 (토큰 예산 기반 압축)
+턴별 추정 토큰 수를 기록하고, CLI 대화에 쌓인 컨텍스트가 예산을 넘으면
+오래된 턴을 요약으로 접고 최근 턴만 원문으로 유지한 새 CLI 대화로 다시 시작
+"""
+
+import logging
+import os
+import re
+from collections import deque
+from typing import Deque, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 요약 한 줄에 남길 최대 글자 수
+SUMMARY_USER_CHARS = 120
+SUMMARY_REPLY_CHARS = 160
+
+_SENTENCE_END = re.compile(r'(?<=[.!?。])\s|\n')
+
+
+def estimate_tokens(text: str) -> int:
+    """토큰 수 추정 (ASCII는 4글자당 1토큰, 한글 등 비ASCII는 글자당 1토큰)"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    """첫 문장만 잘라 한 줄로 (limit 글자 초과 시 말줄임)"""
+    text = text.strip()
+    match = _SENTENCE_END.search(text)
+    sentence = text[:match.start()] if match else text
+    sentence = ' '.join(sentence.split())
+    return sentence if len(sentence) <= limit else sentence[:limit - 1] + '…'
+
+
+class ConversationHistory:
+    """세션 하나의 대화 히스토리 - 최근 턴 원문 + 오래된 턴의 누적 요약"""
+
+    def __init__(self):
+        self.budget = int(os.getenv('HISTORY_TOKEN_BUDGET', '6000'))  # CLI 대화 컨텍스트 예산 (0이면 압축 안 함)
+        self.keep_recent = int(os.getenv('HISTORY_KEEP_RECENT_TURNS', '4'))  # 압축 시 원문으로 남길 최근 턴 수
+        self.summary_budget = int(os.getenv('HISTORY_SUMMARY_TOKENS', '800'))  # 누적 요약 최대 토큰
+
+        self.turns: Deque[Tuple[str, str, int]] = deque()  # (사용자 메시지, 응답, 추정 토큰)
+        self.summary: Deque[Tuple[str, int]] = deque()  # (요약 한 줄, 추정 토큰)
+        self.conversation_tokens = 0  # 현재 CLI 대화에 쌓인 컨텍스트 (추정)
+        self.needs_reseed = False  # 압축 후 새 CLI 대화로 다시 시작해야 하는지
+        self._uncompacted_tokens = 0  # 압축 없이 한 대화를 이어갔다면 쌓였을 컨텍스트
+
+        self.stats = {
+            'turns': 0,
+            'compactions': 0,
+            'folded_turns': 0,
+            'last_context_tokens': 0,
+            'max_context_tokens': 0,
+            'context_tokens_total': 0,
+            'uncompacted_tokens_total': 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self.turns) + len(self.summary)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        for message, response, _ in self.turns:
+            yield message, response
+
+    @property
+    def total_tokens(self) -> int:
+        """새 대화를 시작할 때 다시 전달할 히스토리 크기 (요약 + 최근 턴)"""
+        return sum(tokens for _, tokens in self.summary) + sum(tokens for _, _, tokens in self.turns)
+
+    def build_prompt(self, message: str, new_conversation: bool) -> str:
+        """이번 턴에 CLI로 보낼 입력 - 새 대화면 요약과 최근 턴을 앞에 붙여 맥락을 다시 전달"""
+        if new_conversation and len(self):
+            prompt = self._seed(message)
+        else:
+            prompt = message
+
+        if new_conversation:
+            self.conversation_tokens = 0
+            self.needs_reseed = False
+        self.conversation_tokens += estimate_tokens(prompt)
+        self._uncompacted_tokens += estimate_tokens(message)
+
+        # 턴별 전송 컨텍스트 크기 기록
+        self.stats['turns'] += 1
+        self.stats['last_context_tokens'] = self.conversation_tokens
+        self.stats['max_context_tokens'] = max(self.stats['max_context_tokens'], self.conversation_tokens)
+        self.stats['context_tokens_total'] += self.conversation_tokens
+        self.stats['uncompacted_tokens_total'] += self._uncompacted_tokens
+        return prompt
+
+    def add_turn(self, message: str, response: str) -> bool:
+        """완료된 턴 기록 - 컨텍스트가 예산을 넘어 압축했으면 True"""
+        response_tokens = estimate_tokens(response)
+        self.turns.append((message, response, estimate_tokens(message) + response_tokens))
+        self.conversation_tokens += response_tokens
+        self._uncompacted_tokens += response_tokens
+
+        if self.budget and self.conversation_tokens > self.budget and len(self.turns) > 1:
+            self.compact()
+            return True
+        return False
+
+    def compact(self):
+        """최근 턴(최대 keep_recent개, 예산의 절반 이내)을 제외한 턴을 요약으로 접고 다음 턴부터 새 CLI 대화로 시작"""
+        folded = 0
+        recent_budget = self.budget // 2  # 다시 시작한 대화가 곧바로 예산을 넘지 않도록
+        while len(self.turns) > self.keep_recent or (
+                len(self.turns) > 1 and sum(tokens for _, _, tokens in self.turns) > recent_budget):
+            message, response, _ = self.turns.popleft()
+            line = (f"- 사용자: {_first_sentence(message, SUMMARY_USER_CHARS)} "
+                    f"→ Claude: {_first_sentence(response, SUMMARY_REPLY_CHARS)}")
+            self.summary.append((line, estimate_tokens(line)))
+            folded += 1
+
+        # 요약도 예산을 넘으면 가장 오래된 줄부터 제거 (전체 예산의 1/4 이내)
+        summary_budget = min(self.summary_budget, self.budget // 4)
+        while self.summary and sum(tokens for _, tokens in self.summary) > summary_budget:
+            self.summary.popleft()
+
+        self.needs_reseed = True
+        self.stats['compactions'] += 1
+        self.stats['folded_turns'] += folded
+        logger.info(f"Compacted conversation history: folded {folded} turns "
+                    f"({self.conversation_tokens} -> ~{self.total_tokens} tokens)")
+
+    def _seed(self, message: str) -> str:
+        lines: List[str] = []
+        if self.summary:
+            lines.append("이전 대화 요약:")
+            lines.extend(line for line, _ in self.summary)
+            lines.append("")
+        if self.turns:
+            lines.append("최근 대화 내용:")
+            for user_message, reply, _ in self.turns:
+                lines.append(f"사용자: {user_message}")
+                lines.append(f"Claude: {reply}")
+            lines.append("")
+        lines.extend(["위 대화에 이어서 다음 메시지에 답해주세요:", message])
+        return '\n'.join(lines)
+
+    def get_stats(self) -> dict:
+        """전송 컨텍스트 크기 및 압축으로 줄인 토큰 (추정)"""
+        uncompacted = self.stats['uncompacted_tokens_total']
+        sent = self.stats['context_tokens_total']
+        return {
+            **self.stats,
+            'history_tokens': self.total_tokens,
+            'conversation_tokens': self.conversation_tokens,
+            'saved_tokens_total': max(uncompacted - sent, 0),
+        }
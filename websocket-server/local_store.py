@@ -0,0 +1,443 @@
+"""
+로컬 저장소 백엔드 (메모리 / SQLite)
+서버가 사용하는 Firestore 비동기 클라이언트 API 일부(문서 읽기/쓰기, 쿼리, batch, 트랜잭션, count 집계, 스냅샷 리스너)를
+프로세스 메모리에서 구현 - GCP 자격 증명이나 네트워크 없이 실행/테스트하고, 네트워크 지연을 뺀 서버 자체 오버헤드를 측정할 때 사용
+(SQLite 경로를 주면 쓰기를 파일에도 기록해 재시작 후에도 유지)
+"""
+
+import asyncio
+import copy
+import functools
+import json
+import logging
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import google.cloud.firestore as firestore
+from google.api_core import exceptions
+
+logger = logging.getLogger(__name__)
+
+
+def _encode(value: Any):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Unsupported value type for local store: {type(value).__name__}")
+
+
+def _decode(obj: dict):
+    if '__datetime__' in obj and len(obj) == 1:
+        return datetime.fromisoformat(obj['__datetime__'])
+    return obj
+
+
+def _apply_transforms(current: dict, data: dict, merge: bool) -> dict:
+    """Increment/DELETE_FIELD 처리와 merge 쓰기 (중첩 맵은 필드 단위로 병합)"""
+    result = copy.deepcopy(current) if merge else {}
+    for key, value in data.items():
+        if value is firestore.DELETE_FIELD:
+            result.pop(key, None)
+        elif isinstance(value, firestore.Increment):
+            result[key] = (result.get(key) or 0) + value.value
+        elif merge and isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _apply_transforms(result[key], value, merge=True)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+
+def _compare(left: Any, op: str, right: Any) -> bool:
+    try:
+        if op == '==':
+            return left == right
+        if op == '!=':
+            return left != right
+        if op == '<':
+            return left < right
+        if op == '<=':
+            return left <= right
+        if op == '>':
+            return left > right
+        if op == '>=':
+            return left >= right
+        if op == 'in':
+            return left in right
+        if op == 'not-in':
+            return left not in right
+        if op == 'array_contains':
+            return isinstance(left, list) and right in left
+        if op == 'array_contains_any':
+            return isinstance(left, list) and any(item in left for item in right)
+    except TypeError:
+        return False
+    raise ValueError(f"Unsupported operator for local store: {op}")
+
+
+class LocalDocumentSnapshot:
+    def __init__(self, reference: 'LocalDocumentReference', data: Optional[dict], select: Optional[List[str]] = None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        if data is not None and select is not None:
+            data = {field: data[field] for field in select if field in data}
+        self._data = data
+
+    def to_dict(self) -> Optional[dict]:
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        if self._data is None or field_path not in self._data:
+            raise KeyError(field_path)
+        return copy.deepcopy(self._data[field_path])
+
+
+class LocalDocumentReference:
+    def __init__(self, client: 'LocalClient', path: str):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def collection(self, name: str) -> 'LocalCollectionReference':
+        return LocalCollectionReference(self._client, f"{self.path}/{name}")
+
+    async def get(self, transaction=None) -> LocalDocumentSnapshot:
+        return LocalDocumentSnapshot(self, self._client._read(self.path))
+
+    async def set(self, data: dict, merge: bool = False):
+        self._client._commit([('set', self, data, merge)])
+
+    async def update(self, data: dict):
+        self._client._commit([('update', self, data, False)])
+
+    async def delete(self):
+        self._client._commit([('delete', self, None, False)])
+
+    async def create(self, data: dict):
+        self._client._commit([('create', self, data, False)])
+
+
+class LocalQuery:
+    def __init__(self, client: 'LocalClient', collection_path: str):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters: List[Tuple[str, str, Any]] = []
+        self._orders: List[Tuple[str, str]] = []
+        self._limit: Optional[int] = None
+        self._start_after = None
+        self._select: Optional[List[str]] = None
+
+    def _copy(self) -> 'LocalQuery':
+        query = copy.copy(self)
+        query._filters = list(self._filters)
+        query._orders = list(self._orders)
+        return query
+
+    def where(self, field_path: str = None, op_string: str = None, value: Any = None, *, filter=None) -> 'LocalQuery':
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        query = self._copy()
+        query._filters.append((field_path, op_string, value))
+        return query
+
+    def order_by(self, field_path: str, direction: str = firestore.Query.ASCENDING) -> 'LocalQuery':
+        query = self._copy()
+        query._orders.append((field_path, direction))
+        return query
+
+    def limit(self, count: int) -> 'LocalQuery':
+        query = self._copy()
+        query._limit = count
+        return query
+
+    def start_after(self, document_fields_or_snapshot) -> 'LocalQuery':
+        query = self._copy()
+        query._start_after = document_fields_or_snapshot
+        return query
+
+    def select(self, field_paths) -> 'LocalQuery':
+        query = self._copy()
+        query._select = list(field_paths)
+        return query
+
+    def count(self, alias: str = None) -> 'LocalAggregationQuery':
+        return LocalAggregationQuery(self)
+
+    def _sort_key(self, doc_id: str, data: dict) -> tuple:
+        values = []
+        for field_path, direction in self._orders:
+            value = doc_id if field_path == '__name__' else data.get(field_path)
+            values.append(_Ordered(value, direction == firestore.Query.DESCENDING))
+        values.append(doc_id)  # 정렬 값이 같으면 문서 ID 순
+        return tuple(values)
+
+    def _matching(self) -> List[Tuple[str, dict]]:
+        docs = []
+        for doc_id, data in self._client._children(self._collection_path):
+            if not all(field in data for field, _ in self._orders if field != '__name__'):
+                continue  # Firestore처럼 정렬 필드가 없는 문서는 제외
+            if all(_compare(data.get(field), op, value) for field, op, value in self._filters):
+                docs.append((doc_id, data))
+        docs.sort(key=lambda item: self._sort_key(*item))
+
+        if self._start_after is not None:
+            if isinstance(self._start_after, dict):
+                cursor = self._sort_key('', self._start_after)[:-1]
+                docs = [item for item in docs if self._sort_key(*item)[:-1] > cursor]
+            else:
+                cursor = self._sort_key(self._start_after.id, self._start_after.to_dict() or {})
+                docs = [item for item in docs if self._sort_key(*item) > cursor]
+        if self._limit is not None:
+            docs = docs[:self._limit]
+        return docs
+
+    async def stream(self, transaction=None):
+        for doc_id, data in self._matching():
+            reference = LocalDocumentReference(self._client, f"{self._collection_path}/{doc_id}")
+            yield LocalDocumentSnapshot(reference, data, self._select)
+
+    async def get(self, transaction=None) -> List[LocalDocumentSnapshot]:
+        return [snapshot async for snapshot in self.stream(transaction)]
+
+
+@functools.total_ordering
+class _Ordered:
+    """정렬용 값 래퍼 (내림차순 뒤집기, None/타입이 다른 값 비교)"""
+
+    def __init__(self, value: Any, descending: bool):
+        self.value = value
+        self.descending = descending
+
+    def _key(self):
+        return (self.value is not None, type(self.value).__name__ if self.value is not None else '')
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        if self._key() != other._key():
+            result = self._key() < other._key()
+        else:
+            try:
+                result = self.value < other.value
+            except TypeError:
+                result = str(self.value) < str(other.value)
+        if self.descending and self.value != other.value:
+            return not result
+        return result
+
+
+class LocalCollectionReference(LocalQuery):
+    def __init__(self, client: 'LocalClient', path: str):
+        super().__init__(client, path)
+        self.path = path
+        self.id = path.rsplit('/', 1)[-1]
+
+    def document(self, document_id: str = None) -> LocalDocumentReference:
+        return LocalDocumentReference(self._client, f"{self.path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def on_snapshot(self, callback: Callable) -> '_LocalWatch':
+        return self._client._watch(self.path, callback)
+
+
+class LocalAggregationQuery:
+    def __init__(self, query: LocalQuery):
+        self._query = query
+
+    async def get(self, transaction=None):
+        return [[SimpleNamespace(alias='count', value=len(self._query._matching()))]]
+
+
+class LocalWriteBatch:
+    """batched write / 트랜잭션 쓰기 모음 (commit 시 한 번에 적용)"""
+
+    def __init__(self, client: 'LocalClient'):
+        self._client = client
+        self._writes: List[tuple] = []
+
+    def set(self, reference: LocalDocumentReference, data: dict, merge: bool = False):
+        self._writes.append(('set', reference, data, merge))
+
+    def update(self, reference: LocalDocumentReference, data: dict):
+        self._writes.append(('update', reference, data, False))
+
+    def delete(self, reference: LocalDocumentReference):
+        self._writes.append(('delete', reference, None, False))
+
+    def create(self, reference: LocalDocumentReference, data: dict):
+        self._writes.append(('create', reference, data, False))
+
+    async def commit(self):
+        writes, self._writes = self._writes, []
+        self._client._commit(writes)
+
+
+class LocalTransaction(LocalWriteBatch):
+    pass
+
+
+class _LocalWatch:
+    def __init__(self, client: 'LocalClient', collection_path: str, callback: Callable):
+        self._client = client
+        self.collection_path = collection_path
+        self.callback = callback
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+        self._client._unwatch(self)
+
+
+class LocalClient:
+    """Firestore 비동기 클라이언트 대체 (문서 경로 → 데이터)"""
+
+    def __init__(self, sqlite_path: Optional[str] = None):
+        self._docs: Dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._transaction_lock: Optional[asyncio.Lock] = None
+        self._watches: List[_LocalWatch] = []
+        self._sqlite: Optional[sqlite3.Connection] = None
+        if sqlite_path:
+            self._open_sqlite(sqlite_path)
+
+    def _open_sqlite(self, path: str):
+        self._sqlite = sqlite3.connect(path, check_same_thread=False)
+        self._sqlite.execute("CREATE TABLE IF NOT EXISTS documents (path TEXT PRIMARY KEY, data TEXT NOT NULL)")
+        for path_value, data in self._sqlite.execute("SELECT path, data FROM documents"):
+            self._docs[path_value] = json.loads(data, object_hook=_decode)
+        logger.info(f"Local store loaded {len(self._docs)} documents from {path}")
+
+    # --- Firestore 클라이언트 API ---
+
+    def collection(self, name: str) -> LocalCollectionReference:
+        return LocalCollectionReference(self, name)
+
+    def batch(self) -> LocalWriteBatch:
+        return LocalWriteBatch(self)
+
+    def transaction(self) -> LocalTransaction:
+        return LocalTransaction(self)
+
+    async def get_all(self, references, transaction=None):
+        for reference in references:
+            yield LocalDocumentSnapshot(reference, self._read(reference.path))
+
+    # --- 로컬 전용 ---
+
+    def reset(self):
+        """모든 문서와 리스너 삭제 (테스트/벤치마크 사이 초기화, SQLite 파일은 건드리지 않음)
+
+        트랜잭션 락은 처음 쓰는 이벤트 루프에 묶이므로 다음 트랜잭션에서 새로 생성
+        """
+        with self._lock:
+            self._docs.clear()
+            self._watches.clear()
+        self._transaction_lock = None
+
+    # --- 내부 ---
+
+    def _read(self, path: str) -> Optional[dict]:
+        with self._lock:
+            data = self._docs.get(path)
+            return copy.deepcopy(data) if data is not None else None
+
+    def _children(self, collection_path: str) -> List[Tuple[str, dict]]:
+        prefix = collection_path + '/'
+        with self._lock:
+            return [(path[len(prefix):], copy.deepcopy(data)) for path, data in self._docs.items()
+                    if path.startswith(prefix) and '/' not in path[len(prefix):]]
+
+    def _commit(self, writes: List[tuple]):
+        """쓰기 목록을 원자적으로 적용 (하나라도 실패하면 아무것도 적용하지 않음)"""
+        with self._lock:
+            staged: Dict[str, Optional[dict]] = {}
+            for kind, reference, data, merge in writes:
+                current = staged[reference.path] if reference.path in staged else self._docs.get(reference.path)
+                if kind == 'create':
+                    if current is not None:
+                        raise exceptions.AlreadyExists(f"Document already exists: {reference.path}")
+                    staged[reference.path] = _apply_transforms({}, data, merge=False)
+                elif kind == 'update':
+                    if current is None:
+                        raise exceptions.NotFound(f"No document to update: {reference.path}")
+                    staged[reference.path] = _apply_transforms(current, data, merge=True)
+                elif kind == 'set':
+                    staged[reference.path] = _apply_transforms(current or {}, data, merge=merge)
+                else:
+                    staged[reference.path] = None
+
+            changes: List[Tuple[str, str, Optional[dict]]] = []
+            for path, data in staged.items():
+                existed = path in self._docs
+                if data is None:
+                    if existed:
+                        del self._docs[path]
+                        changes.append((path, 'REMOVED', None))
+                else:
+                    self._docs[path] = data
+                    changes.append((path, 'MODIFIED' if existed else 'ADDED', data))
+            self._persist(staged)
+            self._notify(changes)
+
+    def _persist(self, staged: Dict[str, Optional[dict]]):
+        if not self._sqlite:
+            return
+        with self._sqlite:
+            for path, data in staged.items():
+                if data is None:
+                    self._sqlite.execute("DELETE FROM documents WHERE path = ?", (path,))
+                else:
+                    self._sqlite.execute("INSERT OR REPLACE INTO documents (path, data) VALUES (?, ?)",
+                                         (path, json.dumps(data, default=_encode, ensure_ascii=False)))
+
+    # --- 스냅샷 리스너 (쓰기 시 같은 스레드에서 바로 호출) ---
+
+    def _watch(self, collection_path: str, callback: Callable) -> _LocalWatch:
+        watch = _LocalWatch(self, collection_path, callback)
+        with self._lock:
+            self._watches.append(watch)
+            docs = self._children(collection_path)
+        snapshots = [LocalDocumentSnapshot(LocalDocumentReference(self, f"{collection_path}/{doc_id}"), data)
+                     for doc_id, data in docs]
+        changes = [SimpleNamespace(type=SimpleNamespace(name='ADDED'), document=snapshot) for snapshot in snapshots]
+        callback(snapshots, changes, datetime.now(timezone.utc))
+        return watch
+
+    def _unwatch(self, watch: _LocalWatch):
+        with self._lock:
+            if watch in self._watches:
+                self._watches.remove(watch)
+
+    def _notify(self, changes: List[Tuple[str, str, Optional[dict]]]):
+        for watch in list(self._watches):
+            matching = [
+                SimpleNamespace(
+                    type=SimpleNamespace(name=kind),
+                    document=LocalDocumentSnapshot(LocalDocumentReference(self, path), data),
+                )
+                for path, kind, data in changes
+                if path.rsplit('/', 1)[0] == watch.collection_path
+            ]
+            if not matching:
+                continue
+            try:
+                watch.callback([], matching, datetime.now(timezone.utc))
+            except Exception as e:
+                logger.error(f"Local snapshot listener error ({watch.collection_path}): {e}")
+
+    # --- 트랜잭션 ---
+
+    def transactional(self, func: Callable) -> Callable:
+        """`firestore.async_transactional` 대체 - 트랜잭션을 하나씩 실행하고 성공하면 쓰기 적용"""
+        @functools.wraps(func)
+        async def run(transaction: LocalTransaction, *args, **kwargs):
+            if self._transaction_lock is None:
+                self._transaction_lock = asyncio.Lock()
+            async with self._transaction_lock:
+                result = await func(transaction, *args, **kwargs)
+                await transaction.commit()
+                return result
+        return run
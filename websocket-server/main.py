@@ -5,11 +5,13 @@ Kubernetes Pod에서 직접 실행되는 클라우드 네이티브 아키텍처
 """
 
 import asyncio
+import csv
+import functools
+import io
 import json
 import uuid
 import logging
 import os
-import subprocess
 import shutil
 import traceback
 from typing import Dict, Optional
@@ -29,16 +31,34 @@ from fastapi.exceptions import RequestValidationError
 from pydantic import BaseModel
 from typing import List, Optional
 import google.cloud.firestore as firestore
+from database import db, collect, async_transactional
 from claude_init import ensure_claude_ready, get_claude_status
-from auth import google_auth, beta_manager
+from auth import google_auth, beta_manager, beta_application_id, normalize_email, BETA_APPLICATIONS_COLLECTION
 from email_service import email_service
+from claude_pool import claude_pool
+from claude_scheduler import claude_scheduler
+from response_cache import response_cache
+from session_reaper import session_reaper
+from process_monitor import process_monitor, ResourceLimitExceeded
+from session_dispatcher import SessionDispatcher
+from history_manager import ConversationHistory
+from conversation_writer import conversation_writer
+from message_store import message_store, MAX_PAGE_SIZE as MAX_RESTORE_PAGE_SIZE
+from session_cache import session_cache
+from whitelist_index import whitelist_index
+from sharded_counter import beta_user_counter, counter_reconciler
+from dashboard_stats import dashboard_stats, agent_delta, format_stats
+from doc_cache import doc_cache
+from activity_tracker import activity_tracker
+from claude_stream import (
+    STREAM_JSON_ARGS, PRINT_STREAM_JSON_ARGS, STREAM_READER_LIMIT, PrintTurn, new_output_buffer, read_lines_into,
+    use_pidfd_child_watcher, encode_user_message, parse_event, extract_text, is_turn_end, result_text
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize Firestore
-db = firestore.Client()
 
 class ClaudeCodeProcess:
     """실제 Claude Code CLI 프로세스 관리자 (영구 세션 지원)"""
@@ -47,18 +67,26 @@ class ClaudeCodeProcess:
         # 기존 필드 완전 유지 (호환성 보장)
         self.user_id = user_id
         self.session_id = session_id
-        self.process: Optional[subprocess.Popen] = None
-        self.output_buffer = []
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.output_buffer = new_output_buffer()  # 최근 출력 줄 (고정 크기 링 버퍼)
         self.is_running = False
         
         # 새 영구 세션 필드 추가 (기존 코드에 영향 없음)
         self.persistent_process = None
         self.reader = None
         self.writer = None
-        self.conversation_history = []
+        self.conversation_history = ConversationHistory()  # 토큰 예산 초과 시 오래된 턴을 요약으로 압축
         self.use_persistent = os.getenv('ENABLE_PERSISTENT_SESSIONS', 'false').lower() == 'true'
         self.session_start_time = None
-        self.last_activity = None
+        self.last_activity = datetime.now()  # 유휴 세션 정리(session_reaper) 기준
+        self.active_turns = 0
+        self._turn_lock = asyncio.Lock()  # 영구 세션은 한 번에 한 턴만 처리
+        
+        # subprocess 방식 대화 맥락 유지 (CLI 대화 ID를 --resume으로 이어감)
+        # --resume 명령은 대화 ID를 포함해 워커 풀에서 미리 띄울 수 없으므로 턴마다 프로세스를 새로 생성 (opt-in)
+        self.use_resume = os.getenv('ENABLE_CLI_RESUME', 'false').lower() == 'true'
+        self.cli_session_id: Optional[str] = None
+        self._resume_loaded = False
         
     async def start(self, initial_context: str = None):
         """실제 Claude Code CLI 프로세스 시작"""
@@ -82,15 +110,13 @@ class ClaudeCodeProcess:
                 system_prompt = self._get_agent_creation_prompt()
                 cmd.extend(['--system', system_prompt])
             
-            self.process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+            self.process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
             )
+            process_monitor.register(self.process, 'legacy', self.user_id, self.session_id)
             
             self.is_running = True
             
@@ -104,7 +130,8 @@ class ClaudeCodeProcess:
             logger.error(f"Failed to start Claude Code: {e}")
             return False
     
-    def _get_agent_creation_prompt(self) -> str:
+    @staticmethod
+    def _get_agent_creation_prompt() -> str:
         """에이전트 생성을 위한 시스템 프롬프트"""
         return """당신은 AI 에이전트를 생성하는 도우미입니다.
 사용자가 원하는 자동화 작업을 이해하고, 단계별로 에이전트를 구성하도록 도와주세요.
@@ -121,99 +148,368 @@ class ClaudeCodeProcess:
 최대한 간결하게 답변해주세요. 200자 이내로 답변하는 것이 좋습니다."""
     
     async def _read_output(self):
-        """비동기로 Claude 출력 읽기"""
+        """비동기로 Claude 출력 읽기 (asyncio 스트림 - executor 스레드 미사용)"""
         if not self.process:
             return
         
-        while self.is_running and self.process and self.process.poll() is None:
-            try:
-                # stdout에서 줄 단위로 읽기 (비동기)
-                line = await asyncio.get_event_loop().run_in_executor(
-                    None, self.process.stdout.readline
-                )
-                if line:
-                    line = line.strip()
-                    if line:  # 빈 줄 무시
-                        self.output_buffer.append(line)
-                        # 너무 많이 누적되지 않도록 제한
-                        if len(self.output_buffer) > 100:
-                            self.output_buffer = self.output_buffer[-50:]  # 최근 50줄만 유지
-                
-                await asyncio.sleep(0.1)  # CPU 사용률 제어
-                
-            except Exception as e:
-                logger.error(f"Error reading Claude output: {e}")
-                break
+        try:
+            # EOF(프로세스 종료)까지 줄 단위로 읽어 링 버퍼에 적재
+            await read_lines_into(self.process.stdout, self.output_buffer)
+        except Exception as e:
+            logger.error(f"Error reading Claude output: {e}")
     
     async def send_message(self, message: str, timeout: float = 30.0) -> str:
         """Claude Code CLI에 메시지 전송 (subprocess 방식 우선)"""
+        self._begin_turn()
         try:
             logger.info(f"Sending message to Claude (session: {self.session_id}): {message[:50]}...")
             
-            # 기본적으로 subprocess 방식 사용 (더 안정적)
-            response = await self._send_via_subprocess(message, timeout)
+            if self.use_persistent:
+                # 영구 세션 (stream-json 프레이밍)
+                response = await self._send_via_persistent_session(message, timeout)
+            else:
+                # 기본적으로 subprocess 방식 사용 (더 안정적)
+                response = await self._send_via_subprocess(message, timeout)
             
             logger.info(f"Received Claude response (session: {self.session_id}): {response[:50]}...")
             return response
             
+        except ResourceLimitExceeded as e:
+            logger.warning(f"Claude process exceeded resource limit (session: {self.session_id}): {e.reason}")
+            return self._limit_error_message(e.reason)
         except Exception as e:
             logger.error(f"Error in Claude communication (session: {self.session_id}): {e}")
             return f"Claude 통신 오류: {str(e)}"
+        finally:
+            self._end_turn()
     
-    async def _send_via_persistent_session(self, message: str, timeout: float = 30.0) -> str:
-        """영구 세션을 통한 메시지 전송"""
-        # 세션이 없거나 비정상이면 새로 시작
-        if not self._is_persistent_session_healthy():
-            await self._start_persistent_session()
+    async def stream_message(self, message: str, timeout: float = 30.0):
+        """Claude Code CLI 응답을 stdout에서 읽는 즉시 청크 단위로 전달 (async generator)"""
+        logger.info(f"Streaming message to Claude (session: {self.session_id}): {message[:50]}...")
+        received = False
         
-        # 메시지 전송
-        if self.writer:
-            self.writer.write(f"{message}\n".encode('utf-8'))
-            await self.writer.drain()
+        if self.use_persistent:
+            stream = self._stream_via_persistent_session(message, timeout)
+        else:
+            stream = self._stream_via_subprocess(message, timeout)
+        
+        self._begin_turn()
+        try:
+            async for chunk in stream:
+                received = True
+                yield chunk
+        except ResourceLimitExceeded as e:
+            logger.warning(f"Claude process exceeded resource limit (session: {self.session_id}): {e.reason}")
+            yield self._limit_error_message(e.reason)
+            return
+        except Exception as e:
+            logger.error(f"Error in Claude streaming (session: {self.session_id}): {e}")
+            yield f"Claude 통신 오류: {str(e)}"
+            return
+        finally:
+            self._end_turn()
+        
+        if not received:
+            yield "Claude로부터 응답을 받지 못했습니다."
+    
+    @staticmethod
+    def _limit_error_message(reason: str) -> str:
+        """리소스 한도 초과 시 사용자에게 보여줄 오류 메시지"""
+        return f"Claude 통신 오류: 리소스 한도({reason})를 초과하여 요청이 중단되었습니다. 요청을 나누어 다시 시도해주세요."
+    
+    def _begin_turn(self):
+        self.active_turns += 1
+        self.last_activity = datetime.now()
+    
+    def _end_turn(self):
+        self.active_turns -= 1
+        self.last_activity = datetime.now()
+    
+    @property
+    def is_busy(self) -> bool:
+        """처리 중인 턴이 있는지 여부"""
+        return self.active_turns > 0
+    
+    def pids(self) -> list:
+        """이 세션이 보유한 살아 있는 CLI 프로세스 pid 목록"""
+        return [
+            process.pid for process in (self.process, self.persistent_process)
+            if process and process.returncode is None
+        ]
+    
+    async def _stream_via_subprocess(self, message: str, timeout: float = 30.0):
+        """subprocess 방식 스트리밍 - CLI 대화를 이어가며 assistant 텍스트를 도착 즉시 전달"""
+        resume_id = self._resume_id()
+        turn = PrintTurn()
+        async for text in self._stream_print_turn(message, timeout, resume_id, turn):
+            yield text
+        
+        if resume_id and turn.session_id is None:
+            # 이어갈 CLI 대화가 없음 (다른 Pod에서 생성되었거나 만료) - 새 대화로 다시 실행
+            logger.warning(f"Failed to resume CLI conversation {resume_id} (session: {self.session_id}), starting a new one")
+            self.cli_session_id = None
+            turn = PrintTurn()
+            async for text in self._stream_print_turn(message, timeout, None, turn):
+                yield text
+        
+        response = turn.response()
+        await self._finish_print_turn(message, response, turn.session_id)
+    
+    async def _stream_print_turn(self, message: str, timeout: float, resume_id: Optional[str], turn: PrintTurn):
+        """--print 한 턴 실행 - stdout stream-json 이벤트를 줄 단위로 읽어 텍스트 반환"""
+        cmd = self.build_print_command(getattr(self, '_context', None), resume_id)
+        process = await claude_pool.acquire(cmd)
+        process_monitor.assign(process, 'turn', self.user_id, self.session_id)
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # stderr 파이프가 가득 차서 프로세스가 멈추지 않도록 별도로 비움
+        stderr_task = asyncio.create_task(process.stderr.read())
+        
+        try:
+            process.stdin.write(self._prompt_for_turn(message, resume_id).encode('utf-8'))
+            await process.stdin.drain()
+            process.stdin.close()
             
-            # 응답 읽기
-            response = await asyncio.wait_for(
-                self._read_complete_response(),
-                timeout=timeout
-            )
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                line = await asyncio.wait_for(process.stdout.readline(), timeout=remaining)
+                if not line:
+                    break
+                text = turn.feed_line(line)
+                if text:
+                    yield text
             
-            # 대화 히스토리 저장
-            self.conversation_history.append((message, response))
-            self.last_activity = datetime.now()
+            await process.wait()
+            # 리소스 한도 초과로 종료된 경우 오류로 전달
+            process_monitor.check_exit(process)
+        finally:
+            if process.returncode is None:
+                # 타임아웃/중단된 워커는 재사용하지 않고 종료
+                process.kill()
+            stderr_task.cancel()
+    
+    async def _send_via_persistent_session(self, message: str, timeout: float = 30.0) -> str:
+        """영구 세션을 통한 메시지 전송 (result 이벤트 도착 즉시 턴 완료)"""
+        async with self._turn_lock:
+            await self._write_persistent_message(message)
+            process = self.persistent_process
+            process_monitor.begin_turn(process)
             
-            if response and response.strip():
-                cleaned_response = self._clean_response(response)
-                return cleaned_response
-            else:
-                return "Claude로부터 응답을 받지 못했습니다."
+            try:
+                # 응답 읽기
+                response = await asyncio.wait_for(
+                    self._read_complete_response(),
+                    timeout=timeout
+                )
+            except BaseException:
+                # 턴 경계가 깨진 세션은 재사용하지 않음
+                await self._cleanup_persistent_session()
+                raise
+            finally:
+                process_monitor.end_turn(process)
+            
+            # 대화 히스토리 저장 (예산 초과 시 압축 후 다음 턴에 새 세션으로 다시 시작)
+            self.conversation_history.add_turn(message, response)
+            self.last_activity = datetime.now()
+        
+        if response and response.strip():
+            return response
         else:
+            return "Claude로부터 응답을 받지 못했습니다."
+    
+    async def _stream_via_persistent_session(self, message: str, timeout: float = 30.0):
+        """영구 세션 스트리밍 - assistant 이벤트 텍스트를 도착 즉시 전달"""
+        async with self._turn_lock:
+            await self._write_persistent_message(message)
+            process = self.persistent_process
+            process_monitor.begin_turn(process)
+            
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            parts = []
+            
+            try:
+                while True:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    event = await asyncio.wait_for(self._read_event(), timeout=remaining)
+                    
+                    text = extract_text(event)
+                    if text:
+                        parts.append(text)
+                        yield text
+                    
+                    if is_turn_end(event):
+                        response = result_text(event, ''.join(parts))
+                        break
+            except BaseException:
+                # 턴 경계가 깨진 세션은 재사용하지 않음
+                await self._cleanup_persistent_session()
+                raise
+            finally:
+                process_monitor.end_turn(process)
+            
+            # 대화 히스토리 저장 (예산 초과 시 압축 후 다음 턴에 새 세션으로 다시 시작)
+            self.conversation_history.add_turn(message, response)
+            self.last_activity = datetime.now()
+    
+    async def _write_persistent_message(self, message: str):
+        """영구 세션 stdin에 stream-json 사용자 메시지 한 줄 기록"""
+        # 세션이 없거나 비정상이면 새로 시작 (히스토리를 압축한 경우에도 요약으로 새 세션 시작)
+        new_conversation = False
+        if self.conversation_history.needs_reseed or not self._is_persistent_session_healthy():
+            await self._start_persistent_session()
+            new_conversation = True
+        
+        if not self.writer:
             raise Exception("Persistent session writer not available")
+        
+        self.writer.write(encode_user_message(self._build_turn_prompt(message, new_conversation)))
+        await self.writer.drain()
     
-    async def _send_via_subprocess(self, message: str, timeout: float = 30.0) -> str:
-        """Fallback subprocess 방식"""
-        cmd = ['claude', 'chat', '--print']
+    @classmethod
+    def system_prompt_for(cls, context: str = None) -> str:
+        """컨텍스트별 추가 시스템 프롬프트 (없으면 빈 문자열)"""
+        if context == 'agent-create':
+            return cls._get_agent_creation_prompt()
+        return ""
+    
+    @classmethod
+    def build_print_command(cls, context: str = None, resume_id: str = None) -> list:
+        """subprocess(--print) 방식 실행 명령 (대화를 이어가지 않는 명령은 워커 풀 키로도 사용)"""
+        cmd = ['claude', '--print', *PRINT_STREAM_JSON_ARGS]
+        
+        # 에이전트 생성 모드인 경우 시스템 프롬프트 추가
+        system_prompt = cls.system_prompt_for(context)
+        if system_prompt:
+            cmd.extend(['--append-system-prompt', system_prompt])
         
-        # subprocess 실행
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdin=asyncio.subprocess.PIPE,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+        # 기존 CLI 대화 이어가기
+        if resume_id:
+            cmd.extend(['--resume', resume_id])
         
-        # 메시지 전송 및 응답 받기
-        stdout_bytes, stderr_bytes = await asyncio.wait_for(
-            process.communicate(input=message.encode('utf-8')),
-            timeout=timeout
-        )
+        return cmd
+    
+    async def _send_via_subprocess(self, message: str, timeout: float = 30.0) -> str:
+        """Fallback subprocess 방식 (미리 생성된 워커 풀 사용, CLI 대화는 --resume으로 이어감)"""
+        resume_id = self._resume_id()
+        turn = await self._run_print_turn(message, timeout, resume_id)
+        
+        if resume_id and turn.session_id is None:
+            # 이어갈 CLI 대화가 없음 (다른 Pod에서 생성되었거나 만료) - 새 대화로 다시 실행
+            logger.warning(f"Failed to resume CLI conversation {resume_id} (session: {self.session_id}), starting a new one")
+            self.cli_session_id = None
+            turn = await self._run_print_turn(message, timeout, None)
         
-        stdout = stdout_bytes.decode('utf-8') if stdout_bytes else ""
+        response = turn.response()
+        await self._finish_print_turn(message, response, turn.session_id)
         
-        if stdout and stdout.strip():
-            return self._clean_response(stdout)
+        if response and response.strip():
+            return self._clean_response(response)
         else:
             return "Claude로부터 응답을 받지 못했습니다."
     
+    async def _run_print_turn(self, message: str, timeout: float, resume_id: Optional[str]) -> PrintTurn:
+        """--print 한 턴 실행 후 전체 stdout 파싱"""
+        cmd = self.build_print_command(getattr(self, '_context', None), resume_id)
+        
+        # 풀에서 워커 체크아웃 (대기 워커가 없거나 대화를 이어가는 경우 새로 생성)
+        process = await claude_pool.acquire(cmd)
+        process_monitor.assign(process, 'turn', self.user_id, self.session_id)
+        
+        # 메시지 전송 및 응답 받기
+        try:
+            stdout_bytes, stderr_bytes = await asyncio.wait_for(
+                process.communicate(input=self._prompt_for_turn(message, resume_id).encode('utf-8')),
+                timeout=timeout
+            )
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # 타임아웃/취소된 워커는 재사용하지 않고 즉시 종료
+            process.kill()
+            raise
+        
+        # 리소스 한도 초과로 종료된 경우 오류로 전달
+        process_monitor.check_exit(process)
+        
+        turn = PrintTurn()
+        for line in (stdout_bytes or b'').splitlines():
+            turn.feed_line(line)
+        return turn
+    
+    def _resume_id(self) -> Optional[str]:
+        """이번 턴에서 이어갈 CLI 대화 ID (히스토리를 압축했으면 새 대화로 시작)"""
+        if not self.use_resume or self.conversation_history.needs_reseed:
+            return None
+        return self.cli_session_id
+    
+    def _prompt_for_turn(self, message: str, resume_id: Optional[str]) -> str:
+        """--print 턴 입력 (새 CLI 대화를 시작하면 이전 대화 요약과 최근 턴을 함께 전달)"""
+        if not self.use_resume:
+            return message
+        return self._build_turn_prompt(message, new_conversation=resume_id is None)
+    
+    def _build_turn_prompt(self, message: str, new_conversation: bool) -> str:
+        """히스토리 관리자로 이번 턴 입력 구성 및 전송 컨텍스트 크기 기록"""
+        prompt = self.conversation_history.build_prompt(message, new_conversation)
+        logger.info(f"Turn context ~{self.conversation_history.conversation_tokens} tokens "
+                    f"(session: {self.session_id}, new_conversation: {new_conversation})")
+        return prompt
+    
+    def record_cached_turn(self, message: str, response: str):
+        """캐시 응답으로 처리한 턴 기록 (다음 턴에서 새 CLI 대화에 함께 전달)"""
+        if self.use_resume:
+            self.conversation_history.add_turn(message, response)
+    
+    async def _finish_print_turn(self, message: str, response: str, cli_session_id: Optional[str]):
+        """턴 완료 - 대화 히스토리 기록 및 CLI 대화 ID 저장"""
+        if not self.use_resume:
+            return
+        self.conversation_history.add_turn(message, response)
+        if cli_session_id and cli_session_id != self.cli_session_id:
+            self.cli_session_id = cli_session_id
+            await self._save_cli_session_id()
+    
+    @property
+    def is_platform_session(self) -> bool:
+        """workspaces 문서가 있는 플랫폼 세션인지 (기본 세션 제외)"""
+        return not self.session_id.startswith("default_")
+    
+    @property
+    def has_context(self) -> bool:
+        """이전 대화 맥락이 있는지 (영구 세션이거나 이어갈 CLI 대화가 있는 경우)"""
+        return self.use_persistent or bool(self.cli_session_id) or bool(self.conversation_history)
+    
+    async def load_resume_state(self):
+        """workspaces 문서에 저장된 CLI 대화 ID 로드 (다른 Pod/재시작 후에도 대화를 이어가기 위해 첫 턴 전에 한 번)"""
+        if self._resume_loaded or not self.use_resume or self.use_persistent:
+            return
+        self._resume_loaded = True
+        if not self.is_platform_session:
+            return
+        
+        try:
+            workspace_doc = await db.collection('workspaces').document(self.session_id).get()
+            if workspace_doc.exists:
+                self.cli_session_id = workspace_doc.to_dict().get('cliSessionId') or self.cli_session_id
+        except Exception as e:
+            logger.warning(f"Error loading CLI session id for {self.session_id}: {e}")
+    
+    async def _save_cli_session_id(self):
+        """CLI 대화 ID를 workspaces 문서에 저장"""
+        if not self.is_platform_session:
+            return
+        try:
+            await db.collection('workspaces').document(self.session_id).update({
+                'cliSessionId': self.cli_session_id,
+                'updatedAt': datetime.utcnow()
+            })
+        except Exception as e:
+            logger.warning(f"Error saving CLI session id for {self.session_id}: {e}")
+    
     def _clean_response(self, response: str) -> str:
         """응답 정리 (프롬프트 제거 등)"""
         lines = response.split('\n')
@@ -237,25 +533,33 @@ class ClaudeCodeProcess:
         # 기존 프로세스 정리
         if self.process:
             try:
-                self.process.terminate()
-                self.process.wait(timeout=5)
+                if self.process.returncode is None:
+                    self.process.terminate()
+                    asyncio.create_task(self._wait_process_exit(self.process))
             except Exception as e:
                 logger.error(f"Error stopping Claude process: {e}")
-                try:
-                    self.process.kill()
-                except:
-                    pass
             finally:
                 self.process = None
         logger.info(f"Claude process stopped for session {self.session_id}")
     
+    async def _wait_process_exit(self, process: asyncio.subprocess.Process):
+        """종료 요청한 프로세스 대기 (5초 내 종료되지 않으면 강제 종료)"""
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5.0)
+        except asyncio.TimeoutError:
+            logger.warning("Force killing Claude process")
+            process.kill()
+        except Exception as e:
+            logger.error(f"Error stopping Claude process: {e}")
+    
     async def _start_persistent_session(self):
         """영구 Claude 세션 시작"""
         # 기존 세션 정리
         if self.persistent_process:
             await self._cleanup_persistent_session()
         
-        cmd = ['claude', 'chat']
+        # stream-json 입출력: 턴 경계를 result 이벤트로 명시적으로 받음
+        cmd = ['claude', '--print', *STREAM_JSON_ARGS]
         
         # 에이전트 생성 컨텍스트용 시스템 프롬프트
         if hasattr(self, '_context') and self._context == 'agent-create':
@@ -267,8 +571,10 @@ class ClaudeCodeProcess:
             *cmd,
             stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+            stderr=asyncio.subprocess.DEVNULL,
+            limit=STREAM_READER_LIMIT
         )
+        process_monitor.register(self.persistent_process, 'persistent', self.user_id, self.session_id)
         
         self.reader = self.persistent_process.stdout
         self.writer = self.persistent_process.stdin
@@ -321,64 +627,34 @@ class ClaudeCodeProcess:
         
         self.reader = None
     
-    async def _read_complete_response(self) -> str:
-        """Claude interactive 세션에서 완전한 응답 읽기"""
+    async def _read_event(self) -> dict:
+        """영구 세션 stdout에서 다음 stream-json 이벤트 읽기"""
         if not self.reader:
             raise Exception("Reader not available")
         
+        while True:
+            line_bytes = await self.reader.readline()
+            if not line_bytes:
+                # 리소스 한도 초과로 종료된 경우 해당 사유로 전달
+                if self.persistent_process:
+                    await self.persistent_process.wait()
+                    process_monitor.check_exit(self.persistent_process)
+                raise Exception("Persistent session closed before end of turn")
+            
+            event = parse_event(line_bytes)
+            if event is not None:
+                return event
+    
+    async def _read_complete_response(self) -> str:
+        """result 이벤트(턴 종료)까지 읽어 완전한 응답 반환"""
         response_parts = []
-        empty_lines = 0
-        line_count = 0
         
         while True:
-            try:
-                # 라인 단위로 읽기 (최대 1초 타임아웃)
-                line_bytes = await asyncio.wait_for(self.reader.readline(), timeout=1.0)
-                if not line_bytes:
-                    # EOF 도달
-                    logger.debug("EOF reached in _read_complete_response")
-                    break
-                
-                line = line_bytes.decode('utf-8')
-                line_count += 1
-                logger.debug(f"Read line {line_count}: {repr(line[:50])}")
-                
-                # 빈 줄 카운트
-                if not line.strip():
-                    empty_lines += 1
-                    # 연속된 빈 줄이 2개 이상이면 응답 종료로 간주
-                    if empty_lines >= 2:
-                        logger.debug("Found 2+ consecutive empty lines, ending response")
-                        break
-                else:
-                    empty_lines = 0
-                    response_parts.append(line)
-                
-                # Claude 프롬프트 패턴 감지
-                if line.strip().startswith('Human:') or line.strip().startswith('>'):
-                    logger.debug(f"Found prompt pattern: {repr(line.strip()[:20])}")
-                    break
-                
-                # 응답이 길어지면 강제 종료 (100줄 제한)
-                if line_count > 100:
-                    logger.warning("Response too long, forcing termination")
-                    break
-                    
-            except asyncio.TimeoutError:
-                # 1초 동안 새 줄이 없으면 응답 완료로 간주
-                logger.debug("Timeout waiting for next line, assuming response complete")
-                break
-            except Exception as e:
-                logger.error(f"Error reading response line: {e}")
-                break
-        
-        # 응답 조합 및 정리
-        full_response = ''.join(response_parts)
-        # 마지막에 나온 Human: 프롬프트 제거
-        if 'Human:' in full_response:
-            full_response = full_response.split('Human:')[0]
-        
-        return full_response.strip()
+            event = await self._read_event()
+            response_parts.append(extract_text(event))
+            
+            if is_turn_end(event):
+                return result_text(event, ''.join(response_parts)).strip()
 
 
 class UserWorkspace:
@@ -388,10 +664,78 @@ class UserWorkspace:
         self.user_id = user_id
         self.claude_processes: Dict[str, ClaudeCodeProcess] = {}  # session_id -> ClaudeCodeProcess
     
-    async def send_to_claude(self, message: str, agent_id: str = None, context: str = "workspace", session_id: str = None) -> str:
+    async def send_to_claude(self, message: str, agent_id: str = None, context: str = "workspace", session_id: str = None, on_queued=None) -> str:
         """실제 Claude Code CLI와 통신"""
         logger.info(f"Processing message for user {self.user_id} (context: {context}, session: {session_id})")
         
+        claude_process = self._get_claude_process(session_id, context)
+        await claude_process.load_resume_state()
+        cache_key = self._response_cache_key(claude_process, message, context)
+        
+        response = await response_cache.get(cache_key) if cache_key else None
+        if response is None:
+            # 전역 스케줄러에서 실행 슬롯을 받은 뒤 Claude Code에 메시지 전송
+            async with claude_scheduler.slot(self.user_id, context, on_queued):
+                response = await claude_process.send_message(message)
+            
+            if cache_key and self._is_cacheable_response(response):
+                await response_cache.set(cache_key, response)
+        else:
+            claude_process.record_cached_turn(message, response)
+        
+        # 에이전트 생성 컨텍스트인 경우 추가 처리
+        if context == "agent-create" and session_id:
+            response = await self._process_agent_creation_response(response, session_id)
+        
+        return response
+    
+    async def stream_to_claude(self, message: str, on_chunk, agent_id: str = None, context: str = "workspace", session_id: str = None, on_queued=None) -> str:
+        """Claude Code CLI 응답을 청크 단위로 on_chunk에 전달하고 조립된 최종 응답 반환"""
+        logger.info(f"Streaming message for user {self.user_id} (context: {context}, session: {session_id})")
+        
+        claude_process = self._get_claude_process(session_id, context)
+        await claude_process.load_resume_state()
+        cache_key = self._response_cache_key(claude_process, message, context)
+        
+        response = await response_cache.get(cache_key) if cache_key else None
+        if response is not None:
+            # 캐시 적중 시 전체 응답을 단일 청크로 전달
+            claude_process.record_cached_turn(message, response)
+            await on_chunk(response)
+        else:
+            parts = []
+            async with claude_scheduler.slot(self.user_id, context, on_queued):
+                async for chunk in claude_process.stream_message(message):
+                    parts.append(chunk)
+                    await on_chunk(chunk)
+            
+            response = claude_process._clean_response(''.join(parts))
+            if cache_key and self._is_cacheable_response(response):
+                await response_cache.set(cache_key, response)
+        
+        # 에이전트 생성 컨텍스트인 경우 추가 처리 (덧붙은 안내 문구는 마지막 청크로 전달)
+        if context == "agent-create" and session_id:
+            processed = await self._process_agent_creation_response(response, session_id)
+            if processed != response:
+                await on_chunk(processed[len(response):])
+            response = processed
+        
+        return response
+    
+    @staticmethod
+    def _response_cache_key(claude_process: ClaudeCodeProcess, message: str, context: str) -> Optional[str]:
+        """응답 캐시 키 (캐시 비활성 컨텍스트이거나 이전 대화 맥락이 있으면 None - 대화의 첫 턴만 캐시)"""
+        if not response_cache.is_enabled(context) or claude_process.has_context:
+            return None
+        return response_cache.make_key(message, context, ClaudeCodeProcess.system_prompt_for(context))
+    
+    @staticmethod
+    def _is_cacheable_response(response: str) -> bool:
+        """오류/빈 응답은 캐시하지 않음"""
+        return bool(response) and not response.startswith("Claude 통신 오류") and response != "Claude로부터 응답을 받지 못했습니다."
+    
+    def _get_claude_process(self, session_id: Optional[str], context: str) -> ClaudeCodeProcess:
+        """세션별 Claude 프로세스 조회 (없으면 생성)"""
         # session_id가 없으면 기본 세션 사용
         if not session_id:
             session_id = f"default_{self.user_id}"
@@ -402,16 +746,7 @@ class UserWorkspace:
             # 컨텍스트 저장
             self.claude_processes[session_id]._context = context
         
-        claude_process = self.claude_processes[session_id]
-        
-        # 실제 Claude Code에 메시지 전송
-        response = await claude_process.send_message(message)
-        
-        # 에이전트 생성 컨텍스트인 경우 추가 처리
-        if context == "agent-create" and session_id:
-            response = await self._process_agent_creation_response(response, session_id)
-        
-        return response
+        return self.claude_processes[session_id]
     
     async def _process_agent_creation_response(self, response: str, session_id: str) -> str:
         """에이전트 생성 응답 후처리"""
@@ -427,13 +762,12 @@ class UserWorkspace:
     async def _create_agent_from_conversation(self, session_id: str) -> Optional[str]:
         """대화 내용에서 에이전트 생성"""
         try:
-            # 워크스페이스 세션 데이터 가져오기
-            workspace_doc = db.collection('workspaces').document(session_id).get()
-            if not workspace_doc.exists:
+            # 워크스페이스 세션 메타데이터 가져오기 (캐시)
+            session_metadata = await session_cache.get(session_id)
+            if not session_metadata:
                 return None
             
-            workspace_data = workspace_doc.to_dict()
-            agent_config = workspace_data.get('agentConfig', {})
+            agent_config = session_metadata.get('agentConfig') or {}
             
             # 기본 에이전트 정보 생성
             agent_ref = db.collection('agents').document()
@@ -454,7 +788,11 @@ class UserWorkspace:
                 'finalPrompt': f"이 에이전트는 Claude Code를 통해 생성되었습니다. 세션 ID: {session_id}"
             }
             
-            agent_ref.set(agent_data)
+            # 에이전트 생성과 대시보드 집계 증가를 한 번에 커밋
+            batch = db.batch()
+            batch.set(agent_ref, agent_data)
+            dashboard_stats.apply_delta(batch, self.user_id, agent_delta(None, agent_data))
+            await batch.commit()
             logger.info(f"Created agent {agent_ref.id} from Claude conversation")
             return agent_ref.id
             
@@ -462,6 +800,12 @@ class UserWorkspace:
             logger.error(f"Error creating agent from conversation: {e}")
             return None
     
+    async def evict_session(self, session_id: str):
+        """세션 하나 정리 (유휴/메모리 압박 시 session_reaper가 호출)"""
+        process = self.claude_processes.pop(session_id, None)
+        if process:
+            process.stop()
+    
     async def cleanup(self):
         """모든 세션 정리"""
         logger.info(f"Cleaning up workspace for user {self.user_id}")
@@ -475,6 +819,8 @@ class ConnectionManager:
     def __init__(self):
         self.active_connections: Dict[str, WebSocket] = {}
         self.user_workspaces: Dict[str, UserWorkspace] = {}
+        # 연결별 세션 메시지 분배기 (세션별 워커가 턴을 순서대로 처리)
+        self.dispatchers: Dict[str, SessionDispatcher] = {}
     
     async def connect(self, websocket: WebSocket, user_id: str):
         await websocket.accept()
@@ -483,114 +829,91 @@ class ConnectionManager:
         logger.info(f"User {user_id} connected")
     
     def disconnect(self, user_id: str):
+        # 진행 중인 턴 취소 (연결이 끊긴 뒤 응답을 끝까지 받지 않도록)
+        self.cancel_all_inflight(user_id)
         if user_id in self.active_connections:
             del self.active_connections[user_id]
+        # 저장 대기 중인 대화 기록 즉시 저장
+        conversation_writer.flush_user_soon(user_id)
         if user_id in self.user_workspaces:
             # 세션 정리는 별도 태스크로 처리
             asyncio.create_task(self.user_workspaces[user_id].cleanup())
             del self.user_workspaces[user_id]
         logger.info(f"User {user_id} disconnected")
     
+    def attach_dispatcher(self, user_id: str, dispatcher: SessionDispatcher):
+        """연결의 세션 메시지 분배기 등록 (취소/메트릭 조회용)"""
+        self.dispatchers[user_id] = dispatcher
+    
+    def cancel_inflight(self, user_id: str, session_id: Optional[str]) -> bool:
+        """세션의 처리 중/대기 중인 턴 취소 (프로세스 종료 + 스케줄러 슬롯 반환) - 취소한 턴이 있으면 True"""
+        dispatcher = self.dispatchers.get(user_id)
+        return dispatcher.cancel(session_id) if dispatcher else False
+    
+    def cancel_all_inflight(self, user_id: str) -> int:
+        """사용자의 진행 중인 모든 턴 취소"""
+        dispatcher = self.dispatchers.pop(user_id, None)
+        if not dispatcher:
+            return 0
+        cancelled = dispatcher.close()
+        if cancelled:
+            logger.info(f"Cancelled in-flight turns of {cancelled} sessions for user {user_id}")
+        return cancelled
+    
+    def get_history_stats(self) -> dict:
+        """살아 있는 세션들의 턴별 전송 컨텍스트 크기 및 히스토리 압축 효과 (추정 토큰)"""
+        totals = {'sessions': 0, 'turns': 0, 'compactions': 0, 'context_tokens_total': 0, 'saved_tokens_total': 0}
+        for workspace in list(self.user_workspaces.values()):
+            for claude_process in list(workspace.claude_processes.values()):
+                stats = claude_process.conversation_history.get_stats()
+                totals['sessions'] += 1
+                for key in ('turns', 'compactions', 'context_tokens_total', 'saved_tokens_total'):
+                    totals[key] += stats[key]
+        totals['avg_context_tokens'] = round(totals['context_tokens_total'] / totals['turns'], 1) if totals['turns'] else 0.0
+        return totals
+    
+    def get_dispatch_stats(self) -> dict:
+        """연결별 세션 분배기 메트릭"""
+        return {
+            'connections': len(self.active_connections),
+            'active_sessions': sum(d.get_stats()['sessions'] for d in self.dispatchers.values()),
+            'pending_messages': sum(d.pending for d in self.dispatchers.values()),
+            'rejected_messages': sum(d.stats['rejected'] for d in self.dispatchers.values()),
+        }
+    
     async def send_personal_message(self, message: str, user_id: str):
         if user_id in self.active_connections:
             await self.active_connections[user_id].send_text(message)
     
-    async def process_user_message(self, user_id: str, message: str, agent_id: str = None, context: str = "workspace", session_id: str = None) -> str:
+    async def process_user_message(self, user_id: str, message: str, agent_id: str = None, context: str = "workspace", session_id: str = None, on_queued=None) -> str:
         """사용자 메시지를 Claude Code CLI로 전달하고 응답 받기"""
         if user_id not in self.user_workspaces:
             return "Error: Workspace not found"
         
         workspace = self.user_workspaces[user_id]
-        response = await workspace.send_to_claude(message, agent_id, context, session_id)
+        response = await workspace.send_to_claude(message, agent_id, context, session_id, on_queued)
         
-        # Firestore에 대화 기록 저장
-        await self._save_conversation(user_id, message, response, agent_id, session_id)
+        # Firestore에 대화 기록 저장 (일괄 저장 큐)
+        self._save_conversation(user_id, message, response, agent_id, session_id)
         
         return response
     
-    async def _save_conversation(self, user_id: str, user_message: str, assistant_response: str, agent_id: str = None, session_id: str = None):
-        """Firestore에 대화 기록 저장 (개선된 통합 방식)"""
-        try:
-            # 메시지 객체 생성
-            messages = [
-                {
-                    'role': 'user',
-                    'content': user_message,
-                    'timestamp': datetime.utcnow()
-                },
-                {
-                    'role': 'assistant', 
-                    'content': assistant_response,
-                    'timestamp': datetime.utcnow()
-                }
-            ]
-            
-            # 세션 기반 대화 기록 (통합 방식)
-            if session_id:
-                try:
-                    workspace_ref = db.collection('workspaces').document(session_id)
-                    workspace_doc = workspace_ref.get()
-                    
-                    if workspace_doc.exists:
-                        # 기존 workspace에 메시지 추가 (ArrayUnion 사용)
-                        workspace_ref.update({
-                            'messages': firestore.ArrayUnion(messages),
-                            'lastActivityAt': datetime.utcnow()
-                        })
-                        logger.info(f"Messages added to workspace {session_id} using ArrayUnion")
-                    else:
-                        logger.warning(f"Workspace {session_id} not found, creating new workspace")
-                        # 워크스페이스가 없으면 새로 생성
-                        workspace_data = {
-                            'sessionId': session_id,
-                            'userId': user_id,
-                            'agentId': agent_id,
-                            'status': 'active',
-                            'createdAt': datetime.utcnow(),
-                            'lastActivityAt': datetime.utcnow(),
-                            'messages': messages,
-                            'context': 'workspace'
-                        }
-                        workspace_ref.set(workspace_data)
-                        
-                except Exception as workspace_error:
-                    logger.error(f"Error updating workspace {session_id}: {workspace_error}")
-                    # Fallback to conversations collection
-                    await self._save_to_conversations_collection(user_id, user_message, assistant_response, agent_id, session_id)
-            else:
-                # 세션 ID가 없으면 기존 conversations 컬렉션 사용
-                await self._save_to_conversations_collection(user_id, user_message, assistant_response, agent_id, session_id)
-                
-        except Exception as e:
-            logger.error(f"Error saving conversation: {e}")
-            # 최종 fallback - 항상 conversations에 저장
-            try:
-                await self._save_to_conversations_collection(user_id, user_message, assistant_response, agent_id, session_id)
-            except Exception as fallback_error:
-                logger.error(f"Fallback conversation save also failed: {fallback_error}")
-    
-    async def _save_to_conversations_collection(self, user_id: str, user_message: str, assistant_response: str, agent_id: str = None, session_id: str = None):
-        """기존 conversations 컬렉션에 저장 (호환성 보장)"""
-        conversation_ref = db.collection('conversations').document()
-        conversation_data = {
-            'userId': user_id,
-            'agentId': agent_id,
-            'sessionId': session_id,
-            'messages': [
-                {
-                    'role': 'user',
-                    'content': user_message,
-                    'timestamp': datetime.utcnow()
-                },
-                {
-                    'role': 'assistant',
-                    'content': assistant_response,
-                    'timestamp': datetime.utcnow()
-                }
-            ],
-            'createdAt': datetime.utcnow()
-        }
-        conversation_ref.set(conversation_data)
+    async def process_user_message_stream(self, user_id: str, message: str, on_chunk, agent_id: str = None, context: str = "workspace", session_id: str = None, on_queued=None) -> str:
+        """스트리밍 모드 - 청크는 on_chunk로 즉시 전달하고, 조립된 응답은 한 번만 저장"""
+        if user_id not in self.user_workspaces:
+            return "Error: Workspace not found"
+        
+        workspace = self.user_workspaces[user_id]
+        response = await workspace.stream_to_claude(message, on_chunk, agent_id, context, session_id, on_queued)
+        
+        # Firestore에 대화 기록 저장 (조립된 전체 응답 기준, 일괄 저장 큐)
+        self._save_conversation(user_id, message, response, agent_id, session_id)
+        
+        return response
+    
+    def _save_conversation(self, user_id: str, user_message: str, assistant_response: str, agent_id: str = None, session_id: str = None):
+        """대화 기록 저장 예약 (write-behind - 응답 전송이 Firestore 지연을 기다리지 않음)"""
+        conversation_writer.enqueue(user_id, user_message, assistant_response, agent_id, session_id)
 
 # FastAPI 애플리케이션 초기화
 app = FastAPI(title="AI Agent Platform", version="1.1.0")
@@ -686,8 +1009,61 @@ async def startup_event():
         raise Exception("ANTHROPIC_API_KEY environment variable is required")
     
     app.state.claude_ready = True
+    
+    # 서브프로세스마다 대기 스레드가 생기지 않도록 pidfd 기반 자식 프로세스 감시 사용
+    if use_pidfd_child_watcher():
+        logger.info("✓ Using pidfd child watcher for Claude subprocesses")
+    
+    # Claude CLI 워커 풀 예열 (컨텍스트별 명령어)
+    for context in ('workspace', 'agent-create'):
+        claude_pool.register(ClaudeCodeProcess.build_print_command(context))
+    await claude_pool.start()
+    
+    # 유휴/메모리 압박 세션 정리 태스크
+    session_reaper.start(lambda: manager.user_workspaces.values())
+    
+    # CLI 프로세스 리소스 샘플링/한도 검사
+    process_monitor.start()
+    
+    # 대화 기록 일괄 저장 (write-behind)
+    conversation_writer.start()
+    
+    # 화이트리스트 메모리 인덱스 (콜드 스타트 로드 + 스냅샷 리스너)
+    await whitelist_index.start()
+    
+    # 이전 종료 시 보내지 못한 승인 메일 재발송
+    try:
+        await resume_pending_approval_emails()
+    except Exception as e:
+        logger.error(f"Failed to resume pending approval notifications: {e}")
+    
+    # 베타 사용자 수 카운터 주기적 재계산
+    counter_reconciler.start()
+    
+    # 대시보드 집계 주기적 재계산
+    dashboard_stats.start()
+    
+    # 마지막 활동 시각 병합 저장
+    activity_tracker.start()
+    
     logger.info("Service ready in seconds!")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """서버 종료 시 백그라운드 리소스 정리"""
+    await session_reaper.stop()
+    await process_monitor.stop()
+    await claude_pool.stop()
+    # 저장 대기 중인 대화 기록 저장
+    await conversation_writer.stop()
+    await whitelist_index.stop()
+    await counter_reconciler.stop()
+    await dashboard_stats.stop()
+    # 저장 대기 중인 활동 시각 저장
+    await activity_tracker.stop()
+    # 백그라운드 승인 메일 발송 완료 대기
+    await email_service.drain()
+
 @app.websocket("/workspace/{user_id}")
 async def user_workspace(websocket: WebSocket, user_id: str):
     """사용자 전용 워크스페이스 - Kubernetes Pod 세션 기반"""
@@ -719,8 +1095,95 @@ async def user_workspace(websocket: WebSocket, user_id: str):
         
         ping_task = asyncio.create_task(send_ping())
         
+        # 채팅 메시지 한 턴 처리 (세션 워커가 태스크로 실행하므로 취소 가능)
+        async def handle_chat_message(user_message: str, session_id: Optional[str], stream: bool):
+            try:
+                # 세션 컨텍스트 확인 (세션 메타데이터 캐시 - 턴마다 Firestore를 읽지 않음)
+                context = "workspace"  # 기본값
+                if session_id:
+                    try:
+                        session_metadata = await session_cache.get(session_id)
+                        if session_metadata:
+                            context = session_metadata.get('context') or 'workspace'
+                    except Exception as db_error:
+                        logger.warning(f"Error accessing workspace {session_id}: {db_error}")
+
+                # 전역 스케줄러 대기 시 대기 순번 알림
+                async def send_queued(position: int):
+                    queued_data = {
+                        "type": "queued",
+                        "session_id": session_id,
+                        "position": position,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                    await websocket.send_text(json.dumps(queued_data))
+
+                if stream:
+                    # 스트리밍 모드: 청크마다 claude_chunk 프레임 전송
+                    seq = 0
+
+                    async def send_chunk(chunk: str):
+                        nonlocal seq
+                        chunk_data = {
+                            "type": "claude_chunk",
+                            "session_id": session_id,
+                            "seq": seq,
+                            "content": chunk
+                        }
+                        seq += 1
+                        await websocket.send_text(json.dumps(chunk_data))
+
+                    agent_response = await manager.process_user_message_stream(
+                        user_id, user_message, send_chunk, context=context, session_id=session_id,
+                        on_queued=send_queued
+                    )
+
+                    # 스트림 종료 프레임 (정리된 전체 응답 포함)
+                    response_data = {
+                        "type": "claude_response_end",
+                        "session_id": session_id,
+                        "seq": seq,
+                        "content": agent_response,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                else:
+                    # Claude Code CLI로 메시지 전달
+                    agent_response = await manager.process_user_message(
+                        user_id, user_message, context=context, session_id=session_id,
+                        on_queued=send_queued
+                    )
+
+                    response_data = {
+                        "type": "claude_response",
+                        "session_id": session_id,
+                        "content": agent_response,
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+
+                # 응답 전송
+                await websocket.send_text(json.dumps(response_data))
+                logger.debug(f"Response sent successfully to user {user_id}")
+
+            except Exception as process_error:
+                logger.error(f"Error processing message from user {user_id}: {process_error}")
+                # 에러가 발생해도 사용자에게 알림 전송
+                error_response = {
+                    "type": "claude_response",
+                    "session_id": session_id,
+                    "content": "죄송합니다. 메시지 처리 중 오류가 발생했습니다. 다시 시도해주세요.",
+                    "timestamp": datetime.utcnow().isoformat()
+                }
+                try:
+                    await websocket.send_text(json.dumps(error_response))
+                except:
+                    # WebSocket 전송도 실패하면 로그만 남김
+                    logger.error(f"Failed to send error response to user {user_id}")
+        
+        dispatcher = SessionDispatcher(user_id)
+        manager.attach_dispatcher(user_id, dispatcher)
+        
         try:
-            # 메시지 처리 루프
+            # 메시지 수신 루프 (처리는 세션별 워커 태스크가 담당)
             while True:
                 try:
                     # 사용자 메시지 수신
@@ -732,51 +1195,38 @@ async def user_workspace(websocket: WebSocket, user_id: str):
                         message_data = json.loads(data)
                         user_message = message_data.get('message', '')
                         session_id = message_data.get('session_id')  # 세션 ID 추출
+                        stream = bool(message_data.get('stream', False))  # 스트리밍 모드 여부
                         logger.info(f"Parsed message from user {user_id}: message_len={len(user_message)}, session_id={session_id}")
                     except json.JSONDecodeError as e:
                         logger.error(f"Invalid JSON received from user {user_id}: {e}")
                         continue
                     
+                    # 진행 중인 요청 취소
+                    if message_data.get('type') == 'cancel':
+                        cancel_session_id = message_data.get('session_id')
+                        cancelled = manager.cancel_inflight(user_id, cancel_session_id)
+                        cancelled_data = {
+                            "type": "cancelled",
+                            "session_id": cancel_session_id,
+                            "cancelled": cancelled,
+                            "timestamp": datetime.utcnow().isoformat()
+                        }
+                        await websocket.send_text(json.dumps(cancelled_data))
+                        logger.info(f"Cancel requested by user {user_id} for session {cancel_session_id} (cancelled={cancelled})")
+                        continue
+                    
                     if user_message:
-                        try:
-                            # 세션 컨텍스트 확인
-                            context = "workspace"  # 기본값
-                            if session_id:
-                                try:
-                                    workspace_doc = db.collection('workspaces').document(session_id).get()
-                                    if workspace_doc.exists:
-                                        workspace_data = workspace_doc.to_dict()
-                                        context = workspace_data.get('context', 'workspace')
-                                except Exception as db_error:
-                                    logger.warning(f"Error accessing workspace {session_id}: {db_error}")
-                            
-                            # Claude Code CLI로 메시지 전달
-                            agent_response = await manager.process_user_message(
-                                user_id, user_message, context=context, session_id=session_id
-                            )
-                            
-                            # 응답 전송
-                            response_data = {
+                        # 세션별 큐로 분배 (세션 간 병렬 처리) - 수신 루프는 대기하지 않으므로 cancel 프레임은 항상 바로 처리
+                        turn = functools.partial(handle_chat_message, user_message, session_id, stream)
+                        if not dispatcher.submit(session_id, turn):
+                            rejected_data = {
                                 "type": "claude_response",
-                                "content": agent_response,
+                                "session_id": session_id,
+                                "content": "처리 대기 중인 메시지가 너무 많습니다. 이전 응답이 끝난 뒤 다시 시도해주세요.",
+                                "error": "queue_full",
                                 "timestamp": datetime.utcnow().isoformat()
                             }
-                            await websocket.send_text(json.dumps(response_data))
-                            logger.debug(f"Response sent successfully to user {user_id}")
-                            
-                        except Exception as process_error:
-                            logger.error(f"Error processing message from user {user_id}: {process_error}")
-                            # 에러가 발생해도 사용자에게 알림 전송
-                            error_response = {
-                                "type": "claude_response",
-                                "content": "죄송합니다. 메시지 처리 중 오류가 발생했습니다. 다시 시도해주세요.",
-                                "timestamp": datetime.utcnow().isoformat()
-                            }
-                            try:
-                                await websocket.send_text(json.dumps(error_response))
-                            except:
-                                # WebSocket 전송도 실패하면 로그만 남김
-                                logger.error(f"Failed to send error response to user {user_id}")
+                            await websocket.send_text(json.dumps(rejected_data))
                                 
                 except WebSocketDisconnect as ws_disconnect:
                     # WebSocket 연결이 끊어지면 내부 루프 종료
@@ -799,6 +1249,10 @@ async def user_workspace(websocket: WebSocket, user_id: str):
             logger.error(f"Error details: {str(loop_error)}")
             logger.error(f"Loop error traceback: {traceback.format_exc()}")
         finally:
+            # 진행 중인 턴 취소 및 워크스페이스 정리 (같은 사용자의 새 연결은 유지)
+            if manager.active_connections.get(user_id) is websocket:
+                manager.disconnect(user_id)
+            
             # ping task 정리 (연결 종료 시에만)
             if not ping_task.done():
                 ping_task.cancel()
@@ -822,6 +1276,60 @@ async def health_check():
     """헬스체크 엔드포인트"""
     return {"status": "healthy", "timestamp": datetime.utcnow().isoformat(), "version": "1.0.3", "registry": "artifact-registry"}
 
+@app.get("/api/admin/metrics")
+async def get_metrics():
+    """서버 내부 메트릭 조회 (풀 사이징/모니터링용)"""
+    return {
+        "claude_pool": claude_pool.get_stats(),
+        "claude_scheduler": claude_scheduler.get_stats(),
+        "response_cache": response_cache.get_stats(),
+        "session_reaper": session_reaper.get_stats(),
+        "process_monitor": process_monitor.get_stats(),
+        "websocket": manager.get_dispatch_stats(),
+        "conversation_history": manager.get_history_stats(),
+        "conversation_writer": conversation_writer.get_stats(),
+        "session_cache": session_cache.get_stats(),
+        "whitelist_index": whitelist_index.get_stats(),
+        "beta_user_counter": beta_user_counter.get_stats(),
+        "dashboard_stats": dashboard_stats.get_stats(),
+        "doc_cache": doc_cache.get_stats(),
+        "activity_tracker": activity_tracker.get_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/api/admin/sessions")
+async def list_live_sessions():
+    """살아 있는 Claude 세션 및 CLI 프로세스별 리소스 사용량 조회"""
+    sessions = {}
+    for workspace in list(manager.user_workspaces.values()):
+        for session_id, claude_process in list(workspace.claude_processes.items()):
+            sessions[session_id] = {
+                "user_id": workspace.user_id,
+                "session_id": session_id,
+                "context": getattr(claude_process, '_context', 'workspace'),
+                "busy": claude_process.is_busy,
+                "cli_session_id": claude_process.cli_session_id,
+                "history": claude_process.conversation_history.get_stats(),
+                "last_activity": claude_process.last_activity.isoformat() if claude_process.last_activity else None,
+                "processes": []
+            }
+    
+    # 세션에 귀속되지 않은 프로세스 (풀 대기 워커 등)
+    unassigned = []
+    for process_info in process_monitor.list_processes():
+        session = sessions.get(process_info['session_id'])
+        if session:
+            session['processes'].append(process_info)
+        else:
+            unassigned.append(process_info)
+    
+    return {
+        "sessions": list(sessions.values()),
+        "unassigned_processes": unassigned,
+        "limits": process_monitor.get_limits(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 # 게스트 인증 API 제거됨 - Google OAuth만 사용
 
 # 베타 사용자 관리 API
@@ -835,6 +1343,29 @@ async def get_beta_count():
         logger.error(f"Error getting beta count: {e}")
         return {"count": 17, "max": 30, "remaining": 13}  # 기본값
 
+@app.post("/api/admin/beta/count/reconcile")
+async def reconcile_beta_count():
+    """베타 사용자 수 카운터를 users 컬렉션 기준으로 재계산"""
+    try:
+        count = await beta_user_counter.reconcile()
+        return {"count": count, "drift": beta_user_counter.stats['last_reconcile_drift']}
+    except Exception as e:
+        logger.error(f"Error reconciling beta count: {e}")
+        raise HTTPException(status_code=500, detail="베타 사용자 수 재계산에 실패했습니다.")
+
+@app.delete("/api/admin/beta/users/{user_id}")
+async def remove_beta_user(user_id: str):
+    """베타 사용자 해제 (카운터 감소)"""
+    try:
+        if not await beta_manager.remove_beta_user(user_id):
+            raise HTTPException(status_code=404, detail="베타 사용자를 찾을 수 없습니다.")
+        return {"success": True}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error removing beta user {user_id}: {e}")
+        raise HTTPException(status_code=500, detail="베타 사용자 해제에 실패했습니다.")
+
 # 베타 신청 데이터 모델
 class BetaApplicationRequest(BaseModel):
     email: str
@@ -867,17 +1398,13 @@ async def apply_beta(request: Request):
             logger.error(f"Beta application validation error: {validation_error}")
             raise HTTPException(status_code=422, detail=str(validation_error))
         
-        # 이미 신청한 이메일인지 확인
-        existing_applications = db.collection('beta_applications').where('email', '==', application_data.email).stream()
-        if len(list(existing_applications)) > 0:
-            raise HTTPException(status_code=409, detail="이미 신청하신 이메일입니다.")
-        
-        # 베타 신청 데이터 저장
-        application_ref = db.collection('beta_applications').document()
+        # 신청 문서 ID는 정규화한 이메일의 해시 - 중복 확인은 문서 1개 읽기
+        application_ref = db.collection(BETA_APPLICATIONS_COLLECTION).document(beta_application_id(application_data.email))
         applied_at = datetime.utcnow()
         
         application_doc = {
             'email': application_data.email,
+            'email_normalized': normalize_email(application_data.email),
             'name': application_data.name,
             'company': application_data.company,
             'use_case': application_data.use_case,
@@ -889,7 +1416,17 @@ async def apply_beta(request: Request):
             'notes': ''
         }
         
-        application_ref.set(application_doc)
+        # 확인과 저장을 한 트랜잭션으로 처리 (동시에 두 번 제출해도 한 건만 생성)
+        @async_transactional
+        async def create_application(transaction) -> bool:
+            snapshot = await application_ref.get(transaction=transaction)
+            if snapshot.exists:
+                return False
+            transaction.create(application_ref, application_doc)
+            return True
+        
+        if not await create_application(db.transaction()):
+            raise HTTPException(status_code=409, detail="이미 신청하신 이메일입니다.")
         
         # 이메일 발송 (비동기)
         user_data = {
@@ -933,28 +1470,31 @@ async def apply_beta(request: Request):
 
 # 화이트리스트 관리 함수
 async def check_whitelist(email: str) -> bool:
-    """화이트리스트 확인"""
+    """화이트리스트 확인 (메모리 인덱스)"""
     try:
-        whitelist_ref = db.collection('whitelist').where('email', '==', email).where('status', '==', 'active')
-        docs = list(whitelist_ref.stream())
-        return len(docs) > 0
+        return await whitelist_index.is_active(email)
     except Exception as e:
         logger.error(f"Error checking whitelist for {email}: {e}")
         return False
 
+def whitelist_doc(email: str, name: str, admin_email: str = "admin", notes: str = "") -> dict:
+    """화이트리스트 문서 데이터 (이메일은 정규화해서 저장 - 조회/중복 확인/제거가 모두 같은 값으로 비교)"""
+    return {
+        'email': normalize_email(email),
+        'name': name,
+        'added_at': datetime.utcnow(),
+        'added_by': admin_email,
+        'status': 'active',
+        'notes': notes
+    }
+
 async def add_to_whitelist(email: str, name: str, admin_email: str = "admin", notes: str = "") -> bool:
     """화이트리스트 추가"""
     try:
         whitelist_ref = db.collection('whitelist').document()
-        whitelist_data = {
-            'email': email,
-            'name': name,
-            'added_at': datetime.utcnow(),
-            'added_by': admin_email,
-            'status': 'active',
-            'notes': notes
-        }
-        whitelist_ref.set(whitelist_data)
+        whitelist_data = whitelist_doc(email, name, admin_email, notes)
+        await whitelist_ref.set(whitelist_data)
+        whitelist_index.record_write(whitelist_ref.id, whitelist_data)
         
         # 승인 이메일 발송
         await email_service.send_approval_notification(email, name)
@@ -994,15 +1534,9 @@ async def add_whitelist(request: WhitelistAddRequest):
 
 @app.get("/api/admin/whitelist")
 async def get_whitelist():
-    """화이트리스트 조회"""
+    """화이트리스트 조회 (메모리 인덱스)"""
     try:
-        whitelist_ref = db.collection('whitelist').order_by('added_at', direction=firestore.Query.DESCENDING)
-        whitelist = []
-        
-        for doc in whitelist_ref.stream():
-            whitelist_data = doc.to_dict()
-            whitelist_data['id'] = doc.id
-            whitelist.append(whitelist_data)
+        whitelist = await whitelist_index.list_entries()
         
         return {"whitelist": whitelist, "count": len(whitelist)}
         
@@ -1010,20 +1544,212 @@ async def get_whitelist():
         logger.error(f"Error fetching whitelist: {e}")
         raise HTTPException(status_code=500, detail="화이트리스트 조회에 실패했습니다.")
 
+# Firestore batched write 한 번에 넣을 수 있는 최대 쓰기 수
+WHITELIST_BATCH_LIMIT = 500
+# 승인 메일을 아직 보내지 못한 화이트리스트 항목 표시 (종료 시 못 보낸 메일은 다음 시작 때 다시 발송)
+APPROVAL_EMAIL_PENDING_FIELD = 'approval_email_pending'
+WHITELIST_BULK_MAX_ENTRIES = int(os.getenv('WHITELIST_BULK_MAX_ENTRIES', '1000'))
+
+async def parse_whitelist_bulk_body(request: Request) -> List[dict]:
+    """대량 요청 본문 파싱 - JSON(항목 배열 또는 {"entries": [...]}) 또는 CSV(email,name,notes 헤더)"""
+    content_type = request.headers.get('content-type', '')
+    try:
+        if 'csv' in content_type or 'text/plain' in content_type:
+            text = (await request.body()).decode('utf-8-sig')
+            entries = [dict(row) for row in csv.DictReader(io.StringIO(text))]
+        else:
+            payload = await request.json()
+            entries = payload.get('entries', payload.get('emails')) if isinstance(payload, dict) else payload
+    except Exception as parse_error:
+        logger.error(f"Whitelist bulk parsing error: {parse_error}")
+        raise HTTPException(status_code=400, detail="JSON 또는 CSV 형식이 올바르지 않습니다.")
+    
+    if not isinstance(entries, list):
+        raise HTTPException(status_code=400, detail="항목 목록이 필요합니다.")
+    if len(entries) > WHITELIST_BULK_MAX_ENTRIES:
+        raise HTTPException(status_code=413, detail=f"한 번에 최대 {WHITELIST_BULK_MAX_ENTRIES}건까지 처리할 수 있습니다.")
+    # 이메일 문자열만 있는 목록도 허용
+    return [entry if isinstance(entry, dict) else {'email': entry} for entry in entries]
+
+async def whitelist_docs_by_email() -> Dict[str, List[dict]]:
+    """정규화한 이메일 → 화이트리스트 항목 목록 (인덱스/컬렉션 한 번 조회)"""
+    docs: Dict[str, List[dict]] = {}
+    for entry in await whitelist_index.list_entries():
+        if entry.get('email'):
+            docs.setdefault(normalize_email(entry['email']), []).append(entry)
+    return docs
+
+def queue_whitelist_approval_emails(pending: List[tuple]):
+    """(문서 ID, 이메일, 이름) 목록의 승인 메일을 백그라운드 발송 - 보낸 항목은 발송 대기 표시 해제"""
+    doc_ids = {email: doc_id for doc_id, email, _ in pending}
+    
+    async def mark_sent(email: str):
+        await db.collection('whitelist').document(doc_ids[email]).update({
+            APPROVAL_EMAIL_PENDING_FIELD: False,
+            'approval_email_sent_at': datetime.utcnow()
+        })
+    
+    email_service.queue_approval_notifications([(email, name) for _, email, name in pending], on_sent=mark_sent)
+
+async def resume_pending_approval_emails() -> int:
+    """이전 프로세스가 종료 전에 보내지 못한 승인 메일 다시 발송 - 다시 보낸 건수 반환"""
+    query = db.collection('whitelist').where(filter=firestore.FieldFilter(APPROVAL_EMAIL_PENDING_FIELD, '==', True))
+    pending = []
+    for doc in await collect(query):
+        data = doc.to_dict()
+        if data.get('status') == 'active' and data.get('email'):
+            pending.append((doc.id, data['email'], data.get('name', '')))
+    if pending:
+        logger.info(f"Resending {len(pending)} approval notifications left pending by a previous shutdown")
+        queue_whitelist_approval_emails(pending)
+    return len(pending)
+
+@app.post("/api/admin/whitelist/bulk")
+async def bulk_add_whitelist(request: Request, send_email: bool = True):
+    """화이트리스트 대량 추가 (기존 항목과 한 번에 중복 확인, 500건 단위 batched write, 승인 메일은 백그라운드 동시 발송)"""
+    entries = await parse_whitelist_bulk_body(request)
+    
+    try:
+        existing = await whitelist_docs_by_email()
+        results = []
+        to_add = []  # (결과 항목, 문서 참조, 문서 데이터)
+        seen = set()
+        for entry in entries:
+            raw_email = str(entry.get('email') or '').strip()
+            email = normalize_email(raw_email)
+            result = {'email': raw_email}
+            results.append(result)
+            if not email or '@' not in email:
+                result['status'] = 'invalid'
+            elif email in seen:
+                result['status'] = 'duplicate'
+            elif any(doc.get('status') == 'active' for doc in existing.get(email, ())):
+                result['status'] = 'exists'
+            else:
+                seen.add(email)
+                whitelist_ref = db.collection('whitelist').document()
+                whitelist_data = whitelist_doc(email, str(entry.get('name') or ''), "admin", str(entry.get('notes') or ''))
+                if send_email:
+                    # 항목과 함께 발송 대기로 기록 (종료 전에 못 보낸 메일은 다음 시작 때 다시 발송)
+                    whitelist_data[APPROVAL_EMAIL_PENDING_FIELD] = True
+                result.update({'email': email, 'id': whitelist_ref.id})
+                to_add.append((result, whitelist_ref, whitelist_data))
+        
+        notify = []
+        for start in range(0, len(to_add), WHITELIST_BATCH_LIMIT):
+            chunk = to_add[start:start + WHITELIST_BATCH_LIMIT]
+            batch = db.batch()
+            for _, whitelist_ref, whitelist_data in chunk:
+                batch.set(whitelist_ref, whitelist_data)
+            try:
+                await batch.commit()
+            except Exception as e:
+                logger.error(f"Whitelist bulk batch failed ({len(chunk)} entries): {e}")
+                for result, _, _ in chunk:
+                    result.update({'status': 'failed', 'error': str(e)})
+                    result.pop('id', None)
+                continue
+            for result, whitelist_ref, whitelist_data in chunk:
+                result['status'] = 'added'
+                whitelist_index.record_write(whitelist_ref.id, whitelist_data)
+                notify.append((whitelist_ref.id, whitelist_data['email'], whitelist_data['name']))
+        
+        # 승인 메일은 응답을 기다리지 않고 백그라운드에서 동시 발송
+        if send_email:
+            queue_whitelist_approval_emails(notify)
+        
+        summary = {status: 0 for status in ('added', 'exists', 'duplicate', 'invalid', 'failed')}
+        for result in results:
+            summary[result['status']] += 1
+        logger.info(f"Whitelist bulk add: {summary}")
+        return {
+            "success": summary['failed'] == 0,
+            "summary": summary,
+            "emails_queued": len(notify) if send_email else 0,
+            "results": results
+        }
+        
+    except Exception as e:
+        logger.error(f"Error in bulk whitelist add: {e}")
+        raise HTTPException(status_code=500, detail="화이트리스트 대량 추가 중 오류가 발생했습니다.")
+
+@app.post("/api/admin/whitelist/bulk-remove")
+async def bulk_remove_whitelist(request: Request):
+    """화이트리스트 대량 제거 (500건 단위 batched write)"""
+    entries = await parse_whitelist_bulk_body(request)
+    
+    try:
+        existing = await whitelist_docs_by_email()
+        results = []
+        to_remove = []  # (결과 항목, 문서 ID 목록)
+        seen = set()
+        for entry in entries:
+            raw_email = str(entry.get('email') or '').strip()
+            email = normalize_email(raw_email)
+            result = {'email': raw_email}
+            results.append(result)
+            if not email or '@' not in email:
+                result['status'] = 'invalid'
+            elif email in seen:
+                result['status'] = 'duplicate'
+            elif email not in existing:
+                result['status'] = 'not_found'
+            else:
+                seen.add(email)
+                to_remove.append((result, [doc['id'] for doc in existing[email]]))
+        
+        # 한 batch에 500건을 넘지 않도록 이메일 단위로 묶음 (같은 이메일의 문서는 같은 batch)
+        chunks, chunk, writes = [], [], 0
+        for item in to_remove:
+            if chunk and writes + len(item[1]) > WHITELIST_BATCH_LIMIT:
+                chunks.append(chunk)
+                chunk, writes = [], 0
+            chunk.append(item)
+            writes += len(item[1])
+        if chunk:
+            chunks.append(chunk)
+        
+        for chunk in chunks:
+            batch = db.batch()
+            for _, doc_ids in chunk:
+                for doc_id in doc_ids:
+                    batch.delete(db.collection('whitelist').document(doc_id))
+            try:
+                await batch.commit()
+            except Exception as e:
+                logger.error(f"Whitelist bulk remove batch failed ({len(chunk)} emails): {e}")
+                for result, _ in chunk:
+                    result.update({'status': 'failed', 'error': str(e)})
+                continue
+            for result, doc_ids in chunk:
+                result['status'] = 'removed'
+                for doc_id in doc_ids:
+                    whitelist_index.record_delete(doc_id)
+        
+        summary = {status: 0 for status in ('removed', 'not_found', 'duplicate', 'invalid', 'failed')}
+        for result in results:
+            summary[result['status']] += 1
+        logger.info(f"Whitelist bulk remove: {summary}")
+        return {"success": summary['failed'] == 0, "summary": summary, "results": results}
+        
+    except Exception as e:
+        logger.error(f"Error in bulk whitelist remove: {e}")
+        raise HTTPException(status_code=500, detail="화이트리스트 대량 제거 중 오류가 발생했습니다.")
+
 @app.delete("/api/admin/whitelist/{email}")
 async def remove_whitelist(email: str):
     """화이트리스트에서 이메일 제거"""
     try:
-        # 해당 이메일의 화이트리스트 문서 찾기
-        whitelist_ref = db.collection('whitelist').where('email', '==', email)
-        docs = list(whitelist_ref.stream())
+        # 해당 이메일의 화이트리스트 문서 찾기 (정규화한 이메일로 비교)
+        docs = await whitelist_index.entries_for(email)
         
         if len(docs) == 0:
             raise HTTPException(status_code=404, detail="화이트리스트에서 찾을 수 없는 이메일입니다.")
         
         # 모든 매칭되는 문서 삭제 (중복 방지)
         for doc in docs:
-            doc.reference.delete()
+            await db.collection('whitelist').document(doc['id']).delete()
+            whitelist_index.record_delete(doc['id'])
         
         logger.info(f"Removed {email} from whitelist")
         return {"success": True, "message": f"{email}이 화이트리스트에서 제거되었습니다."}
@@ -1201,19 +1927,77 @@ class AgentUpdateRequest(BaseModel):
     color: Optional[str] = None
     icon: Optional[str] = None
 
+# 에이전트 목록 정렬 옵션 (firestore.indexes.json의 userId + 정렬 필드 복합 인덱스와 일치해야 함)
+AGENT_SORT_OPTIONS = {
+    'recent': ('createdAt', firestore.Query.DESCENDING),
+    'updated': ('updatedAt', firestore.Query.DESCENDING),
+    'name': ('name', firestore.Query.ASCENDING),
+}
+# fields 파라미터로 선택할 수 있는 필드 (Firestore projection)
+AGENT_FIELDS = {
+    'name', 'description', 'status', 'userId', 'createdAt', 'updatedAt', 'lastAccessedAt',
+    'totalRuns', 'successfulRuns', 'lastRunAt', 'tags', 'color', 'icon', 'finalPrompt'
+}
+DEFAULT_AGENT_PAGE_SIZE = 20
+MAX_AGENT_PAGE_SIZE = 100
+
 # 에이전트 관리 API
 @app.get("/api/agents")
-async def list_agents(user_id: str = Header(..., alias="X-User-Id")):
-    """사용자의 모든 에이전트 목록 조회"""
+async def list_agents(
+    user_id: str = Header(..., alias="X-User-Id"),
+    limit: int = DEFAULT_AGENT_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    sort: str = 'recent',
+    status: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """사용자의 에이전트 목록 조회 (cursor: 이전 페이지 nextCursor, fields: 쉼표로 구분한 반환 필드)"""
+    if sort not in AGENT_SORT_OPTIONS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort: {sort}")
+    selected = None
+    if fields:
+        selected = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown = [field for field in selected if field not in AGENT_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(unknown)}")
+    
     try:
-        agents_ref = db.collection('agents').where('userId', '==', user_id)
+        limit = max(1, min(limit, MAX_AGENT_PAGE_SIZE))
+        sort_field, direction = AGENT_SORT_OPTIONS[sort]
+        
+        query = db.collection('agents').where(filter=firestore.FieldFilter('userId', '==', user_id))
+        if status:
+            query = query.where(filter=firestore.FieldFilter('status', '==', status))
+        query = query.order_by(sort_field, direction=direction)
+        if selected:
+            query = query.select(selected)
+        
+        # 커서는 이전 페이지 마지막 에이전트 ID (정렬 값이 같아도 문서 ID로 이어서 조회)
+        if cursor:
+            cursor_doc = await db.collection('agents').document(cursor).get()
+            if not cursor_doc.exists or cursor_doc.to_dict().get('userId') != user_id:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.start_after(cursor_doc)
+        
+        docs = await collect(query.limit(limit + 1))
+        has_more = len(docs) > limit
         agents = []
-        for doc in agents_ref.stream():
+        for doc in docs[:limit]:
             agent_data = doc.to_dict()
             agent_data['id'] = doc.id
             agents.append(agent_data)
         
-        return agents
+        return {
+            'agents': agents,
+            'pagination': {
+                'limit': limit,
+                'sort': sort,
+                'hasMore': has_more,
+                'nextCursor': agents[-1]['id'] if has_more else None
+            }
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching agents for user {user_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch agents")
@@ -1240,7 +2024,11 @@ async def create_agent(agent_data: AgentCreateRequest, user_id: str = Header(...
             'finalPrompt': '',
         }
         
-        agent_ref.set(agent_doc)
+        # 에이전트 생성과 대시보드 집계 증가를 한 번에 커밋
+        batch = db.batch()
+        batch.set(agent_ref, agent_doc)
+        dashboard_stats.apply_delta(batch, user_id, agent_delta(None, agent_doc))
+        await batch.commit()
         agent_doc['id'] = agent_ref.id
         
         logger.info(f"Created agent {agent_ref.id} for user {user_id}")
@@ -1254,8 +2042,9 @@ async def create_agent(agent_data: AgentCreateRequest, user_id: str = Header(...
 async def get_agent(agent_id: str, user_id: str = Header(..., alias="X-User-Id")):
     """특정 에이전트 상세 정보 조회"""
     try:
+        # 권한 확인에 쓰는 문서이므로 캐시하지 않고 매번 읽음 (다른 Pod에서 삭제/변경된 에이전트로 인가하지 않도록)
         agent_ref = db.collection('agents').document(agent_id)
-        agent_doc = agent_ref.get()
+        agent_doc = await agent_ref.get()
         
         if not agent_doc.exists:
             raise HTTPException(status_code=404, detail="Agent not found")
@@ -1280,14 +2069,6 @@ async def update_agent(agent_id: str, agent_data: AgentUpdateRequest, user_id: s
     """에이전트 정보 업데이트"""
     try:
         agent_ref = db.collection('agents').document(agent_id)
-        agent_doc = agent_ref.get()
-        
-        if not agent_doc.exists:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
-        current_data = agent_doc.to_dict()
-        if current_data.get('userId') != user_id:
-            raise HTTPException(status_code=403, detail="Access denied")
         
         # 업데이트할 필드만 추출
         update_data = {}
@@ -1296,7 +2077,22 @@ async def update_agent(agent_id: str, agent_data: AgentUpdateRequest, user_id: s
         
         update_data['updatedAt'] = datetime.utcnow()
         
-        agent_ref.update(update_data)
+        # 상태 변경이 대시보드 집계에 반영되도록 읽기/수정/집계 갱신을 한 트랜잭션으로 처리
+        @async_transactional
+        async def apply_update(transaction):
+            agent_doc = await agent_ref.get(transaction=transaction)
+            
+            if not agent_doc.exists:
+                raise HTTPException(status_code=404, detail="Agent not found")
+            
+            current_data = agent_doc.to_dict()
+            if current_data.get('userId') != user_id:
+                raise HTTPException(status_code=403, detail="Access denied")
+            
+            transaction.update(agent_ref, update_data)
+            dashboard_stats.apply_delta(transaction, user_id, agent_delta(current_data, {**current_data, **update_data}))
+        
+        await apply_update(db.transaction())
         logger.info(f"Updated agent {agent_id} for user {user_id}")
         
         return {"message": "Agent updated successfully"}
@@ -1312,16 +2108,22 @@ async def delete_agent(agent_id: str, user_id: str = Header(..., alias="X-User-I
     """에이전트 삭제"""
     try:
         agent_ref = db.collection('agents').document(agent_id)
-        agent_doc = agent_ref.get()
         
-        if not agent_doc.exists:
-            raise HTTPException(status_code=404, detail="Agent not found")
-        
-        agent_data = agent_doc.to_dict()
-        if agent_data.get('userId') != user_id:
-            raise HTTPException(status_code=403, detail="Access denied")
+        @async_transactional
+        async def apply_delete(transaction):
+            agent_doc = await agent_ref.get(transaction=transaction)
+            
+            if not agent_doc.exists:
+                raise HTTPException(status_code=404, detail="Agent not found")
+            
+            agent_data = agent_doc.to_dict()
+            if agent_data.get('userId') != user_id:
+                raise HTTPException(status_code=403, detail="Access denied")
+            
+            transaction.delete(agent_ref)
+            dashboard_stats.apply_delta(transaction, user_id, agent_delta(agent_data, None))
         
-        agent_ref.delete()
+        await apply_delete(db.transaction())
         logger.info(f"Deleted agent {agent_id} for user {user_id}")
         
         return {"message": "Agent deleted successfully"}
@@ -1332,13 +2134,57 @@ async def delete_agent(agent_id: str, user_id: str = Header(..., alias="X-User-I
         logger.error(f"Error deleting agent {agent_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete agent")
 
+class AgentRunRequest(BaseModel):
+    success: bool
+
+@app.post("/api/agents/{agent_id}/runs")
+async def record_agent_run(agent_id: str, run: AgentRunRequest, user_id: str = Header(..., alias="X-User-Id")):
+    """에이전트 실행 결과 기록 (실행 횟수와 대시보드 집계 갱신)"""
+    try:
+        agent_ref = db.collection('agents').document(agent_id)
+        
+        @async_transactional
+        async def apply_run(transaction) -> dict:
+            agent_doc = await agent_ref.get(transaction=transaction)
+            
+            if not agent_doc.exists:
+                raise HTTPException(status_code=404, detail="Agent not found")
+            
+            agent_data = agent_doc.to_dict()
+            if agent_data.get('userId') != user_id:
+                raise HTTPException(status_code=403, detail="Access denied")
+            
+            now = datetime.utcnow()
+            update_data = {
+                'totalRuns': (agent_data.get('totalRuns') or 0) + 1,
+                'successfulRuns': (agent_data.get('successfulRuns') or 0) + (1 if run.success else 0),
+                'lastRunAt': now,
+                'updatedAt': now
+            }
+            transaction.update(agent_ref, update_data)
+            dashboard_stats.apply_delta(transaction, user_id, agent_delta(agent_data, {**agent_data, **update_data}))
+            return update_data
+        
+        update_data = await apply_run(db.transaction())
+        return {
+            'totalRuns': update_data['totalRuns'],
+            'successfulRuns': update_data['successfulRuns'],
+            'lastRunAt': update_data['lastRunAt']
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error recording run for agent {agent_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to record agent run")
+
 @app.post("/api/agents/{agent_id}/workspace")
 async def create_workspace(agent_id: str, user_id: str = Header(..., alias="X-User-Id")):
     """에이전트를 위한 워크스페이스 생성"""
     try:
-        # 에이전트 존재 확인
+        # 에이전트 존재/소유권 확인 (인가에 쓰므로 캐시하지 않고 매번 읽음)
         agent_ref = db.collection('agents').document(agent_id)
-        agent_doc = agent_ref.get()
+        agent_doc = await agent_ref.get()
         
         if not agent_doc.exists:
             raise HTTPException(status_code=404, detail="Agent not found")
@@ -1358,18 +2204,16 @@ async def create_workspace(agent_id: str, user_id: str = Header(..., alias="X-Us
             'status': 'active',
             'createdAt': datetime.utcnow(),
             'lastActivityAt': datetime.utcnow(),
-            'messages': [],
+            'messageCount': 0,  # 메시지는 messages 하위 컬렉션에 순번(seq)과 함께 저장
             'currentStep': 'planning',
             'progress': 0.0
         }
         
-        workspace_ref.set(workspace_data)
+        await workspace_ref.set(workspace_data)
+        session_cache.put(session_id, workspace_data)
         
-        # 에이전트 접근 시간 업데이트
-        agent_ref.update({
-            'lastAccessedAt': datetime.utcnow(),
-            'updatedAt': datetime.utcnow()
-        })
+        # 에이전트 접근 시간 업데이트 (주기마다 병합 저장)
+        activity_tracker.touch('agents', agent_id, 'lastAccessedAt', 'updatedAt')
         
         logger.info(f"Created workspace {session_id} for agent {agent_id}")
         
@@ -1401,7 +2245,7 @@ async def create_agent_session(user_id: str = Header(..., alias="X-User-Id")):
             'status': 'active',
             'createdAt': datetime.utcnow(),
             'lastActivityAt': datetime.utcnow(),
-            'messages': [],
+            'messageCount': 0,  # 메시지는 messages 하위 컬렉션에 순번(seq)과 함께 저장
             'agentConfig': {
                 'name': None,
                 'description': None,
@@ -1411,7 +2255,8 @@ async def create_agent_session(user_id: str = Header(..., alias="X-User-Id")):
             }
         }
         
-        workspace_ref.set(workspace_data)
+        await workspace_ref.set(workspace_data)
+        session_cache.put(session_id, workspace_data)
         
         logger.info(f"Created agent creation session {session_id} for user {user_id}")
         
@@ -1427,34 +2272,34 @@ async def create_agent_session(user_id: str = Header(..., alias="X-User-Id")):
         raise HTTPException(status_code=500, detail="Failed to create agent session")
 
 @app.get("/api/workspace/{session_id}/restore")
-async def restore_workspace(session_id: str):
-    """기존 워크스페이스 상태 복원 (대화 기록 포함)"""
+async def restore_workspace(session_id: str, limit: int = 50, before: Optional[int] = None):
+    """기존 워크스페이스 상태 복원 (대화 기록은 최신 limit개부터, before 순번 커서로 이전 페이지 조회)"""
     try:
         workspace_ref = db.collection('workspaces').document(session_id)
-        workspace_doc = workspace_ref.get()
+        workspace_doc = await workspace_ref.get()
         
         if not workspace_doc.exists:
             raise HTTPException(status_code=404, detail="Workspace not found")
         
         workspace_data = workspace_doc.to_dict()
         workspace_data['sessionId'] = session_id
+        # 이미 읽은 문서로 세션 메타데이터 캐시 갱신
+        session_cache.put(session_id, workspace_data)
+        
+        # 대화 기록 페이지 조회 (messages 하위 컬렉션, 시간순 정렬)
+        limit = max(1, min(limit, MAX_RESTORE_PAGE_SIZE))
+        messages, has_more = await message_store.load_page(session_id, workspace_data, limit, before)
+        workspace_data['messages'] = messages
+        workspace_data['pagination'] = {
+            'limit': limit,
+            'hasMore': has_more,
+            'nextCursor': messages[0]['seq'] if has_more and messages else None
+        }
+        logger.info(f"Restored {len(messages)} messages for session {session_id} (before={before}, has_more={has_more})")
         
-        # 대화 기록 정렬 (타임스탬프 기준)
-        messages = workspace_data.get('messages', [])
-        if messages:
-            try:
-                # 각 메시지의 timestamp를 기준으로 정렬
-                sorted_messages = sorted(messages, key=lambda x: x.get('timestamp', datetime.min))
-                workspace_data['messages'] = sorted_messages
-                logger.info(f"Restored {len(sorted_messages)} messages for session {session_id}")
-            except Exception as sort_error:
-                logger.warning(f"Error sorting messages for session {session_id}: {sort_error}")
-                # 정렬 실패해도 원래 메시지는 유지
-        
-        # 마지막 활동 시간 업데이트
-        workspace_ref.update({
-            'lastActivityAt': datetime.utcnow()
-        })
+        # 마지막 활동 시간 업데이트 (첫 페이지 조회 시에만, 주기마다 병합 저장)
+        if before is None:
+            activity_tracker.touch('workspaces', session_id, 'lastActivityAt')
         
         return workspace_data
         
@@ -1466,25 +2311,9 @@ async def restore_workspace(session_id: str):
 
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats(user_id: str = Header(..., alias="X-User-Id")):
-    """대시보드 요약 통계"""
+    """대시보드 요약 통계 (사용자별 집계 문서)"""
     try:
-        agents_ref = db.collection('agents').where('userId', '==', user_id)
-        agents = []
-        for doc in agents_ref.stream():
-            agents.append(doc.to_dict())
-        
-        total_agents = len(agents)
-        active_agents = len([a for a in agents if a.get('status') == 'active'])
-        total_runs = sum(a.get('totalRuns', 0) for a in agents)
-        successful_runs = sum(a.get('successfulRuns', 0) for a in agents)
-        success_rate = round((successful_runs / total_runs) * 100) if total_runs > 0 else 0
-        
-        return {
-            'totalAgents': total_agents,
-            'activeAgents': active_agents,
-            'totalRuns': total_runs,
-            'successRate': f"{success_rate}%"
-        }
+        return format_stats(await dashboard_stats.get(user_id))
         
     except Exception as e:
         logger.error(f"Error fetching dashboard stats for user {user_id}: {e}")
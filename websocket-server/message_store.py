@@ -0,0 +1,127 @@
+"""
+워크스페이스 메시지 저장소
+메시지를 `workspaces/{session_id}/messages/{seq}` 하위 컬렉션에 문서 단위로 저장하고,
+워크스페이스 문서의 `messageCount` 카운터를 트랜잭션으로 증가시켜 단조 증가 순번(seq)을 부여
+(마이그레이션 전 `messages` 배열 필드에 남아 있는 기존 메시지는 1..N 순번으로 취급)
+"""
+
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+import google.cloud.firestore as firestore
+
+from activity_tracker import activity_tracker
+from database import db, async_transactional
+
+logger = logging.getLogger(__name__)
+
+MESSAGES_SUBCOLLECTION = 'messages'
+# 트랜잭션 하나에 넣을 수 있는 최대 쓰기 수 (카운터 갱신 1건 포함)
+MAX_MESSAGES_PER_TRANSACTION = 499
+# 복원 API 한 페이지 최대 메시지 수
+MAX_PAGE_SIZE = 200
+
+
+def message_doc_id(seq: int) -> str:
+    """순번으로 정렬되는 메시지 문서 ID (같은 순번은 같은 문서 - 재시도해도 중복 생성 없음)"""
+    return f"{seq:010d}"
+
+
+def legacy_messages(workspace_data: dict) -> List[dict]:
+    """마이그레이션 전 배열 필드의 메시지를 시간순 정렬 후 1부터 순번 부여"""
+    messages = workspace_data.get('messages') or []
+    try:
+        messages = sorted(messages, key=lambda x: x.get('timestamp') or datetime.min)
+    except TypeError:
+        pass  # 타임스탬프 형식이 섞여 있으면 저장 순서 유지
+    return [{**message, 'seq': index + 1} for index, message in enumerate(messages)]
+
+
+def current_count(workspace_data: Optional[dict]) -> int:
+    """지금까지 부여한 마지막 순번 (카운터가 없으면 배열 필드의 메시지 수)"""
+    if not workspace_data:
+        return 0
+    count = workspace_data.get('messageCount')
+    if count is None:
+        count = len(workspace_data.get('messages') or [])
+    return count
+
+
+class MessageStore:
+    """하위 컬렉션 기반 메시지 저장/페이지 조회"""
+
+    @staticmethod
+    def workspace_ref(session_id: str):
+        return db.collection('workspaces').document(session_id)
+
+    def messages_ref(self, session_id: str):
+        return self.workspace_ref(session_id).collection(MESSAGES_SUBCOLLECTION)
+
+    async def append(self, session_id: str, user_id: str, messages: List[dict], last_activity: datetime,
+                     agent_id: Optional[str] = None) -> int:
+        """메시지 추가 - 순번 할당과 저장을 트랜잭션으로 처리, 마지막 순번 반환"""
+        last_seq = 0
+        for start in range(0, len(messages), MAX_MESSAGES_PER_TRANSACTION):
+            chunk = messages[start:start + MAX_MESSAGES_PER_TRANSACTION]
+            last_seq = await self._append_chunk(session_id, user_id, chunk, last_activity, agent_id)
+        return last_seq
+
+    async def _append_chunk(self, session_id: str, user_id: str, messages: List[dict], last_activity: datetime,
+                            agent_id: Optional[str]) -> int:
+        workspace_ref = self.workspace_ref(session_id)
+        messages_ref = self.messages_ref(session_id)
+
+        @async_transactional
+        async def run(transaction) -> int:
+            snapshot = await workspace_ref.get(transaction=transaction)
+            seq = current_count(snapshot.to_dict() if snapshot.exists else None)
+
+            for message in messages:
+                seq += 1
+                transaction.set(messages_ref.document(message_doc_id(seq)), {**message, 'seq': seq})
+
+            # 문서가 없으면 merge로 생성 (기존 필드는 유지)
+            workspace_update = {
+                'sessionId': session_id,
+                'userId': user_id,
+                'messageCount': seq,
+                'lastActivityAt': last_activity,
+            }
+            if not snapshot.exists:
+                # 기본/지연 생성 세션도 복원/목록/대시보드가 읽는 필드를 갖도록 기본값 설정
+                workspace_update.update({
+                    'agentId': agent_id,
+                    'status': 'active',
+                    'createdAt': datetime.utcnow(),
+                    'context': 'workspace',
+                })
+            transaction.set(workspace_ref, workspace_update, merge=True)
+            return seq
+
+        last_seq = await run(db.transaction())
+        # 더 최근 lastActivityAt을 저장했으므로 대기 중인 이전 시각은 쓰지 않음
+        activity_tracker.supersede('workspaces', session_id, 'lastActivityAt', last_activity)
+        return last_seq
+
+    async def load_page(self, session_id: str, workspace_data: dict, limit: int, before: Optional[int] = None) -> Tuple[List[dict], bool]:
+        """최신 메시지부터 limit개 조회 (before 순번 미만), 시간순으로 정렬된 메시지와 이전 메시지 존재 여부 반환"""
+        query = self.messages_ref(session_id).order_by('seq', direction=firestore.Query.DESCENDING)
+        if before is not None:
+            query = query.where(filter=firestore.FieldFilter('seq', '<', before))
+        newest_first = [doc.to_dict() async for doc in query.limit(limit + 1).stream()]
+
+        # 하위 컬렉션에서 모자라면 아직 마이그레이션되지 않은 배열 필드 메시지로 채움
+        if len(newest_first) <= limit and workspace_data.get('messages'):
+            lower = newest_first[-1]['seq'] if newest_first else (before if before is not None else float('inf'))
+            older = [message for message in legacy_messages(workspace_data) if message['seq'] < lower]
+            newest_first.extend(reversed(older[-(limit + 1 - len(newest_first)):]))
+
+        has_more = len(newest_first) > limit
+        page = newest_first[:limit]
+        page.reverse()
+        return page, has_more
+
+
+# 싱글톤
+message_store = MessageStore()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+베타 신청 문서 ID 마이그레이션
+자동 생성 ID로 저장된 `beta_applications` 문서를 정규화한 이메일 해시 ID 문서로 옮깁니다.
+같은 이메일의 해시 ID 문서가 이미 있으면 중복으로 출력만 하고 그대로 둡니다.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auth import BETA_APPLICATIONS_COLLECTION, beta_application_id, normalize_email
+from database import db, collect, async_transactional
+
+
+async def migrate_application(snapshot, dry_run: bool) -> str:
+    """신청 문서 하나 마이그레이션 - 결과(migrated/skipped/duplicate/invalid) 반환"""
+    data = snapshot.to_dict() or {}
+    email = data.get('email')
+    if not email:
+        return 'invalid'
+    target_id = beta_application_id(email)
+    if snapshot.id == target_id:
+        return 'skipped'
+
+    collection = db.collection(BETA_APPLICATIONS_COLLECTION)
+    target_ref = collection.document(target_id)
+    if dry_run:
+        return 'duplicate' if (await target_ref.get()).exists else 'migrated'
+
+    @async_transactional
+    async def move(transaction) -> str:
+        target = await target_ref.get(transaction=transaction)
+        if target.exists:
+            return 'duplicate'
+        transaction.create(target_ref, {**data, 'email_normalized': normalize_email(email)})
+        transaction.delete(snapshot.reference)
+        return 'migrated'
+
+    return await move(db.transaction())
+
+
+async def run_migration(args) -> dict:
+    results = {'scanned': 0, 'migrated': 0, 'skipped': 0, 'duplicate': 0, 'invalid': 0, 'failed': 0}
+
+    for snapshot in await collect(db.collection(BETA_APPLICATIONS_COLLECTION)):
+        results['scanned'] += 1
+        try:
+            result = await migrate_application(snapshot, args.dry_run)
+        except Exception as e:
+            print(f"  [failed] {snapshot.id}: {e}")
+            results['failed'] += 1
+            continue
+        results[result] += 1
+        if result != 'skipped':
+            print(f"  [{result}] {snapshot.id}: {(snapshot.to_dict() or {}).get('email')}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="베타 신청 문서 ID → 이메일 해시 ID 마이그레이션")
+    parser.add_argument('--dry-run', action='store_true', help="쓰기 없이 대상만 출력")
+    args = parser.parse_args()
+
+    print("베타 신청 문서 ID 마이그레이션" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 50)
+    results = asyncio.run(run_migration(args))
+    print()
+    for key, value in results.items():
+        print(f"  {key:<10} {value}")
+
+
+if __name__ == "__main__":
+    main()
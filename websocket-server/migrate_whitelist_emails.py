@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+화이트리스트 이메일 정규화 마이그레이션
+`whitelist` 문서의 `email` 필드를 정규화한 값(앞뒤 공백 제거, 소문자)으로 바꿉니다.
+화이트리스트 조회/추가/제거가 정규화한 이메일로 비교하므로, 대소문자가 섞여 저장된 기존 문서를 한 번 변환합니다.
+같은 이메일의 문서가 여러 개가 되면 중복으로 출력만 하고 그대로 둡니다 (제거 시에는 모두 함께 삭제).
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from auth import normalize_email
+from database import db, collect
+
+COLLECTION = 'whitelist'
+# Firestore batched write 한 번에 넣을 수 있는 최대 쓰기 수
+BATCH_LIMIT = 500
+
+
+async def run_migration(args) -> dict:
+    results = {'scanned': 0, 'migrated': 0, 'skipped': 0, 'duplicate': 0, 'invalid': 0, 'failed': 0}
+
+    updates = []  # (문서 참조, 정규화한 이메일)
+    doc_ids_by_email = {}
+    for snapshot in await collect(db.collection(COLLECTION)):
+        results['scanned'] += 1
+        email = (snapshot.to_dict() or {}).get('email')
+        if not email:
+            results['invalid'] += 1
+            continue
+        normalized = normalize_email(email)
+        doc_ids_by_email.setdefault(normalized, []).append(snapshot.id)
+        if email == normalized:
+            results['skipped'] += 1
+            continue
+        updates.append((snapshot.reference, normalized))
+        print(f"  [migrate] {snapshot.id}: {email!r} -> {normalized}")
+
+    for email, doc_ids in doc_ids_by_email.items():
+        if len(doc_ids) > 1:
+            results['duplicate'] += 1
+            print(f"  [duplicate] {email}: {', '.join(doc_ids)}")
+
+    if args.dry_run:
+        results['migrated'] = len(updates)
+        return results
+
+    for start in range(0, len(updates), BATCH_LIMIT):
+        chunk = updates[start:start + BATCH_LIMIT]
+        batch = db.batch()
+        for doc_ref, normalized in chunk:
+            batch.update(doc_ref, {'email': normalized})
+        try:
+            await batch.commit()
+            results['migrated'] += len(chunk)
+        except Exception as e:
+            print(f"  [failed] batch of {len(chunk)}: {e}")
+            results['failed'] += len(chunk)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="화이트리스트 이메일 정규화 마이그레이션")
+    parser.add_argument('--dry-run', action='store_true', help="쓰기 없이 대상만 출력")
+    args = parser.parse_args()
+
+    print("화이트리스트 이메일 정규화 마이그레이션" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 50)
+    results = asyncio.run(run_migration(args))
+    print()
+    for key, value in results.items():
+        print(f"  {key:<10} {value}")
+
+
+if __name__ == "__main__":
+    main()
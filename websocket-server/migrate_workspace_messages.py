@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+워크스페이스 메시지 마이그레이션
+`workspaces/{session_id}` 문서의 `messages` 배열 필드를 `messages` 하위 컬렉션 문서(seq 1..N)로 옮기고,
+`messageCount` 카운터를 설정한 뒤 배열 필드를 삭제합니다.
+하위 컬렉션 문서 ID가 순번으로 정해지므로 중간에 실패해도 다시 실행하면 이어서 처리됩니다.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import google.cloud.firestore as firestore
+
+from database import db, async_transactional
+from message_store import current_count, legacy_messages, message_doc_id, message_store
+
+# batched write 한 번에 넣을 수 있는 최대 쓰기 수
+BATCH_LIMIT = 500
+
+
+async def migrate_workspace(session_id: str, workspace_data: dict, dry_run: bool, keep_array: bool) -> str:
+    """워크스페이스 하나 마이그레이션 - 결과(migrated/skipped/changed) 반환"""
+    messages = legacy_messages(workspace_data)
+    if not messages:
+        return 'skipped'
+    if dry_run:
+        return 'migrated'
+
+    # 1) 하위 컬렉션에 메시지 기록 (같은 순번은 같은 문서 ID라 재실행해도 중복 없음)
+    messages_ref = message_store.messages_ref(session_id)
+    for start in range(0, len(messages), BATCH_LIMIT):
+        batch = db.batch()
+        for message in messages[start:start + BATCH_LIMIT]:
+            batch.set(messages_ref.document(message_doc_id(message['seq'])), message)
+        await batch.commit()
+
+    if keep_array:
+        return 'migrated'
+
+    # 2) 배열이 그사이 바뀌지 않았으면 카운터 설정 후 배열 필드 삭제
+    workspace_ref = message_store.workspace_ref(session_id)
+
+    @async_transactional
+    async def finish(transaction) -> bool:
+        snapshot = await workspace_ref.get(transaction=transaction)
+        data = snapshot.to_dict() or {}
+        if len(data.get('messages') or []) != len(messages):
+            return False
+        transaction.update(workspace_ref, {
+            'messageCount': current_count(data),
+            'messages': firestore.DELETE_FIELD,
+        })
+        return True
+
+    return 'migrated' if await finish(db.transaction()) else 'changed'
+
+
+async def run_migration(args) -> dict:
+    results = {'scanned': 0, 'migrated': 0, 'skipped': 0, 'changed': 0, 'failed': 0, 'messages': 0}
+
+    async def handle(snapshot):
+        results['scanned'] += 1
+        data = snapshot.to_dict() or {}
+        try:
+            result = await migrate_workspace(snapshot.id, data, args.dry_run, args.keep_array)
+        except Exception as e:
+            print(f"  [failed] {snapshot.id}: {e}")
+            results['failed'] += 1
+            return
+        results[result] += 1
+        if result == 'migrated':
+            results['messages'] += len(data.get('messages') or [])
+            print(f"  [migrated] {snapshot.id}: {len(data.get('messages') or [])} messages")
+        elif result == 'changed':
+            print(f"  [changed] {snapshot.id}: messages changed during migration, run again")
+
+    if args.session:
+        snapshot = await db.collection('workspaces').document(args.session).get()
+        if snapshot.exists:
+            await handle(snapshot)
+        return results
+
+    # 문서 ID 순으로 페이지 단위 스캔
+    last = None
+    while True:
+        query = db.collection('workspaces').order_by('__name__').limit(args.page_size)
+        if last is not None:
+            query = query.start_after(last)
+        page = [snapshot async for snapshot in query.stream()]
+        if not page:
+            break
+        for snapshot in page:
+            await handle(snapshot)
+        last = page[-1]
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="워크스페이스 messages 배열 → 하위 컬렉션 마이그레이션")
+    parser.add_argument('--session', help="특정 세션만 마이그레이션")
+    parser.add_argument('--page-size', type=int, default=100, help="한 번에 스캔할 워크스페이스 수")
+    parser.add_argument('--dry-run', action='store_true', help="쓰기 없이 대상만 출력")
+    parser.add_argument('--keep-array', action='store_true', help="하위 컬렉션만 채우고 배열 필드는 유지")
+    args = parser.parse_args()
+
+    print("워크스페이스 메시지 마이그레이션" + (" (dry run)" if args.dry_run else ""))
+    print("=" * 50)
+    results = asyncio.run(run_migration(args))
+    print()
+    for key, value in results.items():
+        print(f"  {key:<10} {value}")
+
+
+if __name__ == "__main__":
+    main()
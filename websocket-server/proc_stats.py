@@ -0,0 +1,79 @@
+"""
+/proc 기반 프로세스 리소스 조회 헬퍼 (Linux 전용, 실패 시 0/빈 값 반환)
+"""
+
+import os
+from typing import Dict, List
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+
+
+def read_rss_bytes(pid: int) -> int:
+    """프로세스 RSS (바이트)"""
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def children_map() -> Dict[int, List[int]]:
+    """ppid -> 자식 pid 목록 (여러 프로세스 트리를 조회할 때 한 번만 만들어 재사용)"""
+    children: Dict[int, List[int]] = {}
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return children
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                stat = f.read()
+            # comm에 공백/괄호가 있을 수 있으므로 마지막 ')' 이후부터 파싱
+            ppid = int(stat[stat.rindex(')') + 2:].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def process_tree_pids(root_pid: int, children: Dict[int, List[int]] = None) -> List[int]:
+    """root_pid와 모든 하위 프로세스 pid"""
+    if children is None:
+        children = children_map()
+
+    pids = []
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def process_tree_rss(root_pid: int, children: Dict[int, List[int]] = None) -> int:
+    """root_pid와 하위 프로세스 RSS 합계 (바이트)"""
+    return sum(read_rss_bytes(pid) for pid in process_tree_pids(root_pid, children))
+
+
+def read_cpu_seconds(pid: int) -> float:
+    """프로세스 누적 CPU 시간 (user + system, 초)"""
+    try:
+        with open(f'/proc/{pid}/stat', 'r') as f:
+            stat = f.read()
+        fields = stat[stat.rindex(')') + 2:].split()
+        # utime, stime = stat 14, 15번째 필드 (')' 이후 기준 11, 12번째)
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def count_open_fds(pid: int) -> int:
+    """열린 파일 디스크립터 수"""
+    try:
+        return len(os.listdir(f'/proc/{pid}/fd'))
+    except OSError:
+        return 0
@@ -0,0 +1,268 @@
+"""
+Claude CLI 프로세스 리소스 모니터
+ClaudeCodeProcess가 띄운 프로세스별 PID/RSS/CPU 시간/열린 fd/실행 시간을 /proc에서 샘플링하고,
+생성 시 rlimit(주소 공간, CPU 시간, fd 수)을 적용하며 RSS(하위 프로세스 포함) 한도를 넘는 프로세스를 종료
+(여러 턴을 처리하는 장기 실행 프로세스는 CPU rlimit 대신 샘플링으로 턴별 CPU 시간을 검사)
+"""
+
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import Dict, List, Optional, Set
+
+from proc_stats import children_map, count_open_fds, process_tree_pids, process_tree_rss, read_cpu_seconds
+
+try:
+    import resource
+except ImportError:  # Linux 외 환경
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+# 여러 턴을 처리하는 프로세스 종류 - 누적 CPU 시간이 아니라 턴별 CPU 시간으로 한도 검사
+LONG_LIVED_KINDS = ('persistent', 'legacy')
+
+
+class ResourceLimitExceeded(Exception):
+    """프로세스가 리소스 한도를 넘어 종료된 경우"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class _TrackedProcess:
+    def __init__(self, process: asyncio.subprocess.Process, kind: str, user_id: Optional[str], session_id: Optional[str]):
+        self.process = process
+        self.kind = kind  # pool | turn | persistent | legacy
+        self.user_id = user_id
+        self.session_id = session_id
+        self.started_at = time.monotonic()
+        self.sample: dict = {}
+        self.turn_cpu_start: Optional[float] = None  # 진행 중인 턴 시작 시점의 CPU 시간
+        self.kill_reason: Optional[str] = None  # 모니터가 종료시킨 사유
+        self.exit_seen = False  # 샘플링에서 종료를 확인했는지 (소유자가 사유를 조회할 시간을 한 주기 남김)
+
+
+class ProcessMonitor:
+    """생성된 CLI 프로세스 추적 + rlimit 적용 + 한도 초과 프로세스 종료"""
+
+    # 종료 시그널 → 한도 사유 (커널 rlimit에 의해 종료된 경우)
+    SIGNAL_REASONS = {
+        signal.SIGXCPU: 'cpu_time',
+        signal.SIGXFSZ: 'file_size',
+    }
+
+    def __init__(self):
+        self.interval = float(os.getenv('PROCESS_MONITOR_INTERVAL', '5'))  # 초
+        # rlimit (0이면 미적용) - Node(V8)는 큰 가상 주소 공간을 예약하므로 주소 공간 한도는 기본 미적용
+        self.limit_as = int(os.getenv('CLAUDE_RLIMIT_AS_MB', '0')) * MB
+        self.limit_cpu = int(os.getenv('CLAUDE_RLIMIT_CPU_SECONDS', '300'))  # 턴당 CPU 시간
+        self.limit_nofile = int(os.getenv('CLAUDE_RLIMIT_NOFILE', '1024'))
+        # 샘플링으로 검사하는 RSS 한도 (0이면 미적용)
+        self.max_rss = int(os.getenv('CLAUDE_MAX_RSS_MB', '1024')) * MB
+
+        self._tracked: Dict[int, _TrackedProcess] = {}
+        self._task: Optional[asyncio.Task] = None
+        # 종료 유예 시간 동안 샘플링이 멈추지 않도록 종료 처리는 별도 태스크로 실행
+        self._kill_tasks: Set[asyncio.Task] = set()
+
+        self.stats = {
+            'tracked_total': 0,
+            'killed': 0,
+            'limit_errors': 0,
+        }
+
+    def register(self, process: asyncio.subprocess.Process, kind: str, user_id: str = None, session_id: str = None):
+        """생성 직후 호출 - rlimit 적용 및 추적 시작"""
+        self.apply_limits(process.pid, cpu=kind not in LONG_LIVED_KINDS)
+        self._tracked[process.pid] = _TrackedProcess(process, kind, user_id, session_id)
+        self.stats['tracked_total'] += 1
+
+    def assign(self, process: asyncio.subprocess.Process, kind: str, user_id: str, session_id: str):
+        """풀 워커를 체크아웃한 세션으로 귀속"""
+        tracked = self._tracked.get(process.pid)
+        if not tracked:
+            self.register(process, kind, user_id, session_id)
+            return
+        tracked.kind = kind
+        tracked.user_id = user_id
+        tracked.session_id = session_id
+        tracked.started_at = time.monotonic()
+
+    def apply_limits(self, pid: int, cpu: bool = True):
+        """prlimit으로 rlimit 적용 (preexec_fn 없이 생성 직후 적용, RLIMIT_CPU는 프로세스 전체 누적이므로 한 턴만 처리하는 프로세스에만 적용)"""
+        if resource is None or not hasattr(resource, 'prlimit'):
+            return
+        limits = [
+            (resource.RLIMIT_AS, self.limit_as),
+            (resource.RLIMIT_CPU, self.limit_cpu if cpu else 0),
+            (resource.RLIMIT_NOFILE, self.limit_nofile),
+        ]
+        for limit, value in limits:
+            if value <= 0:
+                continue
+            try:
+                # CPU는 soft 한도에서 SIGXCPU, hard 한도(+5초)에서 SIGKILL
+                hard = value + 5 if limit == resource.RLIMIT_CPU else value
+                resource.prlimit(pid, limit, (value, hard))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to apply rlimit {limit} to pid {pid}: {e}")
+
+    def begin_turn(self, process: asyncio.subprocess.Process):
+        """장기 실행 프로세스에 턴을 보낸 직후 호출 - 이 시점부터의 CPU 시간을 턴 한도로 검사"""
+        tracked = self._tracked.get(process.pid)
+        if tracked:
+            tracked.turn_cpu_start = read_cpu_seconds(process.pid)
+
+    def end_turn(self, process: asyncio.subprocess.Process):
+        tracked = self._tracked.get(process.pid)
+        if tracked:
+            tracked.turn_cpu_start = None
+
+    def exit_reason(self, process: asyncio.subprocess.Process) -> Optional[str]:
+        """종료된 프로세스가 리소스 한도 때문에 종료되었는지 확인 (사유 반환)"""
+        tracked = self._tracked.get(process.pid)
+        if tracked and tracked.process is process:
+            del self._tracked[process.pid]
+            if tracked.kill_reason:
+                return tracked.kill_reason
+        if process.returncode is not None and process.returncode < 0:
+            return self.SIGNAL_REASONS.get(-process.returncode)
+        return None
+
+    def check_exit(self, process: asyncio.subprocess.Process):
+        """한도 초과로 종료된 경우 ResourceLimitExceeded 발생"""
+        reason = self.exit_reason(process)
+        if reason:
+            self.stats['limit_errors'] += 1
+            raise ResourceLimitExceeded(reason)
+
+    def start(self):
+        if self._task:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Process monitor started (interval={self.interval}s, max_rss={self.max_rss // MB}MB, "
+                    f"cpu={self.limit_cpu}s, nofile={self.limit_nofile})")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # 종료 중인 프로세스는 끝까지 정리
+        if self._kill_tasks:
+            await asyncio.gather(*self._kill_tasks, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sample_once()
+            except Exception as e:
+                logger.error(f"Process monitor error: {e}")
+
+    async def sample_once(self):
+        """추적 중인 프로세스 샘플링 + 한도 초과 프로세스 종료 (종료는 기다리지 않고 백그라운드로 진행)"""
+        children = children_map()
+        for pid, tracked in list(self._tracked.items()):
+            if tracked.process.returncode is not None:
+                # 소유자가 exit_reason을 조회하지 않고 끝난 프로세스는 다음 주기에 정리
+                if tracked.exit_seen:
+                    self._tracked.pop(pid, None)
+                tracked.exit_seen = True
+                continue
+
+            tracked.sample = self._sample(tracked, children)
+            if tracked.kill_reason:
+                continue  # 이미 종료 중
+            if self.max_rss and tracked.sample['rss_bytes'] > self.max_rss:
+                self._start_kill(tracked, 'memory', children)
+            elif self._turn_cpu_exceeded(tracked):
+                self._start_kill(tracked, 'cpu_time', children)
+
+    def _turn_cpu_exceeded(self, tracked: _TrackedProcess) -> bool:
+        """장기 실행 프로세스의 진행 중인 턴이 CPU 한도를 넘었는지 확인"""
+        if not self.limit_cpu or tracked.kind not in LONG_LIVED_KINDS or tracked.turn_cpu_start is None:
+            return False
+        return tracked.sample['cpu_seconds'] - tracked.turn_cpu_start > self.limit_cpu
+
+    def _sample(self, tracked: _TrackedProcess, children: Dict[int, List[int]]) -> dict:
+        pid = tracked.process.pid
+        return {
+            'rss_bytes': process_tree_rss(pid, children),  # CLI가 띄운 하위 프로세스 메모리 포함
+            'cpu_seconds': read_cpu_seconds(pid),
+            'open_fds': count_open_fds(pid),
+            'wall_seconds': time.monotonic() - tracked.started_at,
+        }
+
+    def _start_kill(self, tracked: _TrackedProcess, reason: str, children: Dict[int, List[int]]):
+        tracked.kill_reason = reason
+        self.stats['killed'] += 1
+        task = asyncio.create_task(self._kill(tracked, reason, process_tree_pids(tracked.process.pid, children)[1:]))
+        self._kill_tasks.add(task)
+        task.add_done_callback(self._kill_tasks.discard)
+
+    async def _kill(self, tracked: _TrackedProcess, reason: str, descendants: List[int]):
+        """SIGTERM 후 5초 내 종료되지 않으면 SIGKILL, 남은 하위 프로세스도 SIGKILL"""
+        pid = tracked.process.pid
+        logger.warning(f"Killing Claude process {pid} (session: {tracked.session_id}, reason: {reason}, "
+                       f"rss={tracked.sample.get('rss_bytes', 0) // MB}MB, cpu={tracked.sample.get('cpu_seconds', 0):.1f}s)")
+        try:
+            tracked.process.terminate()
+            await asyncio.wait_for(tracked.process.wait(), timeout=5.0)
+        except asyncio.TimeoutError:
+            tracked.process.kill()
+        except ProcessLookupError:
+            pass
+        for child_pid in descendants:
+            try:
+                os.kill(child_pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):
+                pass
+
+    def list_processes(self) -> List[dict]:
+        """관리자용 - 살아 있는 프로세스별 리소스 사용량 (즉시 샘플링)"""
+        processes = []
+        children = children_map()
+        for pid, tracked in list(self._tracked.items()):
+            if tracked.process.returncode is not None:
+                continue
+            sample = self._sample(tracked, children)
+            processes.append({
+                'pid': pid,
+                'kind': tracked.kind,
+                'user_id': tracked.user_id,
+                'session_id': tracked.session_id,
+                'rss_mb': round(sample['rss_bytes'] / MB, 1),
+                'cpu_seconds': round(sample['cpu_seconds'], 2),
+                'open_fds': sample['open_fds'],
+                'wall_seconds': round(sample['wall_seconds'], 1),
+            })
+        return processes
+
+    def get_limits(self) -> dict:
+        return {
+            'rlimit_as_mb': self.limit_as // MB,
+            'rlimit_cpu_seconds': self.limit_cpu,
+            'rlimit_nofile': self.limit_nofile,
+            'max_rss_mb': self.max_rss // MB,
+        }
+
+    def get_stats(self) -> dict:
+        return {
+            'tracked': len(self._tracked),
+            **self.stats,
+            'limits': self.get_limits(),
+        }
+
+
+# 싱글톤
+process_monitor = ProcessMonitor()
@@ -0,0 +1,188 @@
+"""
+Claude 응답 캐시
+같은 프롬프트(정규화된 메시지 + 컨텍스트 + 시스템 프롬프트)에 대한 CLI 호출을 줄이기 위한 LRU + TTL 캐시
+선택적으로 /tmp/workspace-data 볼륨에 디스크 계층을 두어 Pod 재시작 후에도 유지
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """반복 프롬프트 응답 캐시 (컨텍스트별 opt-in)"""
+
+    def __init__(self):
+        # 캐시를 사용할 컨텍스트 목록 (예: "agent-create,workspace"), 비어 있으면 비활성
+        self.contexts = {c.strip() for c in os.getenv('RESPONSE_CACHE_CONTEXTS', '').split(',') if c.strip()}
+        self.ttl = float(os.getenv('RESPONSE_CACHE_TTL', '3600'))  # 초
+        self.max_entries = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '512'))
+        self.max_bytes = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', str(8 * 1024 * 1024)))
+        self.max_disk_entries = int(os.getenv('RESPONSE_CACHE_DISK_MAX_ENTRIES', '5000'))
+
+        # 디스크 계층 경로 (예: /tmp/workspace-data/response-cache), 비어 있으면 메모리만 사용
+        disk_dir = os.getenv('RESPONSE_CACHE_DIR', '')
+        self.disk_dir: Optional[Path] = Path(disk_dir) if disk_dir else None
+
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()  # key -> (응답, 만료 시각, 크기)
+        self._bytes = 0
+        self._disk_writes = 0
+
+        self.stats = {
+            'hits': 0,
+            'disk_hits': 0,
+            'misses': 0,
+            'stores': 0,
+            'evictions': 0,
+            'expired': 0,
+        }
+
+    def is_enabled(self, context: str) -> bool:
+        return context in self.contexts
+
+    @staticmethod
+    def normalize(message: str) -> str:
+        """캐시 키용 메시지 정규화 (유니코드 NFC, 공백 압축, 소문자)"""
+        message = unicodedata.normalize('NFC', message)
+        return re.sub(r'\s+', ' ', message).strip().lower()
+
+    @classmethod
+    def make_key(cls, message: str, context: str, system_prompt: str = "") -> str:
+        system_hash = hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()
+        raw = f"{context}\0{system_hash}\0{cls.normalize(message)}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """캐시 조회 (메모리 → 디스크 순, 디스크 적중 시 메모리로 승격)"""
+        entry = self._entries.get(key)
+        if entry:
+            response, expires_at, _ = entry
+            if expires_at > time.time():
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return response
+            self._remove(key)
+            self.stats['expired'] += 1
+
+        if self.disk_dir:
+            cached = await asyncio.to_thread(self._read_disk, key)
+            if cached:
+                response, expires_at = cached
+                self._store_memory(key, response, expires_at)
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                return response
+
+        self.stats['misses'] += 1
+        return None
+
+    async def set(self, key: str, response: str):
+        """응답 저장 (메모리 + 디스크 계층)"""
+        expires_at = time.time() + self.ttl
+        self._store_memory(key, response, expires_at)
+        self.stats['stores'] += 1
+
+        if self.disk_dir:
+            try:
+                await asyncio.to_thread(self._write_disk, key, response, expires_at)
+            except Exception as e:
+                logger.warning(f"Failed to write response cache entry to disk: {e}")
+
+    def _store_memory(self, key: str, response: str, expires_at: float):
+        if key in self._entries:
+            self._remove(key)
+
+        size = len(response.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        self._entries[key] = (response, expires_at, size)
+        self._bytes += size
+
+        # 항목 수/메모리 한도를 넘으면 가장 오래 사용되지 않은 항목부터 제거
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.stats['evictions'] += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _disk_path(self, key: str) -> Path:
+        return self.disk_dir / key[:2] / f"{key}.json"
+
+    def _read_disk(self, key: str) -> Optional[Tuple[str, float]]:
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Corrupted response cache entry {path}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if data.get('expires_at', 0) <= time.time():
+            path.unlink(missing_ok=True)
+            self.stats['expired'] += 1
+            return None
+        return data['response'], data['expires_at']
+
+    def _write_disk(self, key: str, response: str, expires_at: float):
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # 임시 파일에 쓴 뒤 교체 (부분 기록된 파일을 읽지 않도록)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'response': response, 'expires_at': expires_at}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+        self._disk_writes += 1
+        if self._disk_writes % 100 == 0:
+            self._prune_disk()
+
+    def _prune_disk(self):
+        """디스크 계층 정리 - 만료 항목과 한도를 넘는 오래된 항목 삭제"""
+        files = sorted(self.disk_dir.glob('*/*.json'), key=lambda p: p.stat().st_mtime)
+        now = time.time()
+        excess = len(files) - self.max_disk_entries
+        for path in files:
+            try:
+                if excess > 0:
+                    path.unlink(missing_ok=True)
+                    excess -= 1
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    if json.load(f).get('expires_at', 0) <= now:
+                        path.unlink(missing_ok=True)
+            except Exception:
+                path.unlink(missing_ok=True)
+
+    def get_stats(self) -> dict:
+        """캐시 메트릭 (hit/miss, 메모리 사용량)"""
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            'enabled_contexts': sorted(self.contexts),
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'disk_tier': str(self.disk_dir) if self.disk_dir else None,
+            'hit_ratio': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+            **self.stats,
+        }
+
+
+# 싱글톤
+response_cache = ResponseCache()
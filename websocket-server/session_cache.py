@@ -0,0 +1,77 @@
+"""
+워크스페이스 세션 메타데이터 캐시
+채팅 턴마다 `workspaces/{session_id}` 문서를 읽어 context 등을 확인하지 않도록 Pod 단위 LRU + TTL 캐시
+(세션 생성 시 채움, 캐시하는 필드는 세션 생성 후 쓰는 곳이 없으므로 TTL로만 만료)
+"""
+
+import copy
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# 캐시하는 필드 (세션 생성 후 거의 바뀌지 않는 값)
+CACHED_FIELDS = ('context', 'agentId', 'userId', 'agentConfig')
+
+
+class SessionMetadataCache:
+    """세션 ID → 메타데이터 (context, agentId, userId, agentConfig)"""
+
+    def __init__(self):
+        self.ttl = float(os.getenv('SESSION_CACHE_TTL', '300'))  # 초
+        self.max_entries = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '10000'))
+
+        self._entries: 'OrderedDict[str, Tuple[float, dict]]' = OrderedDict()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'expired': 0,
+            'evictions': 0,
+        }
+
+    async def get(self, session_id: str) -> Optional[dict]:
+        """메타데이터 조회 (캐시에 없거나 만료되면 Firestore에서 읽어 채움, 세션이 없으면 None)"""
+        entry = self._entries.get(session_id)
+        if entry:
+            expires_at, metadata = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(session_id)
+                self.stats['hits'] += 1
+                return copy.deepcopy(metadata)
+            del self._entries[session_id]
+            self.stats['expired'] += 1
+
+        self.stats['misses'] += 1
+        workspace_doc = await db.collection('workspaces').document(session_id).get()
+        if not workspace_doc.exists:
+            return None
+        return self.put(session_id, workspace_doc.to_dict())
+
+    def put(self, session_id: str, workspace_data: dict) -> dict:
+        """워크스페이스 문서 데이터로 캐시 채움 (세션 생성/문서를 이미 읽은 경우) - 호출자가 수정해도 캐시에 영향 없도록 복사본 반환"""
+        metadata = {field: copy.deepcopy(workspace_data.get(field)) for field in CACHED_FIELDS}
+        self._entries[session_id] = (time.monotonic() + self.ttl, metadata)
+        self._entries.move_to_end(session_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats['evictions'] += 1
+        return copy.deepcopy(metadata)
+
+    def get_stats(self) -> dict:
+        lookups = self.stats['hits'] + self.stats['misses']
+        return {
+            'entries': len(self._entries),
+            'ttl_sec': self.ttl,
+            'hit_ratio': round(self.stats['hits'] / lookups, 3) if lookups else 0.0,
+            **self.stats,
+        }
+
+
+# 싱글톤
+session_cache = SessionMetadataCache()
@@ -0,0 +1,121 @@
+"""
+WebSocket 연결별 세션 메시지 분배기
+수신 루프는 메시지를 세션별 순서 보장 큐에 넣기만 하고, 세션마다 워커 태스크가 순서대로 처리
+(세션 간에는 병렬 처리, 연결당 대기 메시지 수가 한도에 도달하면 새 메시지를 거절하여 백프레셔 적용)
+수신 루프는 대기하지 않으므로 큐가 가득 찬 상태에서도 cancel 같은 제어 프레임을 바로 읽어 처리
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+Turn = Callable[[], Awaitable[None]]
+
+DEFAULT_SESSION_KEY = "default"
+
+
+class _SessionWorker:
+    def __init__(self):
+        self.queue: Deque[Turn] = deque()
+        self.task: Optional[asyncio.Task] = None
+        self.current: Optional[asyncio.Task] = None
+
+
+class SessionDispatcher:
+    """연결 하나의 수신 메시지를 세션별 워커로 분배"""
+
+    def __init__(self, user_id: str, max_pending: int = None):
+        self.user_id = user_id
+        # 연결당 대기(처리 중 포함) 메시지 한도 - 초과한 메시지는 submit이 거절
+        self.max_pending = max_pending or int(os.getenv('WS_MAX_PENDING_MESSAGES', '16'))
+        self._workers: Dict[str, _SessionWorker] = {}
+        self._closed = False
+
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'cancelled': 0,
+            'rejected': 0,
+        }
+
+    @property
+    def pending(self) -> int:
+        return sum(len(worker.queue) + (1 if worker.current else 0) for worker in self._workers.values())
+
+    def submit(self, session_id: Optional[str], turn: Turn) -> bool:
+        """세션 큐에 턴 추가 - 대기 메시지가 한도에 도달했으면 추가하지 않고 False (연결 종료 후 턴은 무시)"""
+        if self._closed:
+            return True
+        if self.pending >= self.max_pending:
+            self.stats['rejected'] += 1
+            logger.info(f"Inbound queue full for user {self.user_id} ({self.max_pending} pending), rejecting message")
+            return False
+
+        key = session_id or DEFAULT_SESSION_KEY
+        worker = self._workers.get(key)
+        if worker is None:
+            worker = _SessionWorker()
+            self._workers[key] = worker
+            worker.task = asyncio.create_task(self._run(key, worker))
+
+        worker.queue.append(turn)
+        self.stats['submitted'] += 1
+        return True
+
+    async def _run(self, key: str, worker: _SessionWorker):
+        """세션 워커 - 큐의 턴을 하나씩 순서대로 실행, 큐가 비면 종료"""
+        try:
+            while worker.queue:
+                turn = worker.queue.popleft()
+                worker.current = asyncio.create_task(turn())
+                try:
+                    await asyncio.wait({worker.current})
+                    if worker.current.cancelled():
+                        self.stats['cancelled'] += 1
+                    else:
+                        self.stats['completed'] += 1
+                        if worker.current.exception():
+                            logger.error(f"Turn failed for user {self.user_id} (session: {key}): {worker.current.exception()}")
+                finally:
+                    worker.current = None
+        finally:
+            # 큐가 빈 워커 제거 (await 없이 확인하므로 submit과 경합하지 않음)
+            if self._workers.get(key) is worker:
+                del self._workers[key]
+
+    def cancel(self, session_id: Optional[str]) -> bool:
+        """세션의 처리 중인 턴과 대기 중인 턴 취소 - 취소한 턴이 있으면 True"""
+        worker = self._workers.get(session_id or DEFAULT_SESSION_KEY)
+        if not worker:
+            return False
+
+        dropped = len(worker.queue)
+        worker.queue.clear()
+        self.stats['cancelled'] += dropped
+
+        cancelled = dropped > 0
+        if worker.current and not worker.current.done():
+            worker.current.cancel()
+            cancelled = True
+        return cancelled
+
+    def close(self) -> int:
+        """모든 세션의 턴 취소 (연결 종료 시) - 취소한 세션 수 반환"""
+        self._closed = True
+        cancelled = 0
+        for key in list(self._workers):
+            if self.cancel(key):
+                cancelled += 1
+        return cancelled
+
+    def get_stats(self) -> dict:
+        return {
+            'sessions': len(self._workers),
+            'pending': self.pending,
+            'max_pending': self.max_pending,
+            **self.stats,
+        }
@@ -0,0 +1,145 @@
+"""
+유휴 Claude 세션 정리 (Session Reaper)
+마지막 활동 기준으로 유휴 ClaudeCodeProcess를 주기적으로 정리하고,
+Pod RSS가 워터마크를 넘으면 LRU 순서로 세션을 정리해 메모리를 회수
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from proc_stats import children_map, process_tree_rss
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+class SessionReaper:
+    """유휴/메모리 압박 세션 정리 백그라운드 태스크"""
+
+    def __init__(self):
+        self.interval = float(os.getenv('SESSION_REAPER_INTERVAL', '60'))  # 초
+        self.idle_timeout = float(os.getenv('SESSION_IDLE_TIMEOUT', '1800'))  # 초 (영구 세션 헬스체크와 동일한 30분)
+        self.rss_watermark = int(os.getenv('SESSION_REAPER_RSS_WATERMARK_MB', '3072')) * MB  # memory limit 4Gi 기준
+
+        self._workspaces: Optional[Callable[[], Iterable]] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.stats = {
+            'runs': 0,
+            'evicted_idle': 0,
+            'evicted_memory': 0,
+            'reclaimed_bytes': 0,
+            'last_reclaimed_bytes': 0,
+            'last_pod_rss_bytes': 0,
+            'last_run_at': None,
+        }
+
+    def start(self, workspaces: Callable[[], Iterable]):
+        """정리 루프 시작 (workspaces: 현재 UserWorkspace 목록을 돌려주는 함수)"""
+        if self._task:
+            return
+        self._workspaces = workspaces
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Session reaper started (interval={self.interval}s, idle_timeout={self.idle_timeout}s, "
+                    f"rss_watermark={self.rss_watermark // MB}MB)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.reap_once()
+            except Exception as e:
+                logger.error(f"Session reaper error: {e}")
+
+    def _collect_sessions(self) -> List[Tuple[object, str, object]]:
+        """(workspace, session_id, ClaudeCodeProcess) 목록 - 처리 중인 세션은 제외"""
+        sessions = []
+        for workspace in list(self._workspaces()):
+            for session_id, process in list(workspace.claude_processes.items()):
+                if not process.is_busy:
+                    sessions.append((workspace, session_id, process))
+        return sessions
+
+    async def reap_once(self) -> int:
+        """정리 1회 실행 - 회수한 메모리(바이트) 반환"""
+        children = children_map()
+        now = datetime.now()
+        sessions = self._collect_sessions()
+        reclaimed = 0
+
+        # 1) 유휴 시간 초과 세션 정리
+        remaining = []
+        for workspace, session_id, process in sessions:
+            idle_seconds = (now - process.last_activity).total_seconds() if process.last_activity else 0
+            if idle_seconds > self.idle_timeout:
+                reclaimed += await self._evict(workspace, session_id, process, children, 'idle')
+                self.stats['evicted_idle'] += 1
+            else:
+                remaining.append((workspace, session_id, process))
+
+        # 2) Pod RSS가 워터마크를 넘으면 가장 오래 사용되지 않은 세션부터 정리
+        #    살아 있는 CLI 프로세스를 가진 세션만 대상 (subprocess 방식 세션은 워커 풀/스케줄러 자식이 메모리를 쓰므로 정리해도 회수되지 않음)
+        pod_rss = process_tree_rss(os.getpid(), children)
+        self.stats['last_pod_rss_bytes'] = pod_rss
+        if pod_rss > self.rss_watermark:
+            candidates = [item for item in remaining if item[2].pids()]
+            logger.warning(f"Pod RSS {pod_rss // MB}MB exceeds watermark {self.rss_watermark // MB}MB, "
+                           f"evicting LRU sessions ({len(candidates)} with live CLI processes)")
+            candidates.sort(key=lambda item: item[2].last_activity or datetime.min)
+            for workspace, session_id, process in candidates:
+                if pod_rss <= self.rss_watermark:
+                    break
+                freed = await self._evict(workspace, session_id, process, children, 'memory')
+                self.stats['evicted_memory'] += 1
+                reclaimed += freed
+                pod_rss -= freed
+                if not freed:
+                    # 이미 종료된 프로세스 등으로 회수되지 않으면 더 정리해도 RSS가 줄지 않으므로 중단
+                    break
+
+        self.stats['runs'] += 1
+        self.stats['reclaimed_bytes'] += reclaimed
+        self.stats['last_reclaimed_bytes'] = reclaimed
+        self.stats['last_run_at'] = now.isoformat()
+        if reclaimed:
+            logger.info(f"Session reaper reclaimed {reclaimed / MB:.1f}MB")
+        return reclaimed
+
+    async def _evict(self, workspace, session_id: str, process, children, reason: str) -> int:
+        """세션 정리 - 정리 직전 측정한 해당 세션 프로세스들의 RSS 반환"""
+        freed = sum(process_tree_rss(pid, children) for pid in process.pids())
+        await workspace.evict_session(session_id)
+        logger.info(f"Evicted Claude session {session_id} of user {workspace.user_id} "
+                    f"(reason: {reason}, freed: {freed / MB:.1f}MB)")
+        return freed
+
+    def get_stats(self) -> dict:
+        return {
+            'interval_sec': self.interval,
+            'idle_timeout_sec': self.idle_timeout,
+            'rss_watermark_mb': self.rss_watermark // MB,
+            'last_pod_rss_mb': round(self.stats['last_pod_rss_bytes'] / MB, 1),
+            'reclaimed_mb': round(self.stats['reclaimed_bytes'] / MB, 1),
+            'last_reclaimed_mb': round(self.stats['last_reclaimed_bytes'] / MB, 1),
+            'runs': self.stats['runs'],
+            'evicted_idle': self.stats['evicted_idle'],
+            'evicted_memory': self.stats['evicted_memory'],
+            'last_run_at': self.stats['last_run_at'],
+        }
+
+
+# 싱글톤
+session_reaper = SessionReaper()
@@ -0,0 +1,161 @@
+"""
+분산(샤드) 카운터
+`system/{name}/shards/{0..N-1}` 문서의 count 합계로 값을 유지 (컬렉션 전체를 스트리밍해서 세지 않음)
+증가/감소는 호출하는 쪽 트랜잭션 안에서 임의 샤드 하나에 적용하고, 정합성 보정은 count 집계 쿼리로 재계산
+카운터 문서(`system/{name}`)는 재계산 때만 쓰므로 이 문서가 있어야 초기화된 카운터로 봄
+"""
+
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime
+from typing import Callable, Optional
+
+import google.cloud.firestore as firestore
+
+from database import db, async_transactional
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_COLLECTION = 'system'
+SHARDS_SUBCOLLECTION = 'shards'
+
+
+class ShardedCounter:
+    """Firestore 샤드 카운터 (샤드 수만큼 문서를 읽어 합산)"""
+
+    def __init__(self, name: str, num_shards: int, source_query: Callable[[], object]):
+        self.name = name
+        self.num_shards = max(1, num_shards)
+        self._source_query = source_query  # 재계산 기준 쿼리 (count 집계)
+
+        self.stats = {
+            'reads': 0,
+            'increments': 0,
+            'skipped_increments': 0,
+            'reconciles': 0,
+            'last_reconcile_drift': 0,
+            'last_reconciled_at': None,
+        }
+
+    @property
+    def counter_ref(self):
+        return db.collection(SYSTEM_COLLECTION).document(self.name)
+
+    def shard_refs(self) -> list:
+        shards = self.counter_ref.collection(SHARDS_SUBCOLLECTION)
+        return [shards.document(str(index)) for index in range(self.num_shards)]
+
+    async def read(self, transaction=None) -> Optional[int]:
+        """현재 값 (트랜잭션을 주면 트랜잭션 안에서 읽음, 아직 초기화되지 않았으면 None)"""
+        counter_path = self.counter_ref.path
+        snapshots = [snapshot async for snapshot in db.get_all([self.counter_ref, *self.shard_refs()], transaction=transaction)]
+        self.stats['reads'] += 1
+
+        # get_all은 순서를 보장하지 않으므로 경로로 카운터 문서 구분
+        if not any(snapshot.exists and snapshot.reference.path == counter_path for snapshot in snapshots):
+            return None
+        return sum((snapshot.to_dict() or {}).get('count', 0) for snapshot in snapshots
+                   if snapshot.exists and snapshot.reference.path != counter_path)
+
+    async def is_initialized(self, transaction) -> bool:
+        """트랜잭션 안에서 초기화 여부 확인 - 쓰기 전에 호출
+
+        샤드가 아닌 카운터 문서만 읽으므로 증감 트랜잭션끼리는 경합하지 않고, 재계산과는 충돌해 재시도됨
+        """
+        snapshot = await self.counter_ref.get(transaction=transaction)
+        return snapshot.exists
+
+    async def get(self) -> int:
+        """현재 값 (초기화 전이면 재계산해서 채움)"""
+        value = await self.read()
+        if value is None:
+            value = await self.reconcile()
+        return value
+
+    def increment(self, transaction, amount: int = 1, initialized: bool = True):
+        """트랜잭션 안에서 임의 샤드 하나에 더함 (샤드 수만큼 쓰기 경합 분산)
+
+        초기화 전이면 아무것도 쓰지 않음 - 샤드를 만들면 첫 조회의 재계산이 건너뛰어지므로 get()이 재계산하도록 둠
+        """
+        if not initialized:
+            self.stats['skipped_increments'] += 1
+            return
+        shard_ref = random.choice(self.shard_refs())
+        transaction.set(shard_ref, {'count': firestore.Increment(amount)}, merge=True)
+        self.stats['increments'] += 1
+
+    async def reconcile(self) -> int:
+        """기준 컬렉션의 count 집계로 다시 계산해 샤드 값 교체 - 재계산한 값 반환"""
+        refs = self.shard_refs()
+
+        @async_transactional
+        async def run(transaction) -> tuple:
+            # 샤드를 같은 트랜잭션에서 읽어 두면 그사이 증가/감소한 트랜잭션과 충돌해 재시도됨
+            previous = await self.read(transaction)
+            result = await self._source_query().count().get(transaction=transaction)
+            actual = int(result[0][0].value)
+            for index, ref in enumerate(refs):
+                transaction.set(ref, {'count': actual if index == 0 else 0, 'updated_at': datetime.utcnow()})
+            transaction.set(self.counter_ref, {
+                'num_shards': self.num_shards,
+                'reconciled_at': datetime.utcnow(),
+            }, merge=True)
+            return previous, actual
+
+        previous, actual = await run(db.transaction())
+        drift = actual - previous if previous is not None else 0
+        self.stats['reconciles'] += 1
+        self.stats['last_reconcile_drift'] = drift
+        self.stats['last_reconciled_at'] = datetime.utcnow().isoformat()
+        if drift:
+            logger.warning(f"Counter {self.name} drifted by {drift} (now {actual})")
+        return actual
+
+    def get_stats(self) -> dict:
+        return {'name': self.name, 'num_shards': self.num_shards, **self.stats}
+
+
+class CounterReconciler:
+    """카운터 주기적 재계산 백그라운드 태스크"""
+
+    def __init__(self, *counters: ShardedCounter):
+        self.interval = float(os.getenv('COUNTER_RECONCILE_INTERVAL', '3600'))  # 초 (0이면 비활성)
+        self.counters = counters
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Counter reconciler started (interval={self.interval}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            for counter in self.counters:
+                try:
+                    await counter.reconcile()
+                except Exception as e:
+                    logger.error(f"Counter {counter.name} reconcile error: {e}")
+
+
+# 베타 사용자 수 (users.is_beta_user == True)
+beta_user_counter = ShardedCounter(
+    'beta_user_count',
+    int(os.getenv('BETA_COUNTER_SHARDS', '1')),
+    lambda: db.collection('users').where(filter=firestore.FieldFilter('is_beta_user', '==', True)),
+)
+
+# 싱글톤
+counter_reconciler = CounterReconciler(beta_user_counter)
@@ -0,0 +1,199 @@
+"""
+Claude CLI 실행 스케줄러 테스트
+가중 라운드로빈 공정성, 레인 우선순위, 대기 순번 알림, 대기 중 취소, 동시 실행 수 설정 검증
+"""
+
+import asyncio
+
+import pytest
+
+from claude_scheduler import ClaudeScheduler, parse_user_weights
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setenv('CLAUDE_MAX_CONCURRENT', '1')
+    monkeypatch.setenv('CLAUDE_AGENT_CREATE_LANE_WEIGHT', '2')
+    monkeypatch.setenv('CLAUDE_WORKSPACE_LANE_WEIGHT', '1')
+    return ClaudeScheduler()
+
+
+async def settle():
+    """대기 중인 태스크가 큐에 들어갈 때까지 이벤트 루프 양보"""
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def run_queued(scheduler, requests):
+    """슬롯 하나를 점유한 상태에서 요청을 모두 큐에 넣은 뒤 풀어 실행 순서 반환"""
+    order = []
+    release = asyncio.Event()
+
+    async def blocker():
+        async with scheduler.slot('blocker'):
+            await release.wait()
+
+    async def request(label, user_id, context):
+        async with scheduler.slot(user_id, context):
+            order.append(label)
+
+    blocking = asyncio.create_task(blocker())
+    await settle()
+    tasks = []
+    for label, user_id, context in requests:
+        tasks.append(asyncio.create_task(request(label, user_id, context)))
+        await settle()
+    release.set()
+    await asyncio.gather(blocking, *tasks)
+    return order
+
+
+def test_round_robin_between_users(scheduler):
+    """먼저 많이 넣은 사용자가 있어도 사용자별로 번갈아 실행"""
+    requests = [('a1', 'a', 'workspace'), ('a2', 'a', 'workspace'), ('a3', 'a', 'workspace'),
+                ('b1', 'b', 'workspace'), ('b2', 'b', 'workspace')]
+    order = asyncio.run(run_queued(scheduler, requests))
+    assert order == ['a1', 'b1', 'a2', 'b2', 'a3']
+
+
+def test_parse_user_weights():
+    assert parse_user_weights('') == {}
+    assert parse_user_weights(' a:3, b:2 ,') == {'a': 3, 'b': 2}
+    # 잘못된 항목은 건너뜀
+    assert parse_user_weights('a:x,:2,c,d:1') == {'d': 1}
+
+
+def test_user_weight(monkeypatch):
+    """CLAUDE_USER_WEIGHTS로 가중치 2를 받은 사용자는 한 바퀴에 연속 2번 실행"""
+    monkeypatch.setenv('CLAUDE_MAX_CONCURRENT', '1')
+    monkeypatch.setenv('CLAUDE_USER_WEIGHTS', 'a:2')
+    scheduler = ClaudeScheduler()
+    assert scheduler.user_weights == {'a': 2}
+    requests = [('a1', 'a', 'workspace'), ('a2', 'a', 'workspace'), ('a3', 'a', 'workspace'),
+                ('b1', 'b', 'workspace'), ('b2', 'b', 'workspace')]
+    order = asyncio.run(run_queued(scheduler, requests))
+    assert order == ['a1', 'a2', 'b1', 'a3', 'b2']
+
+
+def test_lane_weights(scheduler):
+    """agent-create 레인(가중치 2)이 workspace 레인(가중치 1)보다 2배 자주 선택"""
+    requests = [('w1', 'a', 'workspace'), ('w2', 'a', 'workspace'), ('w3', 'a', 'workspace'),
+                ('c1', 'b', 'agent-create'), ('c2', 'b', 'agent-create'), ('c3', 'b', 'agent-create')]
+    order = asyncio.run(run_queued(scheduler, requests))
+    assert order == ['c1', 'c2', 'w1', 'c3', 'w2', 'w3']
+
+
+def test_queue_positions_are_notified(scheduler):
+    positions = {'blocker': [], 'a': [], 'b': []}
+
+    async def main():
+        releases = {user_id: asyncio.Event() for user_id in ('blocker', 'a', 'b')}
+
+        async def request(user_id):
+            async def on_queued(position):
+                positions[user_id].append(position)
+
+            async with scheduler.slot(user_id, on_queued=on_queued):
+                await releases[user_id].wait()
+
+        tasks = []
+        for user_id in ('blocker', 'a', 'b'):
+            tasks.append(asyncio.create_task(request(user_id)))
+            await settle()
+        assert scheduler.get_stats()['queue_depth'] == 2
+        assert positions == {'blocker': [], 'a': [1], 'b': [2]}
+
+        # 앞 요청이 슬롯을 받으면 뒤 요청에 당겨진 순번 알림
+        releases['blocker'].set()
+        await settle()
+        assert positions['b'] == [2, 1]
+
+        for event in releases.values():
+            event.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert positions == {'blocker': [], 'a': [1], 'b': [2, 1]}
+
+
+def test_cancel_while_queued(scheduler):
+    positions = []
+    order = []
+
+    async def main():
+        release = asyncio.Event()
+
+        async def blocker():
+            async with scheduler.slot('blocker'):
+                await release.wait()
+
+        async def request(user_id, on_queued=None):
+            async with scheduler.slot(user_id, on_queued=on_queued):
+                order.append(user_id)
+
+        async def record(position):
+            positions.append(position)
+
+        blocking = asyncio.create_task(blocker())
+        await settle()
+        cancelled = asyncio.create_task(request('a'))
+        await settle()
+        waiting = asyncio.create_task(request('b', record))
+        await settle()
+
+        cancelled.cancel()
+        await settle()
+        stats = scheduler.get_stats()
+        assert cancelled.cancelled()
+        assert stats['cancelled_while_queued'] == 1
+        assert stats['queue_depth'] == 1
+
+        release.set()
+        await asyncio.gather(blocking, waiting)
+
+    asyncio.run(main())
+    # 앞 요청이 취소되면 뒤 요청의 순번이 당겨지고, 취소된 요청은 실행되지 않음
+    assert positions == [2, 1]
+    assert order == ['b']
+    assert scheduler.get_stats()['active'] == 0
+
+
+def test_cancel_releases_slot_for_next_request(scheduler):
+    """실행 중 취소되어도 슬롯을 반환해 다음 대기자가 실행"""
+    order = []
+
+    async def main():
+        started = asyncio.Event()
+
+        async def long_running():
+            async with scheduler.slot('a'):
+                started.set()
+                await asyncio.sleep(60)
+
+        async def request():
+            async with scheduler.slot('b'):
+                order.append('b')
+
+        running = asyncio.create_task(long_running())
+        await started.wait()
+        waiting = asyncio.create_task(request())
+        await settle()
+        running.cancel()
+        await asyncio.wait_for(waiting, timeout=1)
+
+    asyncio.run(main())
+    assert order == ['b']
+    assert scheduler.get_stats()['active'] == 0
+
+
+@pytest.mark.parametrize('value', ['0', '-3'])
+def test_invalid_max_concurrent_falls_back_to_one(monkeypatch, value):
+    monkeypatch.setenv('CLAUDE_MAX_CONCURRENT', value)
+    scheduler = ClaudeScheduler()
+    assert scheduler.max_concurrent == 1
+
+    async def main():
+        async with scheduler.slot('a'):
+            return True
+
+    assert asyncio.run(asyncio.wait_for(main(), timeout=1))
@@ -0,0 +1,63 @@
+"""
+Claude CLI 출력 스트림 헬퍼 테스트
+--print stream-json 한 턴 파싱: 텍스트 델타 전달, 완성 메시지 중복 제거, CLI 대화 ID와 최종 응답 검증
+"""
+
+import json
+
+import pytest
+
+from claude_stream import PrintTurn, StreamJsonError, extract_delta
+
+
+def line(event) -> bytes:
+    return (json.dumps(event) + '\n').encode('utf-8')
+
+
+def delta(text):
+    return {'type': 'stream_event', 'session_id': 'cli-1',
+            'event': {'type': 'content_block_delta', 'index': 0, 'delta': {'type': 'text_delta', 'text': text}}}
+
+
+def assistant(text):
+    return {'type': 'assistant', 'session_id': 'cli-1', 'message': {'content': [{'type': 'text', 'text': text}]}}
+
+
+def result(text, subtype='success'):
+    return {'type': 'result', 'subtype': subtype, 'session_id': 'cli-1', 'result': text}
+
+
+def test_extract_delta_ignores_other_events():
+    assert extract_delta(delta('hi')) == 'hi'
+    assert extract_delta(assistant('hi')) == ''
+    assert extract_delta({'type': 'stream_event', 'event': {'type': 'message_start'}}) == ''
+    assert extract_delta({'type': 'stream_event', 'event': {
+        'type': 'content_block_delta', 'delta': {'type': 'input_json_delta', 'partial_json': '{'}}}) == ''
+
+
+def test_partial_messages_stream_deltas_without_duplicating_the_full_message():
+    turn = PrintTurn()
+    events = [{'type': 'system', 'subtype': 'init', 'session_id': 'cli-1'},
+              delta('Hel'), delta('lo'), assistant('Hello'),
+              delta(' world'), assistant(' world'),
+              result('Hello world')]
+    chunks = [turn.feed_line(line(event)) for event in events]
+
+    assert [chunk for chunk in chunks if chunk] == ['Hel', 'lo', ' world']
+    assert turn.session_id == 'cli-1'
+    assert turn.response() == 'Hello world'
+
+
+def test_full_messages_are_streamed_when_cli_sends_no_deltas():
+    turn = PrintTurn()
+    chunks = [turn.feed_line(line(event)) for event in (assistant('one '), assistant('two'), result(''))]
+    assert [chunk for chunk in chunks if chunk] == ['one ', 'two']
+    assert turn.response() == 'one two'
+
+
+def test_error_result_raises():
+    turn = PrintTurn()
+    turn.feed_line(line(delta('partial')))
+    turn.feed_line(line(result('boom', subtype='error_during_execution')))
+    with pytest.raises(StreamJsonError):
+        turn.response()
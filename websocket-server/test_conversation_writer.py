@@ -0,0 +1,83 @@
+"""
+대화 기록 write-behind 저장 테스트 (메모리 저장소)
+세션별 일괄 저장, 세션 없는 대화의 conversations 저장, 저장 실패 시 대체 저장 검증
+"""
+
+import asyncio
+
+import conversation_writer as conversation_writer_module
+from conversation_writer import ConversationWriter
+from message_store import message_store
+
+
+async def session_contents(session_id):
+    return [doc.to_dict()['content'] async for doc in message_store.messages_ref(session_id).order_by('seq').stream()]
+
+
+def test_flush_writes_turns_in_order_per_session(local_db):
+    async def main():
+        writer = ConversationWriter()
+        writer.enqueue('u1', 'q1', 'a1', agent_id='ag', session_id='s1')
+        writer.enqueue('u1', 'q2', 'a2', agent_id='ag', session_id='s1')
+        writer.enqueue('u2', 'x1', 'y1', session_id='s2')
+        assert writer.get_stats()['pending_messages'] == 6
+
+        await writer.flush()
+        assert await session_contents('s1') == ['q1', 'a1', 'q2', 'a2']
+        assert await session_contents('s2') == ['x1', 'y1']
+        stats = writer.get_stats()
+        assert stats['pending_messages'] == 0
+        assert stats['transactions'] == 2
+        assert stats['written_messages'] == 6
+
+    asyncio.run(main())
+
+
+def test_flush_user_only_writes_that_user(local_db):
+    async def main():
+        writer = ConversationWriter()
+        writer.enqueue('u1', 'q1', 'a1', session_id='s1')
+        writer.enqueue('u2', 'q2', 'a2', session_id='s2')
+
+        await writer.flush('u1')
+        assert await session_contents('s1') == ['q1', 'a1']
+        assert await session_contents('s2') == []
+        assert writer.get_stats()['pending_sessions'] == 1
+
+    asyncio.run(main())
+
+
+def test_turns_without_session_go_to_conversations(local_db):
+    async def main():
+        writer = ConversationWriter()
+        writer.enqueue('u1', 'q1', 'a1')
+        writer.enqueue('u1', 'q2', 'a2')
+
+        await writer.flush()
+        docs = [doc.to_dict() async for doc in local_db.collection('conversations').stream()]
+        assert len(docs) == 1
+        assert [message['content'] for message in docs[0]['messages']] == ['q1', 'a1', 'q2', 'a2']
+        assert writer.get_stats()['batches'] == 1
+
+    asyncio.run(main())
+
+
+def test_failed_session_write_falls_back_to_conversations(local_db, monkeypatch):
+    async def failing_append(*args, **kwargs):
+        raise RuntimeError("write failed")
+
+    monkeypatch.setattr(conversation_writer_module.message_store, 'append', failing_append)
+
+    async def main():
+        writer = ConversationWriter()
+        writer.enqueue('u1', 'q1', 'a1', session_id='s1')
+
+        await writer.flush()
+        docs = [doc.to_dict() async for doc in local_db.collection('conversations').stream()]
+        assert [doc['sessionId'] for doc in docs] == ['s1']
+        stats = writer.get_stats()
+        assert stats['failed_transactions'] == 1
+        assert stats['fallback_writes'] == 1
+        assert stats['lost_turns'] == 0
+
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+대시보드 집계 테스트 (메모리 저장소)
+에이전트 변경 델타 계산, 응답 형식, batch 안 증분 반영과 재계산 검증
+"""
+
+import asyncio
+
+from dashboard_stats import DashboardStats, agent_delta, format_stats
+from database import db
+
+
+def test_agent_delta():
+    active = {'status': 'active', 'totalRuns': 3, 'successfulRuns': 2}
+    assert agent_delta(None, active) == {'totalAgents': 1, 'activeAgents': 1, 'totalRuns': 3, 'successfulRuns': 2}
+    assert agent_delta(active, None) == {'totalAgents': -1, 'activeAgents': -1, 'totalRuns': -3, 'successfulRuns': -2}
+    assert agent_delta(active, {**active, 'status': 'paused'}) == {'activeAgents': -1}
+    assert agent_delta(active, dict(active)) == {}
+
+
+def test_format_stats():
+    assert format_stats({'totalAgents': 2, 'activeAgents': 1, 'totalRuns': 4, 'successfulRuns': 3}) == {
+        'totalAgents': 2, 'activeAgents': 1, 'totalRuns': 4, 'successRate': '75%'
+    }
+    assert format_stats({})['successRate'] == '0%'
+
+
+def test_dashboard_stats_apply_delta_and_reconcile(local_db):
+    async def main():
+        stats = DashboardStats()
+        agents = db.collection('agents')
+        await agents.document('a1').set({'userId': 'u1', 'status': 'active', 'totalRuns': 2, 'successfulRuns': 1})
+        await agents.document('a2').set({'userId': 'u1', 'status': 'paused'})
+        await agents.document('other').set({'userId': 'u2', 'status': 'active'})
+
+        # 첫 조회는 agents 기준으로 재계산
+        data = await stats.get('u1')
+        assert {field: data[field] for field in ('totalAgents', 'activeAgents', 'totalRuns', 'successfulRuns')} == {
+            'totalAgents': 2, 'activeAgents': 1, 'totalRuns': 2, 'successfulRuns': 1
+        }
+
+        # 에이전트 생성과 집계 증가를 같은 batch로
+        new_agent = {'userId': 'u1', 'status': 'active'}
+        batch = db.batch()
+        batch.set(agents.document('a3'), new_agent)
+        stats.apply_delta(batch, 'u1', agent_delta(None, new_agent))
+        await batch.commit()
+
+        data = await stats.get('u1')
+        assert data['totalAgents'] == 3
+        assert data['activeAgents'] == 2
+        assert stats.stats['reconciles'] == 1
+
+        # 집계를 거치지 않은 삭제는 재계산으로 보정
+        await agents.document('a2').delete()
+        data = await stats.reconcile('u1')
+        assert data['totalAgents'] == 2
+        assert stats.stats['drifted_users'] == 1
+
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+승인 메일 백그라운드 발송 테스트
+발송 성공한 수신자만 on_sent 호출, 종료 시 제한 시간 안에 못 보낸 발송은 취소 검증
+"""
+
+import asyncio
+
+from email_service import EmailService
+
+
+def test_on_sent_is_called_only_for_delivered_recipients(monkeypatch):
+    sent = []
+
+    async def send_approval_notification(email, name):
+        if email == 'boom@x.com':
+            raise RuntimeError("smtp down")
+        return email != 'fail@x.com'
+
+    async def on_sent(email):
+        sent.append(email)
+
+    async def main():
+        service = EmailService()
+        monkeypatch.setattr(service, 'send_approval_notification', send_approval_notification)
+        service.queue_approval_notifications(
+            [('a@x.com', 'a'), ('fail@x.com', 'f'), ('boom@x.com', 'b'), ('c@x.com', 'c')], on_sent=on_sent)
+        await service.drain()
+
+    asyncio.run(main())
+    assert sorted(sent) == ['a@x.com', 'c@x.com']
+
+
+def test_drain_cancels_sends_past_the_timeout(monkeypatch):
+    monkeypatch.setenv('EMAIL_DRAIN_TIMEOUT', '0.05')
+    sent = []
+
+    async def send_approval_notification(email, name):
+        await asyncio.sleep(0 if email == 'fast@x.com' else 60)
+        return True
+
+    async def on_sent(email):
+        sent.append(email)
+
+    async def main():
+        service = EmailService()
+        monkeypatch.setattr(service, 'send_approval_notification', send_approval_notification)
+        service.queue_approval_notifications([('fast@x.com', 'f'), ('slow@x.com', 's')], on_sent=on_sent)
+        await asyncio.wait_for(service.drain(), timeout=1)
+
+    asyncio.run(main())
+    # 못 보낸 수신자는 on_sent가 호출되지 않아 발송 대기 표시가 남음
+    assert sent == ['fast@x.com']
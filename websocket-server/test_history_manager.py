@@ -0,0 +1,95 @@
+"""
+대화 히스토리 관리자 테스트
+토큰 추정, 예산 초과 시 압축(요약 + 최근 턴 유지), 새 CLI 대화 시작 시 입력 구성 검증
+"""
+
+import pytest
+
+from history_manager import ConversationHistory, estimate_tokens
+
+
+@pytest.fixture
+def history(monkeypatch):
+    monkeypatch.setenv('HISTORY_TOKEN_BUDGET', '200')
+    monkeypatch.setenv('HISTORY_KEEP_RECENT_TURNS', '2')
+    monkeypatch.setenv('HISTORY_SUMMARY_TOKENS', '800')
+    return ConversationHistory()
+
+
+def add_turn(history, index, size=40) -> bool:
+    """build_prompt → add_turn 순서로 턴 하나 기록 - 압축했으면 True"""
+    history.build_prompt(f"question {index}. " + "q" * size, new_conversation=history.needs_reseed)
+    return history.add_turn(f"question {index}. " + "q" * size, f"answer {index}. " + "a" * size)
+
+
+def add_turns(history, count, size=40):
+    """턴 count개 기록 - 압축한 턴 번호 목록 반환"""
+    return [index for index in range(count) if add_turn(history, index, size)]
+
+
+def add_until_compacted(history, limit=50):
+    """처음 압축될 때까지 턴 추가 - 압축을 일으킨 턴 번호 반환"""
+    for index in range(limit):
+        if add_turn(history, index):
+            return index
+    raise AssertionError("history was never compacted")
+
+
+def test_estimate_tokens():
+    assert estimate_tokens('') == 0
+    assert estimate_tokens('abcd') == 1
+    assert estimate_tokens('abcde') == 2
+    assert estimate_tokens('한글') == 2
+
+
+def test_no_compaction_under_budget(history):
+    assert add_turns(history, 3) == []
+    assert len(history.turns) == 3
+    assert not history.needs_reseed
+
+
+def test_compaction_folds_old_turns_into_summary(history):
+    last = add_until_compacted(history)
+
+    assert history.needs_reseed
+    assert len(history.turns) <= history.keep_recent
+    # 원문으로 남은 첫 턴 바로 앞의 턴이 마지막 요약 줄
+    first_kept = last + 1 - len(history.turns)
+    assert history.summary[-1][0].startswith(f'- 사용자: question {first_kept - 1}.')
+    assert history.turns[0][0].startswith(f'question {first_kept}.')
+    assert history.turns[-1][0].startswith(f'question {last}.')
+    assert history.stats['compactions'] == 1
+    assert history.stats['folded_turns'] == first_kept
+
+
+def test_compacted_history_stays_within_budget(history):
+    add_turns(history, 50)
+    summary_tokens = sum(tokens for _, tokens in history.summary)
+    assert summary_tokens <= min(history.summary_budget, history.budget // 4)
+    assert history.total_tokens <= history.budget
+    assert history.get_stats()['saved_tokens_total'] > 0
+
+
+def test_reseed_prompt_carries_summary_and_recent_turns(history):
+    last = add_until_compacted(history)
+
+    prompt = history.build_prompt('next question', new_conversation=True)
+    assert prompt.startswith('이전 대화 요약:')
+    assert '최근 대화 내용:' in prompt
+    assert f'question {last}.' in prompt
+    assert prompt.endswith('next question')
+    # 새 대화로 시작하면 컨텍스트 크기를 새로 계산
+    assert not history.needs_reseed
+    assert history.conversation_tokens == estimate_tokens(prompt)
+
+
+def test_continuing_conversation_sends_only_message(history):
+    add_turns(history, 2)
+    assert history.build_prompt('follow up', new_conversation=False) == 'follow up'
+
+
+def test_zero_budget_disables_compaction(monkeypatch):
+    monkeypatch.setenv('HISTORY_TOKEN_BUDGET', '0')
+    history = ConversationHistory()
+    assert add_turns(history, 30, size=400) == []
+    assert len(history.turns) == 30
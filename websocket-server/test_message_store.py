@@ -0,0 +1,113 @@
+"""
+워크스페이스 메시지 저장소 테스트 (메모리 저장소)
+순번(seq) 할당, 트랜잭션 분할, 페이지 조회, 마이그레이션 전 배열 필드 메시지 병합 검증
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import message_store as message_store_module
+from message_store import message_doc_id, message_store
+
+
+def messages(count, start=0):
+    return [{'role': 'user', 'content': f'm{index}'} for index in range(start, start + count)]
+
+
+async def stored_seqs(session_id):
+    return [doc.to_dict()['seq'] async for doc in message_store.messages_ref(session_id).order_by('seq').stream()]
+
+
+def test_append_assigns_consecutive_seq(local_db):
+    async def main():
+        now = datetime.utcnow()
+        assert await message_store.append('s1', 'u1', messages(2), now) == 2
+        assert await message_store.append('s1', 'u1', messages(3, 2), now) == 5
+
+        assert await stored_seqs('s1') == [1, 2, 3, 4, 5]
+        doc = await message_store.messages_ref('s1').document(message_doc_id(3)).get()
+        assert doc.to_dict()['content'] == 'm2'
+        workspace = (await message_store.workspace_ref('s1').get()).to_dict()
+        assert workspace['messageCount'] == 5
+
+    asyncio.run(main())
+
+
+def test_concurrent_appends_do_not_reuse_seq(local_db):
+    async def main():
+        now = datetime.utcnow()
+        await asyncio.gather(*(message_store.append('s1', 'u1', messages(2, index * 2), now) for index in range(5)))
+        assert await stored_seqs('s1') == list(range(1, 11))
+
+    asyncio.run(main())
+
+
+def test_large_append_is_split_into_transactions(local_db, monkeypatch):
+    monkeypatch.setattr(message_store_module, 'MAX_MESSAGES_PER_TRANSACTION', 3)
+
+    async def main():
+        assert await message_store.append('s1', 'u1', messages(7), datetime.utcnow()) == 7
+        assert await stored_seqs('s1') == list(range(1, 8))
+
+    asyncio.run(main())
+
+
+def test_new_workspace_gets_default_fields(local_db):
+    async def main():
+        await message_store.append('s1', 'u1', messages(1), datetime.utcnow(), agent_id='a1')
+        workspace = (await message_store.workspace_ref('s1').get()).to_dict()
+        assert workspace['agentId'] == 'a1'
+        assert workspace['status'] == 'active'
+        assert workspace['context'] == 'workspace'
+        assert 'createdAt' in workspace
+
+        # 기존 문서의 필드는 덮어쓰지 않음
+        await message_store.workspace_ref('s1').update({'status': 'archived', 'context': 'agent-create'})
+        await message_store.append('s1', 'u1', messages(1, 1), datetime.utcnow(), agent_id='a1')
+        workspace = (await message_store.workspace_ref('s1').get()).to_dict()
+        assert workspace['status'] == 'archived'
+        assert workspace['context'] == 'agent-create'
+
+    asyncio.run(main())
+
+
+def test_load_page_walks_back_with_before_cursor(local_db):
+    async def main():
+        await message_store.append('s1', 'u1', messages(10), datetime.utcnow())
+        workspace = (await message_store.workspace_ref('s1').get()).to_dict()
+
+        page, has_more = await message_store.load_page('s1', workspace, limit=4)
+        assert [message['seq'] for message in page] == [7, 8, 9, 10]
+        assert has_more
+
+        page, has_more = await message_store.load_page('s1', workspace, limit=4, before=7)
+        assert [message['seq'] for message in page] == [3, 4, 5, 6]
+        assert has_more
+
+        page, has_more = await message_store.load_page('s1', workspace, limit=4, before=3)
+        assert [message['seq'] for message in page] == [1, 2]
+        assert not has_more
+
+    asyncio.run(main())
+
+
+def test_legacy_array_messages_are_numbered_before_new_ones(local_db):
+    async def main():
+        base = datetime.utcnow()
+        legacy = [{'role': 'user', 'content': f'old{index}', 'timestamp': base + timedelta(seconds=index)}
+                  for index in (2, 0, 1)]
+        await message_store.workspace_ref('s1').set({'sessionId': 's1', 'userId': 'u1', 'messages': legacy})
+
+        assert await message_store.append('s1', 'u1', messages(2), base) == 5
+        workspace = (await message_store.workspace_ref('s1').get()).to_dict()
+
+        page, has_more = await message_store.load_page('s1', workspace, limit=10)
+        assert [message['seq'] for message in page] == [1, 2, 3, 4, 5]
+        assert [message['content'] for message in page] == ['old0', 'old1', 'old2', 'm0', 'm1']
+        assert not has_more
+
+        page, has_more = await message_store.load_page('s1', workspace, limit=3)
+        assert [message['content'] for message in page] == ['old2', 'm0', 'm1']
+        assert has_more
+
+    asyncio.run(main())
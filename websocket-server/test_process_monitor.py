@@ -0,0 +1,73 @@
+"""
+Claude CLI 프로세스 리소스 모니터 테스트 (Linux /proc 필요)
+하위 프로세스 RSS를 포함한 메모리 한도 검사, 종료 유예 시간 동안 샘플링이 멈추지 않는지 검증
+"""
+
+import asyncio
+import sys
+import time
+
+import pytest
+
+from process_monitor import ProcessMonitor
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason="/proc sampling is Linux only")
+
+# 자식 프로세스가 메모리를 잡고 있는 트리 (부모 자체 RSS는 작음)
+CHILD_HOLDS_MEMORY = (
+    "import subprocess, sys, time\n"
+    "subprocess.Popen([sys.executable, '-c', 'x = bytearray(96 * 1024 * 1024); import time; time.sleep(60)'])\n"
+    "time.sleep(60)\n"
+)
+IGNORES_SIGTERM = "import signal, time\nsignal.signal(signal.SIGTERM, signal.SIG_IGN)\nprint('ready', flush=True)\ntime.sleep(60)\n"
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monkeypatch.setenv('CLAUDE_MAX_RSS_MB', '64')
+    monkeypatch.setenv('CLAUDE_RLIMIT_CPU_SECONDS', '0')
+    return ProcessMonitor()
+
+
+def test_rss_limit_counts_child_processes(monitor):
+    async def main():
+        process = await asyncio.create_subprocess_exec(sys.executable, '-c', CHILD_HOLDS_MEMORY)
+        monitor.register(process, 'turn')
+        try:
+            for _ in range(50):
+                await monitor.sample_once()
+                if process.returncode is not None or monitor.stats['killed']:
+                    break
+                await asyncio.sleep(0.1)
+            await monitor.stop()
+            await asyncio.wait_for(process.wait(), timeout=5)
+        finally:
+            if process.returncode is None:
+                process.kill()
+        return monitor.exit_reason(process)
+
+    assert asyncio.run(main()) == 'memory'
+
+
+def test_sampling_does_not_wait_for_kill_grace_period(monitor, monkeypatch):
+    monkeypatch.setattr(monitor, '_turn_cpu_exceeded', lambda tracked: True)
+    monkeypatch.setattr(monitor, 'max_rss', 0)
+
+    async def main():
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-c', IGNORES_SIGTERM, stdout=asyncio.subprocess.PIPE)
+        await process.stdout.readline()
+        monitor.register(process, 'persistent')
+        try:
+            started = time.monotonic()
+            await monitor.sample_once()
+            elapsed = time.monotonic() - started
+            # 다음 샘플에서는 종료 중인 프로세스를 다시 종료하지 않음
+            await monitor.sample_once()
+            assert monitor.stats['killed'] == 1
+        finally:
+            process.kill()
+            await monitor.stop()
+        return elapsed
+
+    assert asyncio.run(main()) < 1.0
@@ -0,0 +1,159 @@
+"""
+WebSocket 세션 메시지 분배기 테스트
+세션별 순서 보장, 세션 간 병렬 처리, 대기 메시지 한도 초과 거절, 취소/연결 종료 검증
+"""
+
+import asyncio
+
+from session_dispatcher import SessionDispatcher
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def wait_idle(dispatcher):
+    """처리 중/대기 중인 턴이 모두 끝날 때까지 대기"""
+    async def idle():
+        while dispatcher.pending or dispatcher.get_stats()['sessions']:
+            await asyncio.sleep(0)
+    await asyncio.wait_for(idle(), timeout=1)
+
+
+def test_turns_run_in_order_per_session_and_in_parallel_across_sessions():
+    events = []
+
+    async def main():
+        dispatcher = SessionDispatcher('user', max_pending=8)
+        gate = asyncio.Event()
+
+        def turn(label, wait=False):
+            async def run():
+                events.append(f'start {label}')
+                if wait:
+                    await gate.wait()
+                events.append(f'end {label}')
+            return run
+
+        dispatcher.submit('s1', turn('s1-1', wait=True))
+        dispatcher.submit('s1', turn('s1-2'))
+        dispatcher.submit('s2', turn('s2-1'))
+        await settle()
+        # s1 첫 턴이 끝나지 않아도 s2는 처리, s1 두 번째 턴은 대기
+        assert 'end s2-1' in events
+        assert 'start s1-2' not in events
+
+        gate.set()
+        await wait_idle(dispatcher)
+        assert dispatcher.get_stats()['completed'] == 3
+
+    asyncio.run(main())
+    assert events.index('end s1-1') < events.index('start s1-2')
+
+
+def test_submit_rejects_when_pending_limit_reached():
+    async def main():
+        dispatcher = SessionDispatcher('user', max_pending=2)
+        gate = asyncio.Event()
+
+        async def blocked():
+            await gate.wait()
+
+        assert dispatcher.submit('s1', blocked)
+        assert dispatcher.submit('s1', blocked)
+        # 한도에 도달하면 기다리지 않고 거절 (수신 루프는 계속 cancel 프레임을 읽을 수 있음)
+        assert dispatcher.submit('s2', blocked) is False
+        assert dispatcher.get_stats()['rejected'] == 1
+        assert dispatcher.pending == 2
+
+        gate.set()
+        await wait_idle(dispatcher)
+        assert dispatcher.submit('s2', blocked)
+        await wait_idle(dispatcher)
+        assert dispatcher.get_stats()['completed'] == 3
+
+    asyncio.run(main())
+
+
+def test_cancel_frees_room_when_queue_is_full():
+    async def main():
+        dispatcher = SessionDispatcher('user', max_pending=2)
+
+        async def running():
+            await asyncio.sleep(60)
+
+        async def quick():
+            pass
+
+        dispatcher.submit('s1', running)
+        dispatcher.submit('s1', running)
+        await settle()
+        assert dispatcher.submit('s2', quick) is False
+
+        assert dispatcher.cancel('s1') is True
+        await settle()
+        assert dispatcher.submit('s2', quick)
+        await wait_idle(dispatcher)
+
+    asyncio.run(main())
+
+
+def test_cancel_stops_running_turn_and_drops_queued_turns():
+    ran = []
+
+    async def main():
+        dispatcher = SessionDispatcher('user', max_pending=3)
+        started = asyncio.Event()
+
+        async def running():
+            started.set()
+            await asyncio.sleep(60)
+
+        async def queued():
+            ran.append('queued')
+
+        dispatcher.submit('s1', running)
+        dispatcher.submit('s1', queued)
+        await started.wait()
+
+        assert dispatcher.cancel('s1') is True
+        await settle()
+        stats = dispatcher.get_stats()
+        assert stats['cancelled'] == 2
+        assert stats['sessions'] == 0
+        assert dispatcher.pending == 0
+        assert dispatcher.cancel('s1') is False
+
+        # 취소로 반환된 자리만큼 다시 제출 가능
+        for _ in range(3):
+            assert dispatcher.submit('s2', queued)
+        await wait_idle(dispatcher)
+
+    asyncio.run(main())
+    assert ran == ['queued'] * 3
+
+
+def test_close_cancels_all_sessions_and_ignores_new_turns():
+    ran = []
+
+    async def main():
+        dispatcher = SessionDispatcher('user', max_pending=4)
+
+        async def running():
+            await asyncio.sleep(60)
+
+        async def late():
+            ran.append('late')
+
+        dispatcher.submit('s1', running)
+        dispatcher.submit(None, running)
+        await settle()
+
+        assert dispatcher.close() == 2
+        dispatcher.submit('s1', late)
+        await settle()
+        assert dispatcher.pending == 0
+
+    asyncio.run(main())
+    assert ran == []
@@ -0,0 +1,105 @@
+"""
+유휴 세션 정리(Session Reaper) 테스트
+유휴 시간 초과 정리, 메모리 압박 시 살아 있는 CLI 프로세스를 가진 세션만 LRU 순서로 정리 검증
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import session_reaper as session_reaper_module
+from session_reaper import MB, SessionReaper
+
+POD_PID = 1
+
+
+class FakeProcess:
+    def __init__(self, idle_seconds, pids=(), busy=False):
+        self.last_activity = datetime.now() - timedelta(seconds=idle_seconds)
+        self._pids = list(pids)
+        self.is_busy = busy
+
+    def pids(self):
+        return list(self._pids)
+
+
+class FakeWorkspace:
+    def __init__(self, user_id, processes):
+        self.user_id = user_id
+        self.claude_processes = dict(processes)
+        self.evicted = []
+
+    async def evict_session(self, session_id):
+        self.evicted.append(session_id)
+        self.claude_processes.pop(session_id, None)
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """pid → RSS(MB) 표 - Pod 전체는 모든 값의 합"""
+    table = {}
+
+    def process_tree_rss(pid, children):
+        if pid == POD_PID:
+            return sum(table.values()) * MB
+        return table.get(pid, 0) * MB
+
+    monkeypatch.setattr(session_reaper_module.os, 'getpid', lambda: POD_PID)
+    monkeypatch.setattr(session_reaper_module, 'children_map', lambda: {})
+    monkeypatch.setattr(session_reaper_module, 'process_tree_rss', process_tree_rss)
+    return table
+
+
+@pytest.fixture
+def reaper(monkeypatch):
+    monkeypatch.setenv('SESSION_IDLE_TIMEOUT', '600')
+    monkeypatch.setenv('SESSION_REAPER_RSS_WATERMARK_MB', '1000')
+    return SessionReaper()
+
+
+def run_reaper(reaper, workspace):
+    reaper._workspaces = lambda: [workspace]
+    return asyncio.run(reaper.reap_once())
+
+
+def test_idle_sessions_are_evicted_and_busy_ones_kept(reaper, rss):
+    workspace = FakeWorkspace('u', {
+        'idle': FakeProcess(700),
+        'recent': FakeProcess(10),
+        'busy': FakeProcess(700, busy=True),
+    })
+    run_reaper(reaper, workspace)
+    assert workspace.evicted == ['idle']
+    assert reaper.stats['evicted_idle'] == 1
+
+
+def test_memory_pressure_evicts_lru_sessions_with_live_processes(reaper, rss):
+    rss.update({'pool': 700, 100: 300, 200: 300, 300: 300})
+    workspace = FakeWorkspace('u', {
+        'newest': FakeProcess(10, pids=[300]),
+        'oldest': FakeProcess(300, pids=[100]),
+        'middle': FakeProcess(200, pids=[200]),
+        'no-process': FakeProcess(400),
+    })
+    reclaimed = run_reaper(reaper, workspace)
+    # 1600MB → 1000MB 이하가 될 때까지 오래된 순으로 정리, 프로세스 없는 세션은 대상 아님
+    assert workspace.evicted == ['oldest', 'middle']
+    assert reclaimed == 600 * MB
+    assert reaper.stats['evicted_memory'] == 2
+
+
+def test_memory_pressure_without_session_processes_evicts_nothing(reaper, rss):
+    rss.update({'pool': 2000})
+    workspace = FakeWorkspace('u', {f's{index}': FakeProcess(index) for index in range(5)})
+    assert run_reaper(reaper, workspace) == 0
+    assert workspace.evicted == []
+    assert reaper.stats['evicted_memory'] == 0
+
+
+def test_memory_eviction_stops_when_nothing_is_freed(reaper, rss):
+    rss.update({'pool': 2000})
+    # pid는 남아 있지만 이미 종료되어 RSS가 0인 경우
+    workspace = FakeWorkspace('u', {'a': FakeProcess(30, pids=[100]), 'b': FakeProcess(20, pids=[200])})
+    assert run_reaper(reaper, workspace) == 0
+    assert workspace.evicted == ['a']
@@ -0,0 +1,117 @@
+"""
+샤드 카운터 테스트 (메모리 저장소)
+샤드 합산, 트랜잭션 안 증감, 재계산으로 드리프트 보정 검증
+"""
+
+import asyncio
+
+import google.cloud.firestore as firestore
+
+from database import db, async_transactional
+from sharded_counter import ShardedCounter
+
+
+def items_counter(num_shards=3):
+    return ShardedCounter(
+        'test_items',
+        num_shards,
+        lambda: db.collection('items').where(filter=firestore.FieldFilter('active', '==', True)),
+    )
+
+
+async def add_item(counter, item_id, active=True):
+    """아이템 생성과 카운터 증가를 한 트랜잭션으로"""
+    @async_transactional
+    async def run(transaction):
+        initialized = await counter.is_initialized(transaction)
+        transaction.set(db.collection('items').document(item_id), {'active': active})
+        if active:
+            counter.increment(transaction, 1, initialized=initialized)
+
+    await run(db.transaction())
+
+
+def test_sharded_counter_sums_shards(local_db):
+    async def main():
+        counter = items_counter()
+        assert await counter.read() is None
+        # 초기화 전에는 기준 쿼리로 계산
+        assert await counter.get() == 0
+
+        await asyncio.gather(*(add_item(counter, f'i{index}') for index in range(10)))
+        await add_item(counter, 'inactive', active=False)
+        assert await counter.get() == 10
+
+        @async_transactional
+        async def remove(transaction):
+            initialized = await counter.is_initialized(transaction)
+            transaction.delete(db.collection('items').document('i0'))
+            counter.increment(transaction, -1, initialized=initialized)
+
+        await remove(db.transaction())
+        assert await counter.get() == 9
+
+    asyncio.run(main())
+
+
+def test_sharded_counter_reconcile_fixes_drift(local_db):
+    async def main():
+        counter = items_counter()
+        assert await counter.get() == 0
+        for index in range(4):
+            await add_item(counter, f'i{index}')
+        # 카운터를 거치지 않은 쓰기
+        await db.collection('items').document('direct').set({'active': True})
+        assert await counter.get() == 4
+
+        assert await counter.reconcile() == 5
+        assert counter.stats['last_reconcile_drift'] == 1
+        assert await counter.get() == 5
+
+    asyncio.run(main())
+
+
+def test_uninitialized_counter_skips_increments_until_first_get(local_db):
+    async def main():
+        counter = items_counter()
+        for index in range(5):
+            await db.collection('items').document(f'i{index}').set({'active': True})
+        await add_item(counter, 'i5')
+        # 초기화 전 증가는 샤드를 만들지 않으므로 첫 조회가 기준 쿼리로 재계산
+        assert await counter.read() is None
+        assert counter.stats['skipped_increments'] == 1
+        assert await counter.get() == 6
+        assert counter.stats['reconciles'] == 1
+
+    asyncio.run(main())
+
+
+def test_remove_beta_user_with_uninitialized_counter(local_db):
+    from auth import beta_manager
+
+    async def main():
+        users = db.collection('users')
+        for index in range(5):
+            await users.document(f'u{index}').set({'is_beta_user': True})
+
+        assert await beta_manager.remove_beta_user('u0') is True
+        assert await beta_manager.get_beta_user_count() == 4
+
+        assert await beta_manager.remove_beta_user('u1') is True
+        assert await beta_manager.get_beta_user_count() == 3
+
+    asyncio.run(main())
+
+
+def test_complete_onboarding_counts_new_user_once(local_db):
+    from auth import beta_manager
+
+    async def main():
+        await db.collection('users').document('existing').set({'is_beta_user': True})
+        assert await beta_manager.get_beta_user_count() == 1
+
+        results = await asyncio.gather(*(beta_manager.complete_onboarding('new', {'nickname': 'n'}) for _ in range(5)))
+        assert all(results)
+        assert await beta_manager.get_beta_user_count() == 2
+
+    asyncio.run(main())
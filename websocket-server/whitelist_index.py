@@ -0,0 +1,254 @@
+"""
+화이트리스트 메모리 인덱스
+`whitelist` 컬렉션을 Pod 메모리에 들고 Firestore 스냅샷 리스너(on_snapshot)로 최신 상태를 유지
+(로그인/관리자 추가 시 이메일 → 상태 조회가 쿼리 없이 O(1), 관리자 목록도 메모리에서 응답,
+이메일은 정규화한 값(앞뒤 공백 제거, 소문자)으로 조회)
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set
+
+import google.cloud.firestore as firestore
+
+from auth import normalize_email
+from database import db, collect, listener_client
+
+logger = logging.getLogger(__name__)
+
+COLLECTION = 'whitelist'
+
+
+def _added_at_key(entry: dict) -> float:
+    """added_at 정렬 키 (리스너가 주는 UTC 시각과 로컬에서 쓴 naive UTC 시각을 함께 비교)"""
+    added_at = entry.get('added_at')
+    if not isinstance(added_at, datetime):
+        return 0.0
+    if added_at.tzinfo is None:
+        added_at = added_at.replace(tzinfo=timezone.utc)
+    return added_at.timestamp()
+
+
+class WhitelistIndex:
+    """문서 ID → 화이트리스트 항목, 이메일 → 상태 인덱스"""
+
+    def __init__(self):
+        self.enabled = os.getenv('WHITELIST_INDEX_ENABLED', 'true').lower() == 'true'
+        self.max_staleness = float(os.getenv('WHITELIST_MAX_STALENESS', '60'))  # 초 - 리스너가 이 이상 끊기면 Firestore 직접 조회
+        self.check_interval = float(os.getenv('WHITELIST_WATCH_CHECK_INTERVAL', '10'))  # 초 - 리스너 상태 확인/재시작 주기
+
+        # 리스너 콜백은 별도 스레드에서 호출되므로 락으로 보호
+        self._lock = threading.Lock()
+        self._entries: Dict[str, dict] = {}
+        self._doc_ids_by_email: Dict[str, Set[str]] = {}
+        self._status_by_email: Dict[str, str] = {}
+
+        self._loaded = False
+        self._watch = None
+        self._task: Optional[asyncio.Task] = None
+        self._down_since: Optional[float] = None  # 리스너가 끊긴 시각 (monotonic)
+        self._last_read_time: Optional[datetime] = None
+        self._last_snapshot_at: Optional[float] = None
+
+        self.stats = {
+            'lookups': 0,
+            'fallback_lookups': 0,
+            'snapshots': 0,
+            'applied_changes': 0,
+            'listener_restarts': 0,
+            'last_delivery_lag_ms': 0.0,
+        }
+
+    async def start(self):
+        """콜드 스타트 전체 로드 후 스냅샷 리스너 시작"""
+        if not self.enabled or self._task:
+            return
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.error(f"Whitelist index cold-start load failed: {e}")
+        self._start_listener()
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Whitelist index started ({len(self._entries)} entries, max_staleness={self.max_staleness}s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._stop_listener()
+
+    async def reload(self):
+        """컬렉션 전체를 다시 읽어 인덱스 교체"""
+        docs = await collect(db.collection(COLLECTION))
+        with self._lock:
+            self._entries.clear()
+            self._doc_ids_by_email.clear()
+            self._status_by_email.clear()
+            for doc in docs:
+                self._apply(doc.id, doc.to_dict())
+            self._loaded = True
+
+    # --- 리스너 ---
+
+    def _start_listener(self):
+        try:
+            self._watch = listener_client().collection(COLLECTION).on_snapshot(self._on_snapshot)
+        except Exception as e:
+            logger.error(f"Failed to start whitelist listener: {e}")
+            self._watch = None
+            if self._down_since is None:
+                self._down_since = time.monotonic()
+
+    def _stop_listener(self):
+        if self._watch:
+            try:
+                self._watch.unsubscribe()
+            except Exception as e:
+                logger.warning(f"Failed to stop whitelist listener: {e}")
+            self._watch = None
+
+    def _on_snapshot(self, docs, changes, read_time):
+        """리스너 스레드에서 호출 - 변경분만 반영"""
+        with self._lock:
+            for change in changes:
+                if change.type.name == 'REMOVED':
+                    self._remove(change.document.id)
+                else:
+                    self._apply(change.document.id, change.document.to_dict())
+            self._loaded = True
+            self._down_since = None
+            self._last_read_time = read_time
+            self._last_snapshot_at = time.monotonic()
+            self.stats['snapshots'] += 1
+            self.stats['applied_changes'] += len(changes)
+            if read_time is not None:
+                lag = datetime.now(timezone.utc).timestamp() - read_time.timestamp()
+                self.stats['last_delivery_lag_ms'] = round(max(lag, 0.0) * 1000, 2)
+
+    async def _run(self):
+        """리스너가 오류로 닫혔으면 재시작 (끊긴 동안은 stale로 표시)"""
+        while True:
+            await asyncio.sleep(self.check_interval)
+            if self._watch is not None and self._watch.is_active:
+                continue
+            with self._lock:
+                if self._down_since is None:
+                    self._down_since = time.monotonic()
+            logger.warning("Whitelist listener is not active, restarting")
+            self._stop_listener()
+            self._start_listener()
+            self.stats['listener_restarts'] += 1
+
+    # --- 인덱스 갱신 (락 안에서 호출) ---
+
+    def _apply(self, doc_id: str, data: dict):
+        self._remove(doc_id)
+        entry = {**data, 'id': doc_id}
+        self._entries[doc_id] = entry
+        email = normalize_email(entry.get('email') or '')
+        if email:
+            self._doc_ids_by_email.setdefault(email, set()).add(doc_id)
+            self._refresh_status(email)
+
+    def _remove(self, doc_id: str):
+        entry = self._entries.pop(doc_id, None)
+        email = normalize_email((entry or {}).get('email') or '')
+        if not email:
+            return
+        doc_ids = self._doc_ids_by_email.get(email)
+        if doc_ids:
+            doc_ids.discard(doc_id)
+            if not doc_ids:
+                del self._doc_ids_by_email[email]
+        self._refresh_status(email)
+
+    def _refresh_status(self, email: str):
+        """같은 이메일 문서가 여러 개면 하나라도 active면 active"""
+        statuses = [self._entries[doc_id].get('status') for doc_id in self._doc_ids_by_email.get(email, ())]
+        if not statuses:
+            self._status_by_email.pop(email, None)
+        else:
+            self._status_by_email[email] = 'active' if 'active' in statuses else statuses[0]
+
+    # --- 조회 ---
+
+    @property
+    def staleness(self) -> float:
+        """리스너가 끊긴 뒤 지난 시간 (초, 정상 수신 중이면 0)"""
+        if not self._loaded:
+            return float('inf')
+        if self._down_since is None:
+            return 0.0
+        return time.monotonic() - self._down_since
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.enabled and self.staleness <= self.max_staleness
+
+    async def is_active(self, email: str) -> bool:
+        """화이트리스트 활성 여부 (인덱스가 오래됐으면 Firestore 직접 조회)"""
+        email = normalize_email(email)
+        if self.is_fresh:
+            self.stats['lookups'] += 1
+            return self._status_by_email.get(email) == 'active'
+
+        self.stats['fallback_lookups'] += 1
+        query = db.collection(COLLECTION).where('email', '==', email).where('status', '==', 'active')
+        docs = await collect(query.limit(1))
+        return len(docs) > 0
+
+    async def list_entries(self) -> List[dict]:
+        """added_at 최신순 전체 목록"""
+        if self.is_fresh:
+            with self._lock:
+                entries = [dict(entry) for entry in self._entries.values()]
+            return sorted(entries, key=_added_at_key, reverse=True)
+
+        query = db.collection(COLLECTION).order_by('added_at', direction=firestore.Query.DESCENDING)
+        return [{**doc.to_dict(), 'id': doc.id} for doc in await collect(query)]
+
+    async def entries_for(self, email: str) -> List[dict]:
+        """이메일(정규화해서 비교)의 화이트리스트 항목 목록"""
+        email = normalize_email(email)
+        if self.is_fresh:
+            with self._lock:
+                return [dict(self._entries[doc_id]) for doc_id in self._doc_ids_by_email.get(email, ())]
+
+        query = db.collection(COLLECTION).where('email', '==', email)
+        return [{**doc.to_dict(), 'id': doc.id} for doc in await collect(query)]
+
+    def record_write(self, doc_id: str, data: dict):
+        """이 Pod에서 쓴 문서를 리스너 전달 전에 바로 반영 (관리자 추가 직후 목록 조회 일관성)"""
+        with self._lock:
+            self._apply(doc_id, data)
+
+    def record_delete(self, doc_id: str):
+        with self._lock:
+            self._remove(doc_id)
+
+    def get_stats(self) -> dict:
+        staleness = self.staleness
+        return {
+            'enabled': self.enabled,
+            'loaded': self._loaded,
+            'listening': bool(self._watch is not None and self._watch.is_active),
+            'entries': len(self._entries),
+            'emails': len(self._status_by_email),
+            'staleness_sec': None if staleness == float('inf') else round(staleness, 1),
+            'fresh': self.is_fresh,
+            'last_read_time': self._last_read_time.isoformat() if self._last_read_time else None,
+            'sec_since_last_snapshot': round(time.monotonic() - self._last_snapshot_at, 1) if self._last_snapshot_at else None,
+            **self.stats,
+        }
+
+
+# 싱글톤
+whitelist_index = WhitelistIndex()